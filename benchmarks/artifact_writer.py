@@ -0,0 +1,86 @@
+"""
+Cost of writing the compiler outputs for a large program: building each file as one string
+(the old write_all path) against streaming it through ArtifactWriter, in the foreground and
+from the background thread. Every variant must leave byte-identical files behind.
+
+    python -m benchmarks.artifact_writer [--size CHARACTERS]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program
+from parser import Parser
+from utils.file_handler import ArtifactWriter, write_all
+
+ARTIFACTS = ('tokens', 'lexical_errors', 'symbol_table_old', 'symbol_table', 'parse_tree', 'syntax_errors',
+             'output', 'semantic_errors')
+
+
+class MeasuredWriter(ArtifactWriter):
+    """Records the time spent in `write` calls and the extra memory each of them needed."""
+
+    def __init__(self, materialize: bool = False, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.materialize = materialize
+        self.seconds = 0.0
+        self.peak = 0
+
+    def write(self, name, lines) -> None:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        if self.materialize:
+            write_all(filename=name, string=''.join(lines))
+        else:
+            super().write(name, lines)
+        self.seconds += time.perf_counter() - start
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1] - before)
+
+
+def run(source: str, **kwargs) -> tuple:
+    with workspace(source):
+        writer = MeasuredWriter(**kwargs)
+        tracemalloc.start()
+        elapsed, _ = timed(lambda: (Parser(writer=writer).parse(), writer.close()))
+        tracemalloc.stop()
+        artifacts = {}
+        for name in ARTIFACTS:
+            with open(f'{name}.txt', 'rb') as file:
+                artifacts[name] = file.read()
+    return writer, elapsed, artifacts
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=40_000)
+    args = arg_parser.parse_args()
+
+    source = large_program(args.size)
+    variants = (
+        ('write_all', dict(materialize=True)),
+        ('streamed', dict()),
+        ('background', dict(background=True)),
+    )
+    rows = []
+    expected = None
+    failed = False
+    for name, kwargs in variants:
+        writer, elapsed, artifacts = run(source, **kwargs)
+        expected = expected or artifacts
+        failed |= artifacts != expected
+        identical = 'identical' if artifacts == expected else 'DIFFERENT'
+        rows.append((name, f'{elapsed:.2f}s', f'{writer.seconds * 1000:.1f}ms', f'{writer.peak / 2 ** 20:.1f} MB',
+                     identical))
+    size = sum(map(len, expected.values()))
+    report(f'artifacts of a {len(source)} character program ({size / 2 ** 20:.1f} MB written, {os.cpu_count()} cpus)',
+           rows, ('writer', 'compile', 'in write', 'write peak', 'artifacts'))
+    if failed:
+        raise SystemExit('artifact writers disagree')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Throughput of the batch driver against launching compiler.py once per program in its own
+directory, the way CI used to, on a directory of small generated programs. The process per file
+figure is measured on a sample and both must leave the same output files for it.
+
+    python -m benchmarks.batch [--files COUNT] [--sample COUNT] [--workers COUNT]
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import report, timed
+from benchmarks.corpus import valid_program
+from driver.batch import compile_batch, output_directory
+from parser import PROFILES
+
+COMPILER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'compiler.py')
+
+
+def process_per_file(paths: list, root: str) -> None:
+    for path in paths:
+        directory = output_directory(root, path)
+        os.makedirs(directory)
+        with open(path) as source, open(os.path.join(directory, 'input.txt'), 'w') as file:
+            file.write(source.read())
+        subprocess.run([sys.executable, COMPILER, '--profile', 'codegen'], cwd=directory, check=False,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def same_outputs(paths: list, expected_root: str, root: str) -> bool:
+    for path in paths:
+        for name in PROFILES['codegen']:
+            files = [os.path.join(output_directory(directory, path), f'{name}.txt') for directory in (expected_root, root)]
+            contents = [open(file, 'rb').read() if os.path.exists(file) else None for file in files]
+            if contents[0] != contents[1]:
+                return False
+    return True
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--files', type=int, default=2_000)
+    arg_parser.add_argument('--sample', type=int, default=50)
+    arg_parser.add_argument('--workers', type=int)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = os.path.join(directory, 'sources')
+        os.makedirs(sources)
+        programs = [valid_program(seed, functions=1, statements=3) for seed in range(100)]
+        paths = []
+        for index in range(args.files):
+            paths.append(os.path.join(sources, f'{index:06}.txt'))
+            with open(paths[-1], 'w') as file:
+                file.write(programs[index % len(programs)])
+
+        sample = paths[:args.sample]
+        process_time, _ = timed(process_per_file, sample, os.path.join(directory, 'processes'))
+        batch_time, results = timed(lambda: list(compile_batch(paths, output_root=os.path.join(directory, 'batch'),
+                                                               workers=args.workers)))
+        identical = same_outputs(sample, os.path.join(directory, 'processes'), os.path.join(directory, 'batch'))
+
+    failures = sum(result.error is not None for result in results)
+    rows = [
+        ('compiler.py per file', len(sample), f'{process_time:.2f}s', f'{len(sample) / process_time:,.0f}/s', '-'),
+        ('driver.batch', len(results), f'{batch_time:.2f}s', f'{len(results) / batch_time:,.0f}/s', failures),
+    ]
+    report(f'compiling small programs into a directory each, output files '
+           f'{"identical" if identical else "DIFFERENT"}, driver peak RSS '
+           f'{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB', rows,
+           ('driver', 'files', 'time', 'throughput', 'failures'))
+    if not identical:
+        raise SystemExit('driver.batch writes other files than compiler.py')
+
+
+if __name__ == '__main__':
+    main()
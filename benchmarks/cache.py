@@ -0,0 +1,73 @@
+"""
+Compile time through the compilation cache: every program of a corpus compiled without the
+cache, then cold, filling it, then warm, restoring every result from it. Warm results must be
+those of the uncached compiles, and a cache bounded below the corpus size must stay under its
+bound.
+
+    python -m benchmarks.cache [--count PROGRAMS] [--size CHARACTERS]
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import warnings
+
+from benchmarks.common import report, timed
+from benchmarks.corpus import corpus, large_program
+from driver import ARTIFACTS, compile_source
+from driver.cache import ENTRY, CompileCache, read_stats
+
+
+def compile_all(sources: list, compile) -> list:
+    results = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for source in sources:
+            try:
+                results.append(compile(source, ARTIFACTS))
+            except Exception as error:  # the code generator crashes on some malformed programs
+                results.append(type(error).__name__)
+    return results
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=60)
+    arg_parser.add_argument('--size', type=int, default=40_000)
+    args = arg_parser.parse_args()
+
+    sources = list(corpus(args.count).values()) + [large_program(args.size)]
+    with tempfile.TemporaryDirectory() as directory:
+        uncached_time, expected = timed(compile_all, sources, compile_source)
+        rows = [('no cache', f'{uncached_time:.2f}s', '1.00x', '-')]
+        failed = False
+        with CompileCache(directory) as cache:
+            for name in ('cold', 'warm'):
+                elapsed, results = timed(compile_all, sources, cache.compile)
+                failed |= results != expected
+                rows.append((name, f'{elapsed:.2f}s', f'{uncached_time / elapsed:.2f}x',
+                             'identical' if results == expected else 'DIFFERENT'))
+        stats = read_stats(directory)
+        sizes = [os.path.getsize(path) for path in glob.glob(os.path.join(directory, '*', '*' + ENTRY))]
+        size = sum(sizes)
+
+        bound = (size - max(sizes)) // 4  # the corpus without the large program, which outgrows the bound
+        with tempfile.TemporaryDirectory() as bounded:
+            with CompileCache(bounded, max_bytes=bound) as cache:
+                compile_all(sources[:-1], cache.compile)
+                cache.trim()
+            bounded_size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(bounded, '*', '*' + ENTRY)))
+            evictions = read_stats(bounded)['evictions']
+
+    report(f'compiling {len(sources)} programs with every artifact, {stats["hits"]} hits, {stats["misses"]} misses '
+           f'(failed compiles are not cached), {size / 2 ** 20:.1f} MB of entries', rows,
+           ('cache', 'time', 'speedup', 'results'))
+    print(f'corpus bounded to {bound / 2 ** 10:.0f} kB: {bounded_size / 2 ** 10:.0f} kB kept after '
+          f'{evictions} evictions, {"within" if bounded_size <= bound else "OVER"} the bound')
+    if failed or bounded_size > bound:
+        raise SystemExit('the cache changes what is compiled or outgrows its bound')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compile time of call heavy programs as they grow: every function name is overloaded at two
+arities and defined a second time at one of them, which is reported and taken off the table,
+and main calls every overload, once with an arity that matches none. A compile linear in the
+program keeps the time per call flat from one size to the next.
+
+Then the symbol table alone, with a single name overloaded at every arity up to --overloads:
+each overload is declared and checked for duplicates as #check_func does, and a call of every
+arity is resolved as func_call_finish does.
+
+    python -m benchmarks.calls [--names COUNT,...] [--overloads COUNT,...]
+"""
+
+import argparse
+import warnings
+
+from benchmarks.common import report, timed
+from driver import compile_source
+from parser import PROFILES
+from parser.symbol_table import SymbolTable
+
+
+def program(names: int) -> str:
+    lines = []
+    for index in range(names):
+        lines += [f'def g{index}(a):', '    return a + 1;', ';']
+        lines += [f'def g{index}(a, b):', '    return a * b;', ';']
+        lines += [f'def g{index}(c):', '    return c;', ';']  # already defined with one argument
+    lines.append('def main():')
+    for index in range(names):
+        lines.append(f'    x = g{index}({index % 10});')
+        lines.append(f'    output(g{index}(x, g{index // 2}(x)));')
+        lines.append(f'    x = g{index}(x, x, x);')  # matches no arity
+    lines.append(';')
+    return '\n'.join(lines) + '\n'
+
+
+def overload(count: int) -> None:
+    table = SymbolTable(archive=False)
+    for arity in range(count):
+        function = table.add_symbol(lexeme='h', category='func', force=True)
+        table.set_args_cells(addr=function.address, count=arity)
+        if not table.is_last_func_valid():
+            raise AssertionError(f'h of {arity} arguments reported as a duplicate')
+    for arity in range(count):
+        if not table.has_func_args_count('h', arity) or table.get_func_address('h', arity) is None:
+            raise AssertionError(f'h of {arity} arguments not resolved')
+        table.get_first_func_address('h')
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--names', default='500,2000,8000', help='comma separated function name counts')
+    arg_parser.add_argument('--overloads', default='1000,4000,16000', help='comma separated overload counts')
+    args = arg_parser.parse_args()
+
+    rows = []
+    for names in map(int, args.names.split(',')):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            elapsed, result = timed(compile_source, program(names), PROFILES['codegen'])
+        calls = names * 4
+        rows.append((f'{names:,}', f'{calls:,}', f'{elapsed:.2f}s', f'{elapsed / calls * 1e6:.1f}us',
+                     len(result.semantic_errors)))
+    report('compiling programs of overloaded functions in the codegen profile', rows,
+           ('names', 'calls', 'compile', 'per call', 'semantic errors'))
+
+    rows = []
+    for count in map(int, args.overloads.split(',')):
+        elapsed, _ = timed(overload, count)
+        rows.append((f'{count:,}', f'{elapsed:.3f}s', f'{elapsed / count * 1e6:.1f}us'))
+    report('declaring, checking and calling overloads of a single name', rows, ('overloads', 'time', 'per overload'))
+
+
+if __name__ == '__main__':
+    main()
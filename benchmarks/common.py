@@ -0,0 +1,36 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+
+import contextlib
+import os
+import tempfile
+import time
+
+
+@contextlib.contextmanager
+def workspace(source: str):
+    """Runs the body inside a fresh directory holding `source` as input.txt."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'input.txt'), 'w') as file:
+            file.write(source)
+        os.chdir(directory)
+        try:
+            yield directory
+        finally:
+            os.chdir(cwd)
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def report(title: str, rows: list, header: tuple) -> None:
+    print(title)
+    widths = [max(len(str(row[i])) for row in rows + [header]) for i in range(len(header))]
+    for row in [header] + rows:
+        print('  '.join(f'{str(cell):<{width}}' for cell, width in zip(row, widths)))
+    print()
@@ -0,0 +1,60 @@
+"""
+Compiles per second of many small programs in one process: compile_source returning objects
+only, and rendering the codegen profile's files in memory, against a Parser writing its files
+into a fresh directory for every program. The in-memory artifacts must match those files.
+
+    python -m benchmarks.compile_api [--count COMPILES] [--programs DISTINCT]
+"""
+
+import argparse
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import valid_program
+from driver import ARTIFACTS, compile_source
+from parser import PROFILES, Parser
+
+
+def compile_files(source: str, profile: str) -> dict:
+    with workspace(source):
+        Parser(profile=profile).parse()
+        artifacts = {}
+        for name in PROFILES[profile]:
+            with open(f'{name}.txt') as file:
+                artifacts[name] = file.read()
+    return artifacts
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=10_000)
+    arg_parser.add_argument('--programs', type=int, default=100)
+    args = arg_parser.parse_args()
+
+    programs = [valid_program(seed, functions=1, statements=3) for seed in range(args.programs)]
+    sources = [programs[index % len(programs)] for index in range(args.count)]
+    identical = all(compile_source(source, ARTIFACTS).artifacts == compile_files(source, 'full')
+                    for source in programs)
+
+    runs = (
+        ('Parser, files in a fresh directory', lambda: [compile_files(source, 'codegen') for source in sources]),
+        ('compile_source, codegen artifacts', lambda: [compile_source(source, PROFILES['codegen'])
+                                                        for source in sources]),
+        ('compile_source, objects only', lambda: [compile_source(source) for source in sources]),
+        ('compile_source, objects only, descent', lambda: [compile_source(source, engine='descent')
+                                                            for source in sources]),
+    )
+    rows = []
+    baseline = None
+    for name, run in runs:
+        elapsed, _ = timed(run)
+        baseline = baseline or elapsed
+        rows.append((name, f'{elapsed:.2f}s', f'{len(sources) / elapsed:,.0f}/s', f'{baseline / elapsed:.2f}x'))
+    report(f'{len(sources)} compiles of {len(programs)} programs of about '
+           f'{sum(map(len, programs)) // len(programs)} characters, artifacts {"identical" if identical else "DIFFERENT"}',
+           rows, ('compiler', 'time', 'compiles', 'speedup'))
+    if not identical:
+        raise SystemExit('compile_source artifacts differ from the files')
+
+
+if __name__ == '__main__':
+    main()
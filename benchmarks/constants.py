@@ -0,0 +1,108 @@
+"""
+Checks constant folding against the tester interpreter: generated programs are compiled with the
+code generator folding constants and with it leaving every number in a temp as it used to, each
+with and without the peephole passes, every output.txt is run through ./tester, and what the
+programs print must not change. Reported are the instructions generated and executed folding
+constants, against not folding them. It exits with 1, naming the programs, when folding changes
+what one prints or raises. Programs the code generator gives up on unfolded without passes are
+left out, and counted.
+
+Programs whose temps run into the cells of arrays unfolded are left out, as they print what the
+collisions make of them, and folding, taking fewer temps, collides less.
+
+    python -m benchmarks.constants [--count PROGRAMS] [--timeout SECONDS]
+"""
+
+import argparse
+import sys
+import warnings
+from unittest import mock
+
+from benchmarks.common import report
+from benchmarks.corpus import valid_program
+from benchmarks.peephole import execute
+from codegen.codegen import CodeGenerator
+from driver import compile_source
+from parser import PASSES, PROFILES
+
+
+def compile_unfolded(source: str, passes) -> tuple:
+    """The compile result not folding constants, and whether its temps ran into the cells of arrays."""
+    generators = []
+
+    def unfolded(*args, **kwargs) -> CodeGenerator:
+        generators.append(CodeGenerator(*args, fold_constants=False, **kwargs))
+        return generators[-1]
+
+    with mock.patch('parser.parser.CodeGenerator', unfolded):
+        result = compile_source(source, PROFILES['diagnostics'], passes=passes)
+    return result, generators[-1]._temp_manager.overrun
+
+
+def compile_folded(source: str, passes) -> tuple:
+    return compile_source(source, PROFILES['diagnostics'], passes=passes), False
+
+
+COMPILES = {'unfolded': compile_unfolded, 'folded': compile_folded}
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=300, help='generated programs to compile and run')
+    arg_parser.add_argument('--timeout', type=float, default=10.0, help='seconds a program may run in the tester')
+    args = arg_parser.parse_args()
+
+    configurations = [('no passes', ()), ('all passes', PASSES)]
+    sizes, executed, failures = {}, {}, []
+    programs = overruns = given_up = 0
+    for seed in range(args.count):
+        source = valid_program(seed, functions=seed % 5, statements=3 + seed % 6)
+        results, overrun = {}, False
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for name, passes in configurations:
+                for folding, compile_with in COMPILES.items():
+                    try:
+                        results[name, folding], overran = compile_with(source, passes)
+                    except Exception as error:
+                        if not results:  # the code generator gives up on some programs, folding or not
+                            given_up += 1
+                            break
+                        failures.append(f'seed {seed} with {name} {folding}: raises {type(error).__name__}: {error}')
+                        continue
+                    overrun = overrun or overran
+                if not results:
+                    break
+        if len(results) < len(configurations) * len(COMPILES):
+            continue
+        if overrun:
+            overruns += 1
+            continue
+        if not all(result.ok for result in results.values()):  # no output.txt to run
+            continue
+        runs = {key: execute(result.program_block, args.timeout) for key, result in results.items()}
+        if any(printed is None for printed, _ in runs.values()):
+            continue
+        programs += 1
+        for (name, folding), (printed, count) in runs.items():
+            if printed != runs[name, 'unfolded'][0]:
+                failures.append(f'seed {seed} with {name}: prints differently')
+            sizes[name, folding] = sizes.get((name, folding), 0) + len(results[name, folding].program_block)
+            executed[name, folding] = executed.get((name, folding), 0) + count
+
+    if programs:  # no totals to report when every program failed
+        report(f'{programs} generated programs run through the tester, {overruns} left out with temps overrun, '
+               f'{given_up} the code generator gives up on', [
+            (name, folding, f'{sizes[name, folding]:,}', f'{1 - sizes[name, folding] / sizes[name, "unfolded"]:.1%}',
+             f'{executed[name, folding]:,}', f'{1 - executed[name, folding] / executed[name, "unfolded"]:.1%}')
+            for name, _ in configurations for folding in ('unfolded', 'folded')
+        ], ('peephole', 'constants', 'instructions', 'fewer', 'executed', 'fewer'))
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print('every program prints the same folding constants')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Deterministic source generators shared by the benchmark scripts.
+"""
+
+import random
+
+SYMBOL_SOUP = ';:,[]()+-<*=/#'
+LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+DIGITS = '0123456789'
+JUNK = '$@!?.&%^~`"\'|\\{}é²½ß'
+WHITESPACE = '  \n\t\v\f'
+
+
+class ProgramGenerator:
+    def __init__(self, seed: int = 0) -> None:
+        self.rng = random.Random(seed)
+        self._names = 0
+
+    def name(self, prefix: str = 'v') -> str:
+        self._names += 1
+        return f'{prefix}{self._names}'
+
+    def expression(self, names: list, depth: int = 0) -> str:
+        rng = self.rng
+        if depth > 2 or rng.random() < 0.4:
+            if names and rng.random() < 0.6:
+                return rng.choice(names)
+            return str(rng.randint(0, 9))
+        op = rng.choice(['+', '-', '*', '+', '**'])
+        if op == '**':
+            return f'{self.expression(names, 3)} ** {rng.randint(0, 3)}'
+        return f'{self.expression(names, depth + 1)} {op} {self.expression(names, depth + 1)}'
+
+    def block(self, names: list, funcs: list, size: int, indent: str, depth: int = 0) -> list:
+        rng = self.rng
+        names = list(names)
+        lines = []
+        for _ in range(size):
+            kind = rng.random()
+            if kind < 0.35 or not names:
+                var = self.name()
+                lines.append(f'{indent}{var} = {self.expression(names)};')
+                names.append(var)
+            elif kind < 0.5:
+                arr = self.name('arr')
+                items = ', '.join(self.expression(names) for _ in range(rng.randint(1, 4)))
+                lines.append(f'{indent}{arr} = [{items}];')
+                lines.append(f'{indent}output({arr}[{rng.randint(0, len(items.split(",")) - 1)}]);')
+            elif kind < 0.65:
+                lines.append(f'{indent}output({self.expression(names)});')
+            elif kind < 0.75 and funcs:
+                func, arity = rng.choice(funcs)
+                args = ', '.join(self.expression(names) for _ in range(arity))
+                lines.append(f'{indent}output({func}({args}));')
+            elif kind < 0.85 and depth < 2:
+                cond = f'{self.expression(names)} {rng.choice(["<", "=="])} {self.expression(names)}'
+                lines.append(f'{indent}if {cond}:')
+                lines += self.block(names, funcs, rng.randint(1, 3), indent + '    ', depth + 1)
+                if rng.random() < 0.5:
+                    lines.append(f'{indent}else:')
+                    lines += self.block(names, funcs, rng.randint(1, 3), indent + '    ', depth + 1)
+                lines.append(f'{indent};')
+            elif kind < 0.93 and depth < 2:
+                counter = self.name('i')
+                lines.append(f'{indent}{counter} = 0;')
+                lines.append(f'{indent}while ({counter} < {rng.randint(1, 4)})')
+                lines.append(f'{indent}    {counter} = {counter} + 1;')
+                if rng.random() < 0.3:
+                    lines.append(f'{indent}    if {counter} == 2:')
+                    lines.append(f'{indent}        {rng.choice(["break", "continue"])};')
+                    lines.append(f'{indent}    ;')
+                lines += self.block(names + [counter], funcs, rng.randint(1, 3), indent + '    ', depth + 1)
+                lines.append(f'{indent};')
+                names.append(counter)
+            else:
+                if rng.random() < 0.5:
+                    lines.append(f'{indent}/* {self.name("note")} */')
+                else:
+                    lines.append(f'{indent}# {self.name("note")}')
+        return lines
+
+    def program(self, functions: int = 3, statements: int = 6) -> str:
+        rng = self.rng
+        lines = []
+        funcs = []
+        for _ in range(functions):
+            func = self.name('f')
+            params = [self.name('p') for _ in range(rng.randint(0, 3))]
+            lines.append(f'def {func}({", ".join(params)}):')
+            lines += self.block(params, funcs, statements, '    ')
+            lines.append(f'    return {self.expression(params)};')
+            lines.append(';')
+            funcs.append((func, len(params)))
+        lines.append('def main():')
+        lines += self.block([], funcs, statements, '    ')
+        lines.append(';')
+        return '\n'.join(lines) + '\n'
+
+
+def valid_program(seed: int = 0, functions: int = 3, statements: int = 6) -> str:
+    return ProgramGenerator(seed).program(functions, statements)
+
+
+def large_program(size: int, seed: int = 0) -> str:
+    """Valid program of at least `size` characters made of many small functions."""
+    generator = ProgramGenerator(seed)
+    parts = []
+    length = 0
+    while length < size:
+        part = generator.program(functions=4, statements=8).replace('def main():', f'def {generator.name("m")}():')
+        parts.append(part)
+        length += len(part)
+    parts.append('def main():\n    output(1);\n;\n')
+    return ''.join(parts)
+
+
+def mutate(source: str, seed: int = 0, edits: int = 5) -> str:
+    """Inserts, deletes and swaps random characters to produce malformed programs."""
+    rng = random.Random(seed)
+    chars = list(source)
+    alphabet = SYMBOL_SOUP + LETTERS[:6] + DIGITS[:4] + JUNK + WHITESPACE
+    for _ in range(edits):
+        if not chars:
+            break
+        position = rng.randrange(len(chars))
+        action = rng.random()
+        if action < 0.4:
+            chars.insert(position, rng.choice(alphabet))
+        elif action < 0.7:
+            del chars[position]
+        else:
+            chars[position] = rng.choice(alphabet)
+    return ''.join(chars)
+
+
+def lexical_soup(size: int, seed: int = 0) -> str:
+    """Random character soup exercising every DFA state, including its error paths."""
+    rng = random.Random(seed)
+    pieces = ['/*', '*/', '**', '==', '3.', '3.14', '12a', 'ab$', 'x1', 'if', 'def']
+    alphabet = SYMBOL_SOUP + LETTERS + DIGITS + JUNK + WHITESPACE + '\n' * 4
+    out = []
+    length = 0
+    while length < size:
+        piece = rng.choice(pieces) if rng.random() < 0.2 else rng.choice(alphabet)
+        out.append(piece)
+        length += len(piece)
+    text = ''.join(out)
+    # keep block comments short so no single lexeme outgrows a scanner buffer
+    return text.replace('/*', '/* */', text.count('/*') - 1) if '/*' in text else text
+
+
+def corpus(count: int = 60, seed: int = 0) -> dict:
+    """Named mix of valid, malformed and lexically hostile programs."""
+    programs = {}
+    for i in range(count):
+        source = valid_program(seed + i, functions=1 + i % 4, statements=2 + i % 7)
+        programs[f'valid_{i:03}'] = source
+        programs[f'mutated_{i:03}'] = mutate(source, seed + i, edits=1 + i % 6)
+        programs[f'soup_{i:03}'] = lexical_soup(50 + 30 * i, seed + i)
+    return programs
@@ -0,0 +1,71 @@
+"""
+Differential check and compile time of the parser engines: the table driven loop against the
+generated recursive descent functions. Every program of the corpus, valid and malformed, must
+leave the same files in both profiles, and fail the same way where the code generator gives up.
+
+    python -m benchmarks.engines [--count PROGRAMS] [--size CHARACTERS] [--repeat COUNT]
+"""
+
+import argparse
+import os
+import warnings
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import corpus, large_program
+from parser import ENGINES, Parser, PROFILES
+
+
+def run(source: str, engine: str, profile: str) -> tuple:
+    """Compile time, then the files left and the error raised, if any."""
+    with workspace(source), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        failure = None
+        try:
+            elapsed, _ = timed(Parser(profile=profile, engine=engine).parse)
+        except Exception as error:  # the code generator crashes on some malformed programs
+            elapsed, failure = 0.0, type(error).__name__
+        artifacts = {}
+        for name in PROFILES['full']:
+            if os.path.exists(f'{name}.txt'):
+                with open(f'{name}.txt', 'rb') as file:
+                    artifacts[name] = file.read()
+    return elapsed, (artifacts, failure)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=60)
+    arg_parser.add_argument('--size', type=int, default=40_000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    programs = corpus(args.count)
+    failed = False
+    rows = []
+    for profile in PROFILES:
+        different = [name for name, source in programs.items()
+                     if len({repr(run(source, engine, profile)[1]) for engine in ENGINES}) > 1]
+        failed |= bool(different)
+        rows.append((profile, len(programs), len(different), ', '.join(different[:5]) or '-'))
+    report('corpus compiled with both engines', rows, ('profile', 'programs', 'different', 'first differences'))
+
+    source = large_program(args.size)
+    for profile in PROFILES:
+        rows = []
+        expected = baseline = None
+        for engine in ENGINES:
+            best, result = min((run(source, engine, profile) for _ in range(args.repeat)),
+                               key=lambda result: result[0])
+            expected = expected or result
+            baseline = baseline or best
+            failed |= result != expected
+            rows.append((engine, f'{best:.3f}s', f'{baseline / best:.2f}x',
+                         'identical' if result == expected else 'DIFFERENT'))
+        report(f'compiling a {len(source)} character program in the {profile} profile, best of {args.repeat}',
+               rows, ('engine', 'time', 'speedup', 'files'))
+    if failed:
+        raise SystemExit('parse engines disagree')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Cost of the hot path counters: compile time of a large program without them, which must match
+the parser before they existed, and with them on both engines. Counted compiles must leave the
+same files, and both engines must count the same expansions, calls and recoveries.
+
+    python -m benchmarks.hot_paths [--size CHARACTERS] [--repeat COUNT]
+"""
+
+import argparse
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program
+from parser import ENGINES, Parser, PROFILES
+from parser.hot_paths import HotPaths
+
+
+def run(source: str, engine: str, counted: bool) -> tuple:
+    hot_paths = HotPaths() if counted else None
+    with workspace(source):
+        elapsed, _ = timed(Parser(engine=engine, hot_paths=hot_paths).parse)
+        artifacts = {}
+        for name in PROFILES['full']:
+            with open(f'{name}.txt', 'rb') as file:
+                artifacts[name] = file.read()
+    counts = hot_paths and (hot_paths.expansions, hot_paths.action_calls, hot_paths.recoveries)
+    return elapsed, artifacts, counts
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=40_000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    source = large_program(args.size)
+    rows = []
+    expected = expected_counts = None
+    failed = False
+    for engine in ENGINES:
+        baseline = None
+        for counted in (False, True):
+            best, artifacts, counts = min((run(source, engine, counted) for _ in range(args.repeat)),
+                                          key=lambda result: result[0])
+            expected = expected or artifacts
+            expected_counts = expected_counts or counts
+            baseline = baseline or best
+            failed |= artifacts != expected or counts is not None and counts != expected_counts
+            rows.append((engine, 'on' if counted else 'off', f'{best:.3f}s', f'{best / baseline:.2f}x',
+                         'identical' if artifacts == expected else 'DIFFERENT',
+                         '-' if counts is None else 'identical' if counts == expected_counts else 'DIFFERENT'))
+    report(f'compiling a {len(source)} character program, best of {args.repeat}', rows,
+           ('engine', 'counters', 'time', 'slowdown', 'files', 'counts'))
+    if failed:
+        raise SystemExit('counting the hot paths changes what is compiled')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Randomized check of incremental re-lexing against a full rescan after every edit, and the time
+each of them takes on a large program. Edits include opening and closing block comments.
+
+    python -m benchmarks.incremental_lexing [--size CHARACTERS] [--edits COUNT] [--seed SEED]
+"""
+
+import argparse
+import random
+
+from benchmarks.common import report, timed
+from benchmarks.corpus import large_program
+from scanner.chunks import LexedChunk, lex_chunk
+from scanner.incremental import IncrementalLexer
+
+INSERTIONS = ('a', 'x1', ' ', '\n', ';', '(', '/*', '*/', '*', '/', '#', '3.', '==', 'if', '$', 'é')
+
+
+def view(lexed: LexedChunk) -> tuple:
+    pending = lexed.pending if lexed.state == 8 else None
+    return (list(lexed.tokens.render()), list(lexed.errors.render()), lexed.symbols, lexed.state, pending,
+            lexed.lineno)
+
+
+def random_edit(rng: random.Random, text: str) -> tuple:
+    offset = rng.randint(0, len(text))
+    deleted = rng.randint(0, min(3, len(text) - offset)) if rng.random() < 0.5 else 0
+    inserted = ''.join(rng.choice(INSERTIONS) for _ in range(rng.randint(0 if deleted else 1, 2)))
+    return offset, deleted, inserted
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=100_000)
+    arg_parser.add_argument('--edits', type=int, default=200)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lexer = IncrementalLexer(large_program(args.size, args.seed))
+    incremental = full = 0.0
+    mismatches = 0
+    for _ in range(args.edits):
+        elapsed, lexed = timed(lexer.edit, *random_edit(rng, lexer.text))
+        incremental += elapsed
+        elapsed, expected = timed(lex_chunk, lexer.text)
+        full += elapsed
+        if view(lexed) != view(expected):
+            mismatches += 1
+        if rng.random() < 0.05:  # start over now and then, so that comments do not pile up
+            lexer = IncrementalLexer(large_program(args.size, rng.randrange(1 << 16)))
+
+    rows = [
+        ('full rescan', f'{full / args.edits * 1000:.2f}ms', '1.00x'),
+        ('incremental', f'{incremental / args.edits * 1000:.2f}ms', f'{full / incremental:.1f}x'),
+    ]
+    report(f'{args.edits} random edits of a {args.size} character program, {mismatches} mismatches', rows,
+           ('lexing', 'per edit', 'speedup'))
+    if mismatches:
+        raise SystemExit('incremental lexing disagrees with a full rescan')
+
+
+if __name__ == '__main__':
+    main()
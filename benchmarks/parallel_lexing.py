@@ -0,0 +1,54 @@
+"""
+Scaling of the parallel scanner with the size of its process pool, against a sequential scan
+with the table DFA. Every run must produce the same tokens, errors and symbols.
+
+    python -m benchmarks.parallel_lexing [--size CHARACTERS] [--workers 1 2 4 8]
+"""
+
+import argparse
+import os
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program, lexical_soup
+from scanner.dfa import TableScanner
+from scanner.parallel import ParallelScanner
+from scanner.scanner import TokenType
+
+
+def scan(scanner_class, source: str, **kwargs) -> tuple:
+    def run():
+        scanner = scanner_class(iter([source]), artifacts=('tokens',), **kwargs)
+        while scanner.get_next_token()[0] != TokenType.EOF:
+            pass
+        return scanner
+
+    with workspace(''):
+        elapsed, scanner = timed(run)
+    return elapsed, (list(scanner.tokens.render()), list(scanner.errors.render()), list(scanner.symbols),
+                     scanner.lineno)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=4_000_000)
+    arg_parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = arg_parser.parse_args()
+
+    # mostly valid code with some lexical noise, so that errors and comments cross chunk boundaries
+    source = large_program(args.size) + lexical_soup(args.size // 20)
+    baseline, expected = scan(TableScanner, source)
+    rows = [('sequential', f'{baseline:.2f}s', '1.00x', 'identical')]
+    failed = False
+    for workers in args.workers:
+        elapsed, result = scan(ParallelScanner, source, workers=workers)
+        failed |= result != expected
+        rows.append((f'{workers} workers', f'{elapsed:.2f}s', f'{baseline / elapsed:.2f}x',
+                     'identical' if result == expected else 'DIFFERENT'))
+    report(f'lexing {len(source)} characters on {os.cpu_count()} cpus', rows,
+           ('scanner', 'time', 'speedup', 'artifacts'))
+    if failed:
+        raise SystemExit('parallel lexing disagrees with the sequential scanner')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Throughput of the parse loop over pre-lexed tokens: the compiled integer table against the
+string keyed table it replaced, both without building the parse tree, with the code generator
+and with its actions skipped. Both loops must produce the same program and errors, compared
+without the peephole passes, which only the compiled loop runs. It exits with 1 when they do not.
+
+    python -m benchmarks.parse_loop [--size CHARACTERS] [--repeat COUNT]
+"""
+
+import argparse
+import sys
+from collections import deque
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program
+from parser import Parser
+from parser.parse_table import GRAMMAR_FILE, SYNCHRONOUS, build_parse_table, read_grammar
+from scanner.chunks import LexedScanner, lex_chunk
+from scanner.scanner import TokenType
+
+with open(GRAMMAR_FILE) as grammar:
+    PARSE_TABLE, _ = build_parse_table(read_grammar(grammar.read()))
+
+
+class LegacyParser(Parser):
+    """The previous loop: string symbols, dict lookups and per step filtering of the productions."""
+
+    @property
+    def terminal(self):
+        if self._current_token[0] in [TokenType.ID, TokenType.NUMBER]:
+            return self._current_token[0].value
+        else:
+            return self._current_token[1]
+
+    def parse(self):
+        self._stack = deque(['$', 'Program'])
+        self.advance_input()
+        _continue = True
+        while self._stack and _continue:
+            if self._stack[-1].startswith('#'):
+                action_symbol = self._stack.pop()
+                self._code.lineno = self.lineno
+                self._code.generate(action_symbol=action_symbol, input=self.lexeme)
+            else:
+                _continue = self.string_codeparse()
+
+    def advance_input(self):
+        self._current_token = self._scanner.get_next_token()
+        if self._current_token[0] in [TokenType.WHITESPACE, TokenType.COMMENT]:
+            self.advance_input()
+
+    def string_codeparse(self) -> bool:
+        stack_top = self._stack[-1]
+        if stack_top in PARSE_TABLE.keys():
+            if self.terminal not in PARSE_TABLE[stack_top].keys():
+                if self.terminal == TokenType.EOF.value and stack_top != TokenType.EOF.value:
+                    self._errors[self.lineno].append(f'#{self.lineno} : syntax error, Unexpected EOF')
+                    return False
+                self._errors[self.lineno].append(f'#{self.lineno} : syntax error, illegal {self.terminal}')
+                self.advance_input()
+                return True
+            grammar = PARSE_TABLE[stack_top][self.terminal]
+            self._stack.pop()
+            if grammar and len(grammar) > 1 and not grammar[0]:
+                grammar = tuple(filter(lambda x: x, grammar))
+            if grammar == SYNCHRONOUS:
+                self._errors[self.lineno].append(
+                    f'#{self.lineno} : syntax error, missing {stack_top} on line {self.lineno}')
+            elif grammar:
+                self._stack.extend(grammar[::-1])
+        elif stack_top != self.terminal:
+            self._errors[self.lineno].append(f'#{self.lineno} : syntax error, missing {self._stack[-1]}')
+            self._stack.pop()
+        else:
+            self._stack.pop()
+            self.advance_input()
+        return True
+
+
+def run(parser_class, source: str, lexed, actions: bool) -> tuple:
+    with workspace(source):
+        parser = parser_class(profile='codegen', passes=())
+        parser._scanner = LexedScanner(iter([source]), lexed=lexed, artifacts=())
+        if not actions:
+            parser._code.generate = parser._code.execute = lambda *args, **kwargs: None
+        elapsed, _ = timed(parser.parse)
+    return elapsed, (list(parser.errors_lines()), list(parser._code.program_block_lines()),
+                     list(parser._code.semantic_errors_lines()))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=100_000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    source = large_program(args.size)
+    lexed = lex_chunk(source)
+    different = False
+    for actions in (True, False):
+        rows = []
+        expected = baseline = None
+        for name, parser_class in (('string table', LegacyParser), ('compiled table', Parser)):
+            best, result = min((run(parser_class, source, lexed, actions) for _ in range(args.repeat)),
+                               key=lambda result: result[0])
+            expected = expected or result
+            baseline = baseline or best
+            different = different or result != expected
+            rows.append((name, f'{best:.3f}s', f'{len(lexed.tokens) / best / 1000:.0f}k tokens/s',
+                         f'{baseline / best:.2f}x', 'identical' if result == expected else 'DIFFERENT'))
+        report(f'parsing {len(lexed.tokens)} tokens {"with" if actions else "without"} code generation, '
+               f'best of {args.repeat}', rows, ('parse loop', 'time', 'throughput', 'speedup', 'output'))
+    if different:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
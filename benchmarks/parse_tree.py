@@ -0,0 +1,83 @@
+"""
+Time and peak memory of a full compile with the array backed parse tree against the anytree
+Node objects it replaced, on long programs, which make deep trees as every statement nests the
+rest of its block. Both must write the same parse_tree.txt. Needs anytree for the comparison.
+
+    python -m benchmarks.parse_tree [--sizes CHARACTERS ...]
+"""
+
+import argparse
+import tracemalloc
+from collections import deque
+
+from anytree import Node, RenderTree
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program
+from parser import Parser
+
+
+class AnytreeTree:
+    """The previous tree: one Node per grammar symbol, drawn by RenderTree."""
+
+    def __init__(self) -> None:
+        self.root = None
+
+    def add(self, label: str, parent: Node = None) -> Node:
+        node = Node(label, parent=parent)
+        self.root = self.root or node
+        return node
+
+    def rename(self, node: Node, label: str) -> None:
+        node.name = label
+
+    def remove(self, node: Node) -> None:
+        parent = node.parent
+        children = list(parent.children)
+        children.remove(node)
+        parent.children = children
+
+    def render(self):
+        return (f'{pre}{node.name}' for pre, _, node in RenderTree(self.root, childiter=reversed))
+
+
+def compile_with(tree_class, source: str, trace: bool = False) -> tuple:
+    with workspace(source):
+        parser = Parser()
+        if tree_class is not None:
+            parser._parse_tree = tree_class()
+            root = parser._parse_tree.add('Program')
+            parser._tree = deque([parser._parse_tree.add('$', root), root])
+        if trace:
+            tracemalloc.start()
+        elapsed, _ = timed(parser.parse)
+        peak = tracemalloc.get_traced_memory()[1] if trace else 0
+        tracemalloc.stop()
+        with open('parse_tree.txt', 'rb') as file:
+            return elapsed, peak, file.read()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[5_000, 20_000, 40_000])
+    args = arg_parser.parse_args()
+
+    rows = []
+    failed = False
+    for size in args.sizes:
+        source = large_program(size)
+        old_time, _, expected = compile_with(AnytreeTree, source)
+        new_time, _, rendered = compile_with(None, source)
+        _, old_peak, _ = compile_with(AnytreeTree, source, trace=True)
+        _, new_peak, _ = compile_with(None, source, trace=True)
+        failed |= rendered != expected
+        rows.append((len(source), f'{old_time:.2f}s', f'{new_time:.2f}s', f'{old_peak / 2 ** 20:.1f} MB',
+                     f'{new_peak / 2 ** 20:.1f} MB', 'identical' if rendered == expected else 'DIFFERENT'))
+    report('full compile, anytree against the array backed parse tree (memory is the tracemalloc peak)', rows,
+           ('characters', 'anytree', 'arrays', 'anytree peak', 'arrays peak', 'parse_tree.txt'))
+    if failed:
+        raise SystemExit('the parse trees render differently')
+
+
+if __name__ == '__main__':
+    main()
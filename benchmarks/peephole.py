@@ -0,0 +1,101 @@
+"""
+Checks the peephole passes against the tester interpreter: generated programs are compiled
+without passes, with each pass alone and with all of them, every output.txt is run through
+./tester, and what the programs print must not change. Neither may the PB_line of a called
+function in symbol_table.txt stop being where its calls jump. Reported are the instructions
+generated and executed with each set of passes, against none. It exits with 1, naming the
+programs, when a pass changes what one prints, misplaces a function or raises, so it can gate a
+change like a test would. Programs the code generator gives up on without any pass are left out,
+and counted.
+
+    python -m benchmarks.peephole [--count PROGRAMS] [--timeout SECONDS]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import warnings
+
+from benchmarks.common import report, workspace
+from benchmarks.corpus import valid_program
+from driver import compile_source
+from parser import PASSES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTER = os.path.join(ROOT, 'tester')
+
+
+def execute(program_block: tuple, timeout: float) -> tuple:
+    """What the tester prints running the code, and the instructions it executes, None for both on a timeout."""
+    with workspace('') as directory:
+        with open(os.path.join(directory, 'output.txt'), 'w') as file:
+            file.writelines(f'{line}\t{code}\n' for line, code in enumerate(program_block))
+        try:
+            run = subprocess.run([TESTER], cwd=directory, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None, None
+    lines = (run.stdout + run.stderr).splitlines()
+    return [line for line in lines if line.startswith('PRINT')], sum(line.startswith('--->') for line in lines)
+
+
+def called(result) -> list:
+    """Whether calls jump to the PB_line of each function of the symbol table, in its order."""
+    targets = {int(target) for code in result.program_block for target in re.findall(r'^\(JP, (\d+),', code)}
+    rows = (line.split() for line in result.artifacts['symbol_table'].splitlines()[1:])
+    return [int(row[3]) in targets for row in rows if row[4] == 'func']
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--count', type=int, default=300, help='generated programs to compile and run')
+    arg_parser.add_argument('--timeout', type=float, default=10.0, help='seconds a program may run in the tester')
+    args = arg_parser.parse_args()
+
+    configurations = [('none', ())] + [(name, (name,)) for name in PASSES] + [('all', PASSES)]
+    sizes, executed, failures = {}, {}, []
+    programs = given_up = 0
+    for seed in range(args.count):
+        source = valid_program(seed, functions=seed % 5, statements=3 + seed % 6)
+        results = {}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for name, passes in configurations:
+                try:
+                    results[name] = compile_source(source, ('symbol_table',), passes=passes)
+                except Exception as error:
+                    if not passes:  # the code generator gives up on some programs, before any pass runs
+                        given_up += 1
+                        break
+                    failures.append(f'seed {seed} with {name}: raises {type(error).__name__}: {error}')
+        if len(results) < len(configurations) or not results['none'].ok:  # no output.txt to run
+            continue
+        runs = {'none': execute(results['none'].program_block, args.timeout)}
+        if runs['none'][0] is None:
+            continue
+        programs += 1
+        for name, result in results.items():
+            printed, count = runs.get(name) or execute(result.program_block, args.timeout)
+            if printed != runs['none'][0]:
+                failures.append(f'seed {seed} with {name}: prints differently')
+            if not all(now or not before for before, now in zip(called(results['none']), called(result))):
+                failures.append(f'seed {seed} with {name}: PB_line of a function its calls do not jump to')
+            sizes[name] = sizes.get(name, 0) + len(result.program_block)
+            executed[name] = executed.get(name, 0) + (count or 0)
+
+    if programs:  # no totals to report when every program failed
+        report(f'{programs} generated programs run through the tester, {given_up} the code generator gives up on', [
+            (name, f'{sizes[name]:,}', f'{1 - sizes[name] / sizes["none"]:.1%}',
+             f'{executed[name]:,}', f'{1 - executed[name] / executed["none"]:.1%}')
+            for name, _ in configurations
+        ], ('passes', 'instructions', 'fewer', 'executed', 'fewer'))
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print('every program prints the same with every pass')
+
+
+if __name__ == '__main__':
+    main()
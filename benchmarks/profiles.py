@@ -0,0 +1,51 @@
+"""
+Compile time of the artifact profiles on a large program. Every profile must come to the same
+program and errors as the full one, read off the parser, as the diagnostics profile writes no
+files. It exits with 1 when one does not.
+
+    python -m benchmarks.profiles [--size CHARACTERS] [--repeat COUNT]
+"""
+
+import argparse
+import sys
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program
+from parser import Parser, PROFILES
+
+
+def run(source: str, profile: str) -> tuple:
+    with workspace(source):
+        parser = Parser(profile=profile)
+        elapsed, _ = timed(parser.parse)
+    code = parser.code_generator
+    return elapsed, (list(parser.scanner.errors_lines(parser.scanner.errors)), list(parser.errors_lines()),
+                     list(code.program_block_lines()), list(code.semantic_errors_lines()))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=40_000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    source = large_program(args.size)
+    rows = []
+    expected = None
+    baseline = None
+    different = False
+    for profile in PROFILES:
+        best, result = min((run(source, profile) for _ in range(args.repeat)), key=lambda result: result[0])
+        expected = expected or result
+        baseline = baseline or best
+        different = different or result != expected
+        rows.append((profile, f'{best:.3f}s', f'{baseline / best:.2f}x',
+                     'identical' if result == expected else 'DIFFERENT'))
+    report(f'compiling a {len(source)} character program, best of {args.repeat}', rows,
+           ('profile', 'time', 'speedup', 'output and errors'))
+    if different:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
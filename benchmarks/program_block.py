@@ -0,0 +1,128 @@
+"""
+The program block as an instruction IR against the list of formatted strings it replaced: the
+appends and backpatches of compiling a large program are recorded, then replayed into both, and
+each is timed building the code and rendering output.txt, and measured for the memory it holds.
+Both must render the same text, the compile being recorded without the peephole passes, whose
+deletions would rewrite the IR past the recorded calls. It exits with 1 when they do not.
+
+    python -m benchmarks.program_block [--size CHARACTERS] [--repeat COUNT]
+"""
+
+import argparse
+import sys
+import tracemalloc
+import warnings
+from unittest import mock
+
+from benchmarks.common import report, timed
+from benchmarks.corpus import large_program
+from codegen.program_block import Label, ProgramBlock
+from driver import compile_source
+from parser import PROFILES
+
+
+class TextBlock:
+    """The previous program block: an instruction formatted as soon as it is generated."""
+
+    THREE_OPERAND = {'ADD', 'MULT', 'SUB', 'EQ', 'LT'}
+    TWO_OPERAND = {'ASSIGN', 'JPF'}
+    ONE_OPERAND = {'PRINT', 'JP'}
+
+    def __init__(self) -> None:
+        self.codes = []
+
+    def code(self, action: str = '', *args) -> str:
+        args = [f'#{arg}' if type(arg) is Label else arg for arg in args]  # pushed as text before labels
+        args_len = len(args)
+        if action == '':
+            return '( , , , )'
+        if args_len > 3:
+            raise Exception('Wrong inputs')
+        if action in self.THREE_OPERAND and args_len == 3:
+            return f'({action}, {args[0]}, {args[1]}, {args[2]})'
+        if action in self.TWO_OPERAND and args_len == 2:
+            return f'({action}, {args[0]}, {args[1]}, )'
+        if action in self.ONE_OPERAND and args_len == 1:
+            return f'({action}, {args[0]}, , )'
+        raise Exception(f'Number of inputs {args_len} does not match action {action}')
+
+    def append(self, action: str = '', *args) -> None:
+        self.codes.append(self.code(action, *args))
+
+    def patch(self, address: int, action: str = '', *args) -> None:
+        self.codes[address] = self.code(action, *args)
+
+    def lines(self):
+        for line, code in enumerate(self.codes):
+            yield f'{line}\t{code}\n'
+
+
+class RecordingBlock(ProgramBlock):
+    calls = []
+
+    def append(self, action: str = '', *args) -> int:
+        self.calls.append((None, action, args))
+        return super().append(action, *args)
+
+    def patch(self, address: int, action: str = '', *args) -> None:
+        self.calls.append((address, action, args))
+        super().patch(address, action, *args)
+
+
+def record(source: str) -> list:
+    RecordingBlock.calls = []
+    with mock.patch('codegen.codegen.ProgramBlock', RecordingBlock), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        compile_source(source, PROFILES['codegen'], passes=())
+    return RecordingBlock.calls
+
+
+def build(block_class, calls: list):
+    block = block_class()
+    for address, action, args in calls:
+        if address is None:
+            block.append(action, *args)
+        else:
+            block.patch(address, action, *args)
+    return block
+
+
+def render(block) -> str:
+    return ''.join(block.lines())  # once per block, the IR keeps what it rendered
+
+
+def retained(block_class, calls: list) -> int:
+    tracemalloc.start()
+    try:
+        block = build(block_class, calls)
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        del block
+        tracemalloc.stop()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=1_000_000)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    calls = record(large_program(args.size))
+    instructions = sum(address is None for address, _, _ in calls)
+    rows = []
+    expected = None
+    for name, block_class in (('strings', TextBlock), ('instruction IR', ProgramBlock)):
+        build_time = min(timed(build, block_class, calls)[0] for _ in range(args.repeat))
+        render_time, text = min(timed(render, build(block_class, calls)) for _ in range(args.repeat))
+        expected = expected or text
+        memory = retained(block_class, calls)
+        rows.append((name, f'{build_time:.3f}s', f'{render_time:.3f}s', f'{memory / 2 ** 20:.2f} MB',
+                     f'{memory / instructions:.0f} B', 'identical' if text == expected else 'DIFFERENT'))
+    report(f'{instructions:,} instructions and {len(calls) - instructions:,} backpatches, best of {args.repeat}', rows,
+           ('program block', 'build', 'render', 'memory', 'per instruction', 'output.txt'))
+    if any(row[-1] == 'DIFFERENT' for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Checks the scanner input layer: tokens which straddle chunk boundaries, multi-buffer files,
+lexemes longer than a buffer, and the size of the window kept while scanning a large file.
+
+    python -m benchmarks.scanner_input [--size BYTES]
+"""
+
+import argparse
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program
+from parser.parser import SCANNERS
+from scanner.buffer import InputBuffer
+from scanner.scanner import TokenType
+from utils.file_handler import read_chunks
+
+BOUNDARY = 4096
+LEXEMES = (
+    'identifier42', '123.456', '==', '**', '= ', '* ', '[ ]', '3.x', 'ab$', '*/', '/ ',
+    '# hash comment\n', '/* block\ncomment **\n */', ' \n\t\v\f ', 'else', '12345678',
+)
+
+
+def stream(scanner) -> list:
+    tokens = []
+    while True:
+        token = scanner.get_next_token()
+        tokens.append((token, scanner.lineno))
+        if token[0] == TokenType.EOF:
+            return tokens + [list(scanner.tokens.render()), list(scanner.errors.render()), list(scanner.symbols)]
+
+
+def straddling_sources():
+    filler = 'x = y ;\n'
+    for lexeme in LEXEMES:
+        for shift in range(1, len(lexeme) + 1):
+            count, padding = divmod(BOUNDARY - shift, len(filler))
+            yield f'{lexeme!r} at -{shift}', filler * count + ' ' * padding + lexeme + ' ' + filler * 20
+    comment = '/*' + 'long comment line\n' * 600 + '*/'
+    yield 'comment longer than two buffers', filler * 500 + comment + filler * 500
+    yield 'unclosed comment longer than a buffer', filler * 100 + '/*' + filler * 1000
+    yield 'empty file', ''
+    yield 'exactly two buffers', (filler * (2 * BOUNDARY // len(filler)))[:2 * BOUNDARY]
+
+
+def check_boundaries() -> bool:
+    failed = []
+    checked = 0
+    for name, source in straddling_sources():
+        for mode, scanner_class in SCANNERS.items():
+            with workspace(source):
+                expected = stream(scanner_class(chunks=iter([source])))
+                for buffer_size in (BOUNDARY, 7, 1000):
+                    checked += 1
+                    if stream(scanner_class(chunks=read_chunks(buffer_size=buffer_size))) != expected:
+                        failed.append(f'{name} ({mode}, chunks of {buffer_size})')
+    print(f'boundary checks: {checked - len(failed)}/{checked} passed')
+    for failure in failed:
+        print(f'  FAILED {failure}')
+    return not failed
+
+
+class WindowProbe(InputBuffer):
+    largest = 0
+
+    def fill(self, keep: int) -> int:
+        shift = super().fill(keep)
+        WindowProbe.largest = max(WindowProbe.largest, len(self.text))
+        return shift
+
+
+def window_sizes(size: int) -> None:
+    rows = []
+    source = large_program(size)
+    for scale in (1, 2, 4):
+        with workspace(source * scale):
+            for mode, scanner_class in SCANNERS.items():
+                WindowProbe.largest = 0
+                scanner = scanner_class()
+                scanner.input = WindowProbe(read_chunks(buffer_size=scanner.buffer))
+                scanner.code = scanner.input.text
+                elapsed, _ = timed(stream, scanner)
+                rows.append((mode, len(source) * scale, WindowProbe.largest, f'{elapsed:.2f}s'))
+    report('largest input window while scanning', rows, ('mode', 'input size', 'window', 'time'))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=250_000)
+    args = arg_parser.parse_args()
+    passed = check_boundaries()
+    window_sizes(args.size)
+    if not passed:
+        raise SystemExit('boundary checks failed')
+
+
+if __name__ == '__main__':
+    main()
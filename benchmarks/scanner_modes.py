@@ -0,0 +1,76 @@
+"""
+Scans a large generated corpus with every scanner mode and checks that
+tokens.txt, lexical_errors.txt and symbol_table_old.txt come out identical,
+and that every ID and KEYWORD token is given the same identifier id.
+
+    python -m benchmarks.scanner_modes [--size BYTES]
+"""
+
+import argparse
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program, lexical_soup
+from parser.parser import SCANNERS
+from scanner.scanner import TokenType
+from utils.file_handler import MemoryWriter, read_all
+
+ARTIFACTS = ('tokens', 'lexical_errors', 'symbol_table_old')
+
+
+def scan_all(scanner) -> int:
+    count = 0
+    while scanner.get_next_token()[0] != TokenType.EOF:
+        count += 1
+    scanner.get_next_token()  # the parser asks again at the end of input, which reports an open comment again
+    return count
+
+
+def identifiers(source: str, mode: str) -> list:
+    """Identifier ids of the ID and KEYWORD tokens, scanned again outside the timings."""
+    scanner = SCANNERS[mode](iter([source]), writer=MemoryWriter())
+    ids = []
+    while True:
+        token_type, _ = scanner.get_next_token()
+        if token_type == TokenType.EOF:
+            return ids
+        if token_type in (TokenType.ID, TokenType.KEYWORD):
+            ids.append(scanner.identifier)
+
+
+def run(source: str, mode: str) -> tuple:
+    with workspace(source):
+        elapsed, count = timed(scan_all, SCANNERS[mode]())
+        outputs = {name: read_all(name) for name in ARTIFACTS}
+    outputs['identifiers'] = identifiers(source, mode)
+    return elapsed, count, outputs
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--size', type=int, default=500_000)
+    args = arg_parser.parse_args()
+
+    corpora = {
+        'program': large_program(args.size),
+        # no block comments, so no lexeme outgrows the reference scanner's buffers
+        'soup': lexical_soup(args.size // 4, seed=1).replace('/*', '/ *'),
+        'unclosed comment': large_program(args.size // 10) + '/* unclosed comment\nat the end of input',
+    }
+    failed = False
+    for name, source in corpora.items():
+        rows = []
+        reference = None
+        for mode in SCANNERS:
+            elapsed, count, outputs = run(source, mode)
+            reference = reference or outputs
+            same = outputs == reference
+            failed |= not same
+            rows.append((mode, count, f'{elapsed:.3f}s', f'{len(source) / elapsed / 1e6:.2f} MB/s',
+                         'identical' if same else 'DIFFERENT'))
+        report(f'{name}: {len(source)} characters', rows, ('mode', 'tokens', 'time', 'throughput', 'artifacts'))
+    if failed:
+        raise SystemExit('scanner modes disagree')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Latency of the compile server under concurrent clients. A server is started on a temporary
+socket and, at each concurrency level, that many clients send small programs back to back over a
+connection each, reporting p50 and p99 latency, the throughput of compiles and the requests
+turned away or timed out. Responses must match compile_source, and the latency of launching
+compiler.py is measured on a sample for comparison.
+
+    python -m benchmarks.server_load [--requests COUNT] [--clients LEVELS] [--sample COUNT]
+                                     [--workers COUNT] [--queue COUNT]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+from benchmarks.common import report, workspace
+from benchmarks.corpus import valid_program
+from driver import compile_source
+from driver.client import compile_remote, open_connection, request, send
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(latencies: list, fraction: float) -> float:
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+async def client(path: str, sources: list, latencies: list, errors: list) -> None:
+    reader, writer = await open_connection(path)
+    try:
+        for source in sources:
+            start = time.perf_counter()
+            response = await send(reader, writer, request(source, 'codegen'))
+            latencies.append(time.perf_counter() - start)
+            if response['error'] is not None:
+                errors.append(response['error'])
+    finally:
+        writer.close()
+
+
+async def load(path: str, sources: list, clients: int) -> tuple:
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(path, sources[index::clients], latencies, errors) for index in range(clients)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def start_server(path: str, workers: int, queue: int) -> subprocess.Popen:
+    command = [sys.executable, '-m', 'driver.server', '--socket', path]
+    if workers:
+        command += ['--workers', str(workers)]
+    if queue:
+        command += ['--queue', str(queue)]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    server.stdout.readline()  # listening on ...
+    return server
+
+
+def process_latencies(sources: list) -> list:
+    latencies = []
+    for source in sources:
+        with workspace(source) as directory:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(ROOT, 'compiler.py'), '--profile', 'codegen', '--no-cache'],
+                           cwd=directory, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def same_responses(path: str, sources: list) -> bool:
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for source in sources:
+            expected = compile_source(source).as_dict()
+            response = compile_remote(request(source, 'diagnostics'), path)
+            if {field: response[field] for field in expected} != expected:
+                return False
+    return True
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--requests', type=int, default=1_000)
+    arg_parser.add_argument('--clients', default='1,4,16,64', help='comma separated concurrency levels')
+    arg_parser.add_argument('--sample', type=int, default=20, help='compiler.py launches to time')
+    arg_parser.add_argument('--workers', type=int)
+    arg_parser.add_argument('--queue', type=int)
+    args = arg_parser.parse_args()
+
+    programs = [valid_program(seed, functions=1, statements=3) for seed in range(100)]
+    sources = [programs[index % len(programs)] for index in range(args.requests)]
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'compiler.sock')
+        server = start_server(path, args.workers, args.queue)
+        try:
+            identical = same_responses(path, programs)
+            for clients in map(int, args.clients.split(',')):
+                elapsed, latencies, errors = asyncio.run(load(path, sources, clients))
+                compiled = len(latencies) - len(errors)
+                rows.append((f'server, {clients} clients', f'{percentile(latencies, 0.5) * 1000:.1f}ms',
+                             f'{percentile(latencies, 0.99) * 1000:.1f}ms', f'{compiled / elapsed:,.0f}/s',
+                             sum(error == 'server busy' for error in errors),
+                             sum(error.startswith('timed out') for error in errors)))
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies = process_latencies(programs[:args.sample])
+    rows.append(('compiler.py per file', f'{statistics.median(latencies) * 1000:.1f}ms',
+                 f'{percentile(latencies, 0.99) * 1000:.1f}ms', f'{len(latencies) / sum(latencies):,.0f}/s', '-', '-'))
+    report(f'{args.requests} requests of small programs, responses {"identical" if identical else "DIFFERENT"} '
+           f'to compile_source', rows, ('client', 'p50', 'p99', 'throughput', 'busy', 'timed out'))
+    if not identical:
+        raise SystemExit('server responses differ from compile_source')
+
+
+if __name__ == '__main__':
+    main()
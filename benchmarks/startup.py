@@ -0,0 +1,89 @@
+"""
+Start up of compiler.py for a one line program, read off `python -X importtime`: the import time
+of every module the compiler adds to a bare interpreter, and the wall time of the whole run. It
+exits with 1, naming the offenders, when a module of LAZY is imported by such a compile or when
+the median import time goes over --budget, so it can gate a change like a test would.
+
+    python -m benchmarks.startup [--runs COUNT] [--budget MILLISECONDS] [--top COUNT]
+"""
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.common import report, workspace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = 'def main():\n    output(1);\n;\n'
+
+# imported only by the compiles using them: the parallel scanner's process pool, the descent
+# engines, and the background writer's thread, and modules imported for nothing
+LAZY = ('concurrent.futures', 'multiprocessing', 'parser.descent', 'threading', 'pprint', 'dataclasses', 'inspect',
+        'ast')
+BUDGET = 60.0  # milliseconds of imports on top of a bare interpreter
+
+
+def import_times(command: list, cwd: str) -> dict:
+    """Self import time of every module the command imports, in milliseconds."""
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + command, cwd=cwd, capture_output=True,
+                             text=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and 'self [us]' not in line:
+            own, _, name = line[len('import time:'):].split('|')
+            times[name.strip()] = int(own) / 1000
+    return times
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--runs', type=int, default=15)
+    arg_parser.add_argument('--budget', type=float, default=BUDGET, help='milliseconds of imports allowed')
+    arg_parser.add_argument('--top', type=int, default=15, help='slowest modules to list')
+    args = arg_parser.parse_args()
+
+    compileall.compile_dir(ROOT, quiet=1)  # timed with bytecode in place, as an installed compiler has it
+    compiler = [os.path.join(ROOT, 'compiler.py'), '--no-cache']
+    bare, imports, totals, walls, bare_walls = set(), defaultdict(list), [], [], []
+    with workspace(SOURCE) as directory:
+        for _ in range(args.runs):
+            bare.update(import_times(['-c', 'pass'], directory))
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', 'pass'], check=True)
+            bare_walls.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + compiler, cwd=directory, check=True)
+            walls.append(time.perf_counter() - start)
+
+            times = {name: own for name, own in import_times(compiler, directory).items() if name not in bare}
+            totals.append(sum(times.values()))
+            for name, own in times.items():
+                imports[name].append(own)
+
+    medians = sorted(((statistics.median(own), name) for name, own in imports.items()), reverse=True)
+    report(f'slowest of the {len(imports)} modules compiler.py imports, median of {args.runs} runs',
+           [(name, f'{own:.2f}ms') for own, name in medians[:args.top]], ('module', 'self'))
+    total = statistics.median(totals)
+    report('start up of compiler.py on a one line program', [
+        ('python -c pass', '-', f'{statistics.median(bare_walls) * 1000:.1f}ms'),
+        ('compiler.py', f'{total:.1f}ms', f'{statistics.median(walls) * 1000:.1f}ms'),
+    ], ('command', 'imports', 'wall'))
+
+    eager = sorted(name for name in imports if name.split('.')[0] in LAZY or name in LAZY)
+    failures = [f'imported without being used: {", ".join(eager)}'] if eager else []
+    if total > args.budget:
+        failures.append(f'imports take {total:.1f}ms, over the {args.budget:.0f}ms budget')
+    for failure in failures:
+        print(f'FAIL {failure}')
+    if failures:
+        sys.exit(1)
+    print(f'imports within the {args.budget:.0f}ms budget')
+
+
+if __name__ == '__main__':
+    main()
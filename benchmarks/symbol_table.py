@@ -0,0 +1,120 @@
+"""
+Symbol table cost as the number of symbols grows: declaring, looking up and killing a block of
+symbols through SymbolTable directly, and compiling a program declaring as many variables. A
+table answering in constant time keeps the cost per symbol flat from one size to the next.
+
+Then the memory a table holds on to across as many functions as a program of --functions, and
+the time of its declarations and lookups, keeping the killed blocks for the symbol_table
+listing, as the full profile does, or dropping them, as the others do, with the time of
+compiling the program in the codegen profile. The full profile itself is left out, the parse
+tree of so many functions indents its lines by the depth of the function list.
+
+    python -m benchmarks.symbol_table [--symbols COUNT,...] [--functions COUNT]
+"""
+
+import argparse
+import tracemalloc
+import warnings
+
+from benchmarks.common import report, timed
+from driver import compile_source
+from parser import PROFILES
+from parser.symbol_table import SymbolTable
+
+
+def declare_and_look_up(count: int) -> None:
+    table = SymbolTable()
+    function = table.add_symbol(lexeme='f', category='func', force=True)
+    table.scope_push()
+    for index in range(count):
+        table.add_symbol(lexeme=f'v{index}')
+    for index in range(count):
+        address = table.find_addr(f'v{index}')
+        table.is_symbol_current_scope(addr=address)
+        table.find_lexeme(address)
+    table.inc_args()
+    table.scope_pop()
+    table.kill_block(function.address)
+
+
+def declare_functions(count: int, archive: bool) -> SymbolTable:
+    """The table traffic of `count` functions of two parameters and four locals each."""
+    table = SymbolTable(archive=archive)
+    for index in range(count):
+        function = table.add_symbol(lexeme=f'f{index}', category='func', force=True)
+        table.scope_push()
+        for name in ('a', 'b'):
+            table.add_symbol(lexeme=name, category='param')
+            table.inc_args()
+        for name in ('x', 'y', 'z', 'w'):
+            table.add_symbol(lexeme=name)
+        for name in ('a', 'b', 'x', 'y', 'z', 'w', f'f{index // 2}', 'output'):
+            table.find_addr(name)
+        table.scope_pop()
+        table.kill_block(function.address)
+    return table
+
+
+def retained(function, *args) -> int:
+    tracemalloc.start()
+    try:
+        result = function(*args)
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        del result
+        tracemalloc.stop()
+
+
+def functions_program(count: int) -> str:
+    lines = []
+    for index in range(count):
+        lines += [f'def f{index}(a, b):', '    x = a + b;', '    y = x * 2;', '    z = y - a;', '    w = z + x;']
+        if index:
+            lines.append(f'    output(f{index // 2}(w, z));')
+        lines += ['    return w;', ';']
+    lines += ['def main():', f'    output(f{count - 1}(1, 2));', ';']
+    return '\n'.join(lines) + '\n'
+
+
+def program(count: int) -> str:
+    lines = ['def main():']
+    for index in range(count):
+        lines.append(f'    v{index} = {index % 10};')
+        if index % 8 == 7:
+            lines.append(f'    output(v{index} + v{index // 2});')
+    lines.append(';')
+    return '\n'.join(lines) + '\n'
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--symbols', default='1000,10000,50000', help='comma separated symbol counts')
+    arg_parser.add_argument('--functions', type=int, default=10_000)
+    args = arg_parser.parse_args()
+
+    rows = []
+    for count in map(int, args.symbols.split(',')):
+        table_time, _ = timed(declare_and_look_up, count)
+        source = program(count)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            compile_time, result = timed(compile_source, source)
+        rows.append((f'{count:,}', f'{table_time:.3f}s', f'{table_time / count * 1e6:.2f}us',
+                     f'{compile_time:.2f}s', f'{compile_time / count * 1e6:.1f}us', len(result.program_block)))
+    report('symbol table operations and whole compiles by number of symbols', rows,
+           ('symbols', 'table', 'per symbol', 'compile', 'per symbol', 'instructions'))
+
+    rows = []
+    for archive in (True, False):
+        table_time, _ = timed(declare_functions, args.functions, archive)
+        rows.append(('kept' if archive else 'dropped',
+                     f'{retained(declare_functions, args.functions, archive) / 2 ** 20:.2f} MB', f'{table_time:.3f}s'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        compile_time, _ = timed(compile_source, functions_program(args.functions), PROFILES['codegen'])
+    report(f'symbol table of {args.functions:,} functions of six symbols each, the program compiles in '
+           f'{compile_time:.2f}s', rows, ('killed blocks', 'table memory', 'table'))
+
+
+if __name__ == '__main__':
+    main()
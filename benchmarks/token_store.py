@@ -0,0 +1,71 @@
+"""
+Peak RSS of scanning a ~1M token input with the array backed TokenStore against the
+previous defaultdict of pre-formatted strings.
+
+    python -m benchmarks.token_store [--tokens COUNT]
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.common import report, timed, workspace
+from benchmarks.corpus import large_program
+from scanner.regex import RegexScanner
+from scanner.scanner import TokenType
+
+CHARACTERS_PER_TOKEN = 4.1
+
+
+class LegacyTokens:
+    """The old layout: every token formatted up front into a list per line."""
+
+    def __init__(self) -> None:
+        self._lines = defaultdict(list)
+
+    def append(self, kind, lexeme, start, line) -> None:
+        self._lines[line].append(f"({kind.value}, {lexeme})")
+
+    def __len__(self) -> int:
+        return sum(map(len, self._lines.values()))
+
+    def render(self):
+        result = ""
+        for key, value in self._lines.items():
+            string = ' '.join(map(str, value))
+            result += f"{key}.\t{string}\n"
+        return [result]
+
+
+def child(layout: str, tokens: int) -> None:
+    source = large_program(int(tokens * CHARACTERS_PER_TOKEN))
+    with workspace(source):
+        scanner = RegexScanner()
+        if layout == 'legacy':
+            scanner.tokens = LegacyTokens()
+        elapsed, _ = timed(lambda: [None for _ in iter(scanner.get_next_token, (TokenType.EOF, '$'))])
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(len(scanner.tokens), peak, f'{elapsed:.2f}')
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--tokens', type=int, default=1_000_000)
+    arg_parser.add_argument('--child', choices=('legacy', 'store'))
+    args = arg_parser.parse_args()
+    if args.child:
+        return child(args.child, args.tokens)
+
+    rows = []
+    for layout in ('legacy', 'store'):
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.token_store', '--child', layout,
+                                 '--tokens', str(args.tokens)], capture_output=True, text=True, check=True).stdout
+        count, peak, elapsed = output.split()
+        rows.append((layout, count, f'{int(peak) / 1024:.1f} MB', f'{elapsed}s'))
+    report('peak RSS while scanning and writing tokens.txt', rows, ('layout', 'tokens', 'peak RSS', 'time'))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,22 +1,46 @@
+import operator
 import warnings
 from collections import deque
+from typing import Callable, Collection, Iterable, Optional, Sequence
 
-from codegen.program_block import ProgramBlock
+from codegen.peephole import PASSES, optimize
+from codegen.program_block import Label, ProgramBlock
 from codegen.semantic_error import SemanticError, SemanticErrorHandler
 from codegen.stack import Stack
 from codegen.temp_manager import TempManager
 from parser.symbol_table import SymbolTable
-from dataclasses import dataclass
 
-@dataclass
+# set of actions which need input for operation
+INPUT_ACTIONS = frozenset({'#pid', '#pnum', '#pparam', '#pfunc', '#comp_op', '#replace', '#psym', '#global'})
+
+# integers of the target machine, 32 bits wide and wrapping around, an immediate above WORD_MAX
+# being read as WORD_MAX
+WORD = 1 << 32
+WORD_MAX = (WORD >> 1) - 1
+# operations folded when both operands are constants
+FOLDS = {'ADD': operator.add, 'SUB': operator.sub, 'MULT': operator.mul, 'EQ': operator.eq, 'LT': operator.lt}
+
+
+def wrap(value: int) -> int:
+    """`value` as the target machine holds it."""
+    return (value + WORD // 2) % WORD - WORD // 2
+
+
 class LexemeStatus:
-    lexeme: str = ''
-    is_same_scope: bool = False
-    is_found: bool = False
+    __slots__ = ('lexeme', 'is_same_scope', 'is_found')
+
+    def __init__(self, lexeme: str = '', is_same_scope: bool = False, is_found: bool = False) -> None:
+        self.lexeme = lexeme
+        self.is_same_scope = is_same_scope
+        self.is_found = is_found
+
 
 class CodeGenerator:
-    def __init__(self, symbol_table: SymbolTable = None) -> None:
+    def __init__(self, symbol_table: SymbolTable = None, passes: Collection[str] = PASSES,
+                 fold_constants: bool = True) -> None:
         self._program_block = ProgramBlock()
+        self._passes = passes  # peephole passes run over the finished code
+        self._fold_constants = fold_constants  # numbers kept on the semantic stack as immediates
         self._semantic_stack = deque()
         self._temp_manager = TempManager()
         self._func_stack = Stack(self._program_block, self._temp_manager)
@@ -74,29 +98,58 @@ class CodeGenerator:
             '#has_return_value': self.has_return_value,
             '#check_void': self.check_void,
         }
+        self._actions = []  # (method, needs input, action symbol) by action number, see bind
+
+    def bind(self, action_symbols: Sequence[str]) -> None:
+        """Numbers the action symbols for execute, in the order given."""
+        self._actions = [(self._generator.get(action_symbol), action_symbol in INPUT_ACTIONS, action_symbol)
+                         for action_symbol in action_symbols]
+
+    def action(self, action_symbol: str) -> Callable:
+        """The method generating `action_symbol`, or one raising KeyError as generate would if there is none."""
+        method = self._generator.get(action_symbol)
+        if method is None:
+            def method(*args):
+                raise KeyError(action_symbol)
+        return method
 
     @property
-    def program_block(self):
-        return self._program_block.codes
+    def program_block(self) -> ProgramBlock:
+        return self._program_block
 
     @property
     def pb_len(self):
         return len(self.program_block)
 
-    @property
-    def code(self):
-        return self._program_block.code
+    def code_address(self, value) -> bool:
+        """
+        Whether `value`, popped to be backpatched, is the address of an instruction. After a syntax
+        error the semantic stack can hold anything in its place, an immediate or a temp say.
+        """
+        return isinstance(value, int) and 0 <= value < self.pb_len
 
     def generate(self, action_symbol: str, input: str) -> None:
         try:
-            if action_symbol in {'#pid', '#pnum', '#pparam', '#pfunc', '#comp_op',
-                                 '#replace', '#psym', '#global'}:  # set of actions which need input for operation
+            if action_symbol in INPUT_ACTIONS:
                 self._generator[action_symbol](input)
             else:
                 self._generator[action_symbol]()
         except KeyError:
             warnings.warn(f'Sorry {action_symbol} not implemented yet.')
 
+    def execute(self, action: int, input: str) -> None:
+        """generate, for the action symbol numbered `action` by bind."""
+        method, needs_input, action_symbol = self._actions[action]
+        try:
+            if method is None:
+                raise KeyError(action_symbol)
+            if needs_input:
+                method(input)
+            else:
+                method()
+        except KeyError:
+            warnings.warn(f'Sorry {action_symbol} not implemented yet.')
+
     def pop(self) -> None:
         self._semantic_stack.pop()
 
@@ -136,9 +189,19 @@ class CodeGenerator:
             self.error_handler.add(SemanticError.ID_NOT_DEFINED, self.lineno, id=self._lexeme_status.lexeme)
             self._semantic_stack.append(-1) # push dummy address as func address
     
+    @staticmethod
+    def constant(operand) -> Optional[int]:
+        """The value of an immediate on the semantic stack, None for any other operand."""
+        if type(operand) is str and operand[:1] == '#':
+            return int(operand[1:])
+        return None
+
     def pnum(self, number) -> None:
+        if self._fold_constants and number.isascii() and number.isdigit() and int(number) <= WORD_MAX:
+            self._semantic_stack.append(f'#{int(number)}')
+            return
         temp = self._temp_manager.get_temp()
-        self.program_block.append(self.code('ASSIGN', f'#{number}', temp))
+        self.program_block.append('ASSIGN', f'#{number}', temp)
         self._semantic_stack.append(temp)
 
     def pparam(self, lexeme: str) -> None:
@@ -159,14 +222,14 @@ class CodeGenerator:
     def assign(self) -> None:
         rhs = self._semantic_stack.pop()
         lhs = self._semantic_stack.pop()
-        self.program_block.append(self.code('ASSIGN', rhs, lhs))
+        self.program_block.append('ASSIGN', rhs, lhs)
 
     def label(self) -> None:
         self._while_stack.append((self.pb_len, []))
 
     def save(self) -> None:
         self._semantic_stack.append(self.pb_len)
-        self.program_block.append(self.code())
+        self.program_block.append()
 
     def jpf_save(self) -> None:
         self.jpf(inc=1)
@@ -175,13 +238,15 @@ class CodeGenerator:
     def jp(self) -> None:
         jump_address = self._semantic_stack.pop()
         current_address = self.pb_len
-        self.program_block[jump_address] = self.code('JP', current_address)
+        if self.code_address(jump_address):
+            self.program_block.patch(jump_address, 'JP', current_address)
 
     def jpf(self, inc: int = 0) -> None:
         jump_address = self._semantic_stack.pop()
         jump_condition = self._semantic_stack.pop()
         current_address = self.pb_len + inc
-        self.program_block[jump_address] = self.code('JPF', jump_condition, current_address)
+        if self.code_address(jump_address):
+            self.program_block.patch(jump_address, 'JPF', jump_condition, current_address)
 
     def comp_op(self, input: str):
         if input == '==':
@@ -198,9 +263,7 @@ class CodeGenerator:
         if not lhs or not rhs:
             self._semantic_stack.append(-1) # push dummy invalid address in stack as result 
             return
-        temp = self._temp_manager.get_temp()
-        self.program_block.append(self.code(action, lhs, rhs, temp))
-        self._semantic_stack.append(temp)
+        self.operate(action, lhs, rhs)
 
     def set_func_start(self) -> None:
         self._symbol_table.set_pb_line(self.pb_len)
@@ -211,7 +274,9 @@ class CodeGenerator:
             if not main_pb_line:
                 self.error_handler.add(SemanticError.MAIN_MISSING, self.lineno)
                 return
-            self.program_block[self._semantic_stack.pop()] = self.code('JP', main_pb_line)
+            jump_address = self._semantic_stack.pop()
+            if self.code_address(jump_address):
+                self.program_block.patch(jump_address, 'JP', main_pb_line)
         except IndexError:
             Warning('Only main function present.')
             return
@@ -231,7 +296,7 @@ class CodeGenerator:
         for offset in range(args_start, args_start + args_count):  #
             arg = self._semantic_stack.pop()
             temp = self._func_stack.access(offset)
-            self.program_block.append(self.code('ASSIGN', temp, arg))
+            self.program_block.append('ASSIGN', temp, arg)
 
     def push_zero(self) -> None:
         self._semantic_stack.append('#0')  # return value of func is void if no return expr
@@ -247,7 +312,7 @@ class CodeGenerator:
         return_value = self._semantic_stack.pop()
         self._func_stack.push(return_value)  # may have problem with order
         return_address = self._func_stack.access(2)
-        self.program_block.append(self.code('JP', f'@{return_address}'))
+        self.program_block.append('JP', f'@{return_address}')
 
     def pop_func_address(self) -> None:
         self._symbol_table.scope_pop()
@@ -277,7 +342,7 @@ class CodeGenerator:
             return
         elif self._symbol_table.find_lexeme(self._semantic_stack[-1]) == 'output':
             out = self._func_stack.pop()
-            self.program_block.append(self.code('PRINT', out))
+            self.program_block.append('PRINT', out)
             return
         
         assumed_func_address = self._semantic_stack.pop()
@@ -285,9 +350,8 @@ class CodeGenerator:
         # actual func address may be different depending on number of arguments
         func_lexeme = self._symbol_table.find_lexeme(assumed_func_address)
         args_count_given = self._args_count.pop()
-        possible_args_count = self._symbol_table.get_func_args_count(lexeme=func_lexeme)
 
-        if args_count_given not in possible_args_count:
+        if not self._symbol_table.has_func_args_count(func_lexeme, args_count_given):
             self.error_handler.add(SemanticError.ARGS_MISMATCH, self.lineno, id=func_lexeme)
             actual_func_address = self._symbol_table.get_first_func_address(lexeme=func_lexeme)
         else:
@@ -296,8 +360,8 @@ class CodeGenerator:
         func_pb_line = self._symbol_table.get_pb_line(addr=actual_func_address)
 
         current_pb_line = self.pb_len
-        self._func_stack.push(f'#{current_pb_line + 3}')
-        self.program_block.append(self.code('JP', func_pb_line))
+        self._func_stack.push(Label(current_pb_line + 3))
+        self.program_block.append('JP', func_pb_line)
         
         return_value = self._func_stack.pop() if self._symbol_table.get_has_return_value(addr=actual_func_address) else None
         self._semantic_stack.append(return_value)
@@ -316,33 +380,44 @@ class CodeGenerator:
         self.arith('MULT')
 
     def power(self) -> None:
-        temp1 = self._temp_manager.get_temp()
-        temp2 = self._temp_manager.get_temp()
         r_op = self._semantic_stack.pop()
         l_op = self._semantic_stack.pop()
         if not r_op or not l_op:
             self._semantic_stack.append(-1) # push dummy invalid address in stack as result 
             return
-        
-        self.program_block.append(self.code('ASSIGN', '#1', temp1))
-        self.program_block.append(self.code('ASSIGN', r_op, temp2))
+        base, exponent = self.constant(l_op), self.constant(r_op)
+        if self._fold_constants and base is not None and exponent is not None and exponent >= 0:
+            self._semantic_stack.append(f'#{wrap(pow(base, exponent, WORD))}')
+            return  # a negative exponent is left to count down through the whole word
+
+        temp1 = self._temp_manager.get_temp()
+        temp2 = self._temp_manager.get_temp()
+        self.program_block.append('ASSIGN', '#1', temp1)
+        self.program_block.append('ASSIGN', r_op, temp2)
         start = self.pb_len
-        self.program_block.append(self.code('JPF', temp2, self.pb_len + 4))
-        self.program_block.append(self.code('MULT', temp1, l_op, temp1))
-        self.program_block.append(self.code('SUB', temp2, '#1', temp2))
-        self.program_block.append(self.code('JP', start))
+        self.program_block.append('JPF', temp2, self.pb_len + 4)
+        self.program_block.append('MULT', temp1, l_op, temp1)
+        self.program_block.append('SUB', temp2, '#1', temp2)
+        self.program_block.append('JP', start)
 
         self._semantic_stack.append(temp1)
 
     def arith(self, action: str = 'ADD') -> None:
-        temp = self._temp_manager.get_temp()
         lhs = self._semantic_stack.pop()
         rhs = self._semantic_stack.pop()
         if not lhs or not rhs:
             self._semantic_stack.append(-1) # push dummy invalid address in stack as result 
             return
-        
-        self.program_block.append(self.code(action, rhs, lhs, temp))
+        self.operate(action, rhs, lhs)
+
+    def operate(self, action: str, lhs, rhs) -> None:
+        """Pushes the result of `action` on lhs and rhs, an immediate if both are constants."""
+        left, right = self.constant(lhs), self.constant(rhs)
+        if self._fold_constants and left is not None and right is not None:
+            self._semantic_stack.append(f'#{wrap(FOLDS[action](left, right))}')
+            return
+        temp = self._temp_manager.get_temp()
+        self.program_block.append(action, lhs, rhs, temp)
         self._semantic_stack.append(temp)
 
     def _while(self) -> None:
@@ -352,10 +427,11 @@ class CodeGenerator:
         pb_address = self._semantic_stack.pop()
         jump_condition = self._semantic_stack.pop()
         jump_out_address = self.pb_len + 1
-        self.program_block[pb_address] = self.code('JPF', jump_condition, jump_out_address)
-        self.program_block.append(self.code('JP', while_address))
+        if self.code_address(pb_address):
+            self.program_block.patch(pb_address, 'JPF', jump_condition, jump_out_address)
+        self.program_block.append('JP', while_address)
         for break_address in breaks:
-            self.program_block[break_address] = self.code('JP', jump_out_address)
+            self.program_block.patch(break_address, 'JP', jump_out_address)
         self._break_count = 0
 
     def _break(self) -> None:
@@ -363,28 +439,35 @@ class CodeGenerator:
             self.error_handler.add(SemanticError.BREAK_MISSING_WHILE, self.lineno)
             return 
         self._while_stack[-1][1].append(self.pb_len)
-        self.program_block.append(self.code('JP', '?'))
+        self.program_block.append('JP', '?')
 
     def _continue(self) -> None:
         if len(self._while_stack) == 0:
             self.error_handler.add(SemanticError.CONTINUE_MISSING_WHILE, self.lineno)
             return
         while_address = self._while_stack[-1][0]
-        self.program_block.append(self.code('JP', while_address))
+        self.program_block.append('JP', while_address)
 
     def arr_init(self) -> None:
+        if self._fold_constants:
+            self._semantic_stack.append(f'#{self._temp_manager.arr_temp}')
+            self._semantic_stack.append(self._temp_manager.arr_temp)
+            return
         temp = self._temp_manager.get_temp()
-        self.program_block.append(self.code('ASSIGN', f'#{self._temp_manager.arr_temp}', temp))
+        self.program_block.append('ASSIGN', f'#{self._temp_manager.arr_temp}', temp)
         self._semantic_stack.append(temp)
         self._semantic_stack.append(self._temp_manager.arr_temp)
 
     def parr(self) -> None:
         expr = self._semantic_stack.pop()
         temp = self._temp_manager.get_arr_temp()
-        self.program_block.append(self.code('ASSIGN', expr, temp))
+        self.program_block.append('ASSIGN', expr, temp)
 
     def arr_len(self) -> None:
-        arr_len = (self._temp_manager.arr_temp - self._semantic_stack.pop()) // self._step
+        arr_start = self._semantic_stack.pop()
+        if self.constant(arr_start) is not None:  # a number left over by a list a syntax error cut short
+            arr_start = self.constant(arr_start)
+        arr_len = (self._temp_manager.arr_temp - arr_start) // self._step
         arr_addr = self._semantic_stack[-2]  # lhs of assign - semantic_stack[-1] contains arr start address
         self._symbol_table.set_args_cells(addr=arr_addr, count=arr_len)
 
@@ -400,6 +483,10 @@ class CodeGenerator:
         self.add()
 
         indexed_addr = self._semantic_stack.pop()
+        if self.constant(indexed_addr) is not None:  # a number indexed as an array, its cell kept in a temp
+            temp = self._temp_manager.get_temp()
+            self.program_block.append('ASSIGN', indexed_addr, temp)
+            indexed_addr = temp
         self._semantic_stack.append(f'@{indexed_addr}')
 
     def replace(self, lexeme: str = '') -> None:
@@ -413,14 +500,20 @@ class CodeGenerator:
         if not self._semantic_stack[-1]:
             self.error_handler.add(SemanticError.VOID_OPERAND, self.lineno)
         
-    def get_program_block(self) -> str:
+    def optimize(self) -> None:
+        """Runs the peephole passes over the program block, once it is complete and free of semantic errors."""
+        if self._passes and not self.error_handler.semantic_errors:
+            peephole = optimize(self._program_block, self._passes, self._temp_manager.temps)
+            self._symbol_table.move_pb_lines(peephole.address)
+
+    def program_block_lines(self) -> Iterable[str]:
         if len(self.error_handler.semantic_errors) == 0:
-            return self._program_block.str_program_block()
+            return self._program_block.lines()
         else:
-            return 'The output code has not been generated.'
+            return ['The output code has not been generated.']
 
-    def get_semantic_errors(self) -> str:
-        return self.error_handler.get_errors_str()
+    def semantic_errors_lines(self) -> Iterable[str]:
+        return self.error_handler.lines()
     
     def get_status(self):
         return {
@@ -0,0 +1,130 @@
+"""
+Peephole passes over the program block, run once the code is complete and before it is listed.
+Each pass is switched on by name, every one of them by default, and they run in this order:
+
+    stack_pairs     an ADD and a SUB of the same immediate to the same address in a row cancel
+                    out, as a push right before a pop moves the stack pointer, and are dropped
+    copy_through    a temp written by one instruction and only read by the ASSIGN right after it
+                    is left out, the instruction writing to the ASSIGN's destination instead
+    jump_threading  a jump, or a return address, to a JP goes straight to where the JP goes
+    noop_jumps      a jump to where control falls through anyway is dropped
+
+Dropped instructions are deleted at the end of their pass, which moves every jump target and
+return address along, see ProgramBlock.delete, and code addresses kept elsewhere, as the
+functions' PB_line of the symbol table, are moved along by Peephole.address. A program with a jump the passes cannot follow,
+say the '?' of a break out of no loop, is left as it is.
+"""
+
+from collections import Counter
+from itertools import compress
+from typing import Collection, Set
+
+from codegen.program_block import (ARITIES, DIRECT, IMMEDIATE, INDIRECT, JP, OPCODE_IDS, OPERANDS, TARGETS,
+                                   ProgramBlock)
+
+PASSES = ('stack_pairs', 'copy_through', 'jump_threading', 'noop_jumps')
+
+ADD, SUB, ASSIGN = OPCODE_IDS['ADD'], OPCODE_IDS['SUB'], OPCODE_IDS['ASSIGN']
+ADDRESSING = bytes(mode in (DIRECT, INDIRECT) for mode in range(256))  # bytes.translate table, by mode
+# operand slot of the destination by opcode, the last one of the instructions writing to memory
+DESTINATIONS = {OPCODE_IDS[action]: ARITIES[action] - 1 for action in ('ADD', 'MULT', 'SUB', 'EQ', 'LT', 'ASSIGN')}
+
+
+class Peephole:
+    def __init__(self, block: ProgramBlock, temps: Collection[int] = ()) -> None:
+        self._block = block
+        self._temps = temps  # addresses no instruction reaches but through its operands
+        self._moves = []  # new address by old one, of each deletion
+
+    def run(self, passes: Collection[str] = PASSES) -> None:
+        if not self.followable():
+            return
+        for name in PASSES:
+            if name in passes:
+                getattr(self, name)()
+
+    def followable(self) -> bool:
+        """Whether every jump goes to an address of the block, or one past its end, or returns through memory."""
+        block = self._block
+        for address in block.addresses(*TARGETS):
+            mode = block.modes[address * OPERANDS + TARGETS[block.opcodes[address]]]
+            if mode != DIRECT and mode != INDIRECT:  # a return goes to one of the labels
+                return False
+        return all(0 <= block.values[slot] <= len(block) for slot in block.code_slots())
+
+    def address(self, address: int) -> int:
+        """Where the code at `address` before the passes is after them."""
+        for moved in self._moves:
+            address = moved[address]
+        return address
+
+    def labels(self) -> Set[int]:
+        """Addresses control can get to other than by falling through."""
+        return {self._block.values[slot] for slot in self._block.code_slots()}
+
+    def stack_pairs(self) -> None:
+        block, labels = self._block, self.labels()
+        removed = bytearray(len(block))
+        for second in sorted(block.addresses(ADD, SUB)):
+            first = second - 1
+            if first >= 0 and not removed[first] and second not in labels and self._cancels(first, second):
+                removed[first] = removed[second] = True
+        self._moves.append(block.delete(removed))
+
+    def _cancels(self, first: int, second: int) -> bool:
+        block = self._block
+        if {block.opcodes[first], block.opcodes[second]} != {ADD, SUB}:
+            return False
+        operands = block.operands(first)
+        (mode, address), (step_mode, _), destination = operands
+        return operands == block.operands(second) and (mode, step_mode) == (DIRECT, IMMEDIATE) \
+            and destination == (mode, address)
+
+    def copy_through(self) -> None:
+        block, labels = self._block, self.labels()
+        references = Counter(compress(block.values, block.modes.tobytes().translate(ADDRESSING)))
+        removed = bytearray(len(block))
+        writers = {}  # the instruction left writing to the destination of a removed ASSIGN
+        modes, values = block.modes, block.values
+        for address in block.addresses(ASSIGN):
+            temp = values[address * OPERANDS]
+            if modes[address * OPERANDS] != DIRECT or temp not in self._temps or references[temp] != 2 \
+                    or not address or address in labels:
+                continue
+            destination = block.operands(address)[1]
+            previous = writers.get(address - 1, address - 1)
+            slot = DESTINATIONS.get(block.opcodes[previous])
+            if slot is not None and block.operands(previous)[slot] == (DIRECT, temp):
+                block.set_operand(previous, slot, *destination)
+                removed[address] = True
+                writers[address] = previous
+        self._moves.append(block.delete(removed))
+
+    def jump_threading(self) -> None:
+        block = self._block
+        opcodes, modes, values = block.opcodes, block.modes, block.values
+        for slot in block.code_slots():
+            target, seen = values[slot], set()
+            while target < len(opcodes) and opcodes[target] == JP and modes[target * OPERANDS] == DIRECT \
+                    and target not in seen:
+                seen.add(target)
+                target = values[target * OPERANDS]
+            block.set_operand(slot // OPERANDS, slot % OPERANDS, modes[slot], target)
+
+    def noop_jumps(self) -> None:
+        block = self._block
+        removed = bytearray(len(block))
+        falls_to = list(range(len(block) + 1))  # the first address left from each one on, once decided
+        for address in sorted(block.addresses(*TARGETS), reverse=True):
+            slot = address * OPERANDS + TARGETS[block.opcodes[address]]
+            target = block.values[slot]
+            if block.modes[slot] == DIRECT and target > address and falls_to[target] == falls_to[address + 1]:
+                removed[address] = True
+                falls_to[address] = falls_to[address + 1]
+        self._moves.append(block.delete(removed))
+
+
+def optimize(block: ProgramBlock, passes: Collection[str] = PASSES, temps: Collection[int] = ()) -> Peephole:
+    peephole = Peephole(block, temps)
+    peephole.run(passes)
+    return peephole
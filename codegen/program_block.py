@@ -1,31 +1,208 @@
+from array import array
+from itertools import accumulate, compress
+from typing import Iterator, List, Sequence, Tuple
+
+# opcodes by number, 0 being the empty instruction a jump is later backpatched into
+OPCODES = ('', 'ADD', 'MULT', 'SUB', 'EQ', 'LT', 'ASSIGN', 'JPF', 'PRINT', 'JP')
+OPCODE_IDS = {action: opcode for opcode, action in enumerate(OPCODES)}
+ARITIES = {'ADD': 3, 'MULT': 3, 'SUB': 3, 'EQ': 3, 'LT': 3, 'ASSIGN': 2, 'JPF': 2, 'PRINT': 1, 'JP': 1}  # operands
+EMPTY_OPCODE, JP, JPF = 0, OPCODE_IDS['JP'], OPCODE_IDS['JPF']
+TARGETS = {JP: 0, JPF: 1}  # operand slot of the jump target by opcode
+
+# operand modes, a value of mode TEXT indexes ProgramBlock.texts, which keeps operands of any
+# other form, say a '?' jump target or an address the code generator came up with as None. A
+# LABEL is an immediate holding a code address, the return address a call pushes.
+MODES = 6
+NONE, DIRECT, IMMEDIATE, INDIRECT, TEXT, LABEL = range(MODES)
+PREFIXES = {'#': IMMEDIATE, '@': INDIRECT}
+MIN_VALUE, MAX_VALUE = -1 << 63, (1 << 63) - 1
+
+OPERANDS = 3  # slots per instruction, unused ones of mode NONE
+KEPT = bytes([1] + [0] * 255)  # bytes.translate table, from a removed flag to a kept one
+
+
+def template(opcode: int, modes: Tuple[int, ...]) -> str:
+    """The format of instructions of an opcode and operand modes, taking the values as arguments."""
+    if opcode == EMPTY_OPCODE:
+        return '( , , , )'
+    formats = ('', '{%d}', '#{%d}', '@{%d}', '{%d}', '#{%d}')  # by mode
+    operands = (formats[mode] % slot if mode else '' for slot, mode in enumerate(modes))
+    return f'({OPCODES[opcode]}, {", ".join(operands)})'
+
+
+# by opcode and operand modes, numbered in base MODES, each made the first time it is used
+TEMPLATES = [None] * (len(OPCODES) * MODES ** OPERANDS)
+
+Operand = Tuple[int, int]  # mode, value
+
+
+class Label(int):
+    """A code address as an operand, listed as an immediate and moved along with the code it addresses."""
+
+
 class ProgramBlock:
-    THREE_OPERAND = {'ADD', 'MULT', 'SUB', 'EQ', 'LT'}
-    TWO_OPERAND = {'ASSIGN', 'JPF'}
-    ONE_OPERAND = {'PRINT', 'JP'}
+    """
+    Generated code as an instruction IR: an opcode per instruction, and a mode and a value per
+    operand slot, in flat arrays indexed by address, for passes over the code and executors to
+    read without parsing text. Jumps are backpatched in place with `patch`, and the text of
+    output.txt is only rendered once the code is listed, by `instructions` or `lines`.
+    """
 
     def __init__(self) -> None:
-        self.codes = list()
+        self.opcodes = array('B')
+        self.modes = array('B')
+        self.values = array('q')
+        self.texts = list()
+        self._operands = dict()  # operands seen as str, by text
+        self._rendered = None  # text of every instruction, until the next change
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def operand(self, arg) -> Operand:
+        if type(arg) is int and MIN_VALUE <= arg <= MAX_VALUE:
+            return DIRECT, arg
+        if type(arg) is Label and MIN_VALUE <= arg <= MAX_VALUE:
+            return LABEL, int(arg)
+        if type(arg) is str:
+            operand = self._operands.get(arg)
+            if operand is None:
+                operand = self._operands[arg] = self._parse(arg)
+            return operand
+        self.texts.append(f'{arg}')
+        return TEXT, len(self.texts) - 1
 
-    def code(self, action: str = '', *args) -> str:
-        args_len = len(args)
+    def _parse(self, arg: str) -> Operand:
+        if arg[:1] in PREFIXES:
+            try:
+                value = int(arg[1:])
+            except ValueError:
+                value = None
+            if value is not None and MIN_VALUE <= value <= MAX_VALUE and str(value) == arg[1:]:
+                return PREFIXES[arg[0]], value
+        self.texts.append(arg)
+        return TEXT, len(self.texts) - 1
+
+    def opcode(self, action: str, args_len: int) -> int:
+        """The opcode of `action`, checking it takes `args_len` operands."""
         if action == '':
-            return f'( , , , )'
+            return EMPTY_OPCODE
         if args_len > 3:
             raise Exception('Wrong inputs')
-        if action in self.THREE_OPERAND and args_len == 3:
-            return f'({action}, {args[0]}, {args[1]}, {args[2]})'
-        elif action in self.TWO_OPERAND and args_len == 2:
-            return f'({action}, {args[0]}, {args[1]}, )'
-        elif action in self.ONE_OPERAND and args_len == 1:
-            return f'({action}, {args[0]}, , )'
-        else:
-            raise Exception(
-                f'Number of inputs {args_len} does not match action {action}')
-
-    def str_program_block(self) -> str:
-        line = 0
-        res = ''
-        for code in self.codes:
-            res += f'{line}\t{code}\n'
-            line += 1
-        return res
+        if ARITIES.get(action) == args_len:
+            return OPCODE_IDS[action]
+        raise Exception(f'Number of inputs {args_len} does not match action {action}')
+
+    def encode(self, action: str, args: tuple) -> Tuple[int, list, list]:
+        """The opcode, the operand modes and the operand values of an instruction."""
+        if ARITIES.get(action) != len(args):  # the empty instruction, or one raising for its operands
+            return self.opcode(action, len(args)), [NONE] * OPERANDS, [0] * OPERANDS
+        modes, values = [NONE] * OPERANDS, [0] * OPERANDS
+        for slot, arg in enumerate(args):
+            if type(arg) is int and MIN_VALUE <= arg <= MAX_VALUE:  # operand, inlined for the most common one
+                modes[slot] = DIRECT
+                values[slot] = arg
+            else:
+                modes[slot], values[slot] = self.operand(arg)
+        return OPCODE_IDS[action], modes, values
+
+    def append(self, action: str = '', *args) -> int:
+        """Adds an instruction, returning its address."""
+        opcode, modes, values = self.encode(action, args)
+        self._rendered = None
+        self.opcodes.append(opcode)
+        self.modes.extend(modes)
+        self.values.extend(values)
+        return len(self.opcodes) - 1
+
+    def patch(self, address: int, action: str = '', *args) -> None:
+        """Replaces the instruction at `address`, indexed as a list would be, negative from the end."""
+        opcode, modes, values = self.encode(action, args)
+        address = range(len(self.opcodes))[address]
+        self._rendered = None
+        self.opcodes[address] = opcode
+        start = address * OPERANDS
+        self.modes[start:start + OPERANDS] = array('B', modes)
+        self.values[start:start + OPERANDS] = array('q', values)
+
+    def operands(self, address: int) -> Tuple[Operand, ...]:
+        start = address * OPERANDS
+        return tuple(zip(self.modes[start:start + OPERANDS], self.values[start:start + OPERANDS]))
+
+    def set_operand(self, address: int, slot: int, mode: int, value: int) -> None:
+        self.modes[address * OPERANDS + slot] = mode
+        self.values[address * OPERANDS + slot] = value
+        self._rendered = None
+
+    def addresses(self, *opcodes: int) -> Iterator[int]:
+        """Addresses of the instructions of `opcodes`, in order for each opcode."""
+        code = self.opcodes.tobytes()
+        for opcode in opcodes:
+            address = code.find(opcode)
+            while address != -1:
+                yield address
+                address = code.find(opcode, address + 1)
+
+    def code_slots(self) -> Iterator[int]:
+        """Operand slots holding code addresses: the jump targets, but for returns through memory, and the labels."""
+        modes = self.modes
+        for address in self.addresses(*TARGETS):
+            slot = address * OPERANDS + TARGETS[self.opcodes[address]]
+            if modes[slot] == DIRECT:
+                yield slot
+        modes = modes.tobytes()
+        slot = modes.find(LABEL)
+        while slot != -1:
+            yield slot
+            slot = modes.find(LABEL, slot + 1)
+
+    def delete(self, removed: bytearray) -> Sequence[int]:
+        """
+        Deletes the instructions flagged in `removed`, a byte per address, moving the code addresses
+        of a deleted instruction to the next one left, as control falls through to it. Every code
+        address, see code_slots, is to be an address of the block or the one past its end. Returns
+        the new address by old one, for code addresses kept outside the block.
+        """
+        if not any(removed):
+            return range(len(removed) + 1)
+        kept = bytes(removed).translate(KEPT)
+        slots = bytearray(len(kept) * OPERANDS)
+        for slot in range(OPERANDS):
+            slots[slot::OPERANDS] = kept
+        moved = list(accumulate(kept, initial=0))  # new address by old one
+        self.opcodes = array('B', compress(self.opcodes, kept))
+        self.modes = array('B', compress(self.modes, slots))
+        self.values = array('q', compress(self.values, slots))
+        values = self.values
+        for slot in self.code_slots():
+            values[slot] = moved[values[slot]]
+        self._rendered = None
+        return moved
+
+    def render(self, address: int) -> str:
+        """The text of the instruction at `address`, as output.txt lists it."""
+        address = range(len(self.opcodes))[address]
+        return next(self._render(address, address + 1))
+
+    def instructions(self) -> List[str]:
+        """The text of every instruction, rendered once for output.txt and the compile result alike."""
+        if self._rendered is None:
+            self._rendered = list(self._render(0, len(self.opcodes)))
+        return self._rendered
+
+    def _render(self, start: int, stop: int) -> Iterator[str]:
+        texts, templates = self.texts, TEMPLATES
+        modes = iter(self.modes[start * OPERANDS:stop * OPERANDS])
+        values = iter(self.values[start * OPERANDS:stop * OPERANDS])
+        for opcode, mode1, mode2, mode3, value1, value2, value3 in \
+                zip(self.opcodes[start:stop], modes, modes, modes, values, values, values):
+            key = ((opcode * MODES + mode1) * MODES + mode2) * MODES + mode3
+            if templates[key] is None:
+                templates[key] = template(opcode, (mode1, mode2, mode3))
+            yield templates[key].format(
+                texts[value1] if mode1 == TEXT else value1, texts[value2] if mode2 == TEXT else value2,
+                texts[value3] if mode3 == TEXT else value3)
+
+    def lines(self) -> Iterator[str]:
+        for line, code in enumerate(self.instructions()):
+            yield f'{line}\t{code}\n'
@@ -1,4 +1,7 @@
 import enum
+from typing import Iterator
+
+from utils.file_handler import join_lines
 
 #lineno: Semantic Error! main function not found
 #lineno: Semantic Error! 'ID' is not defined appropriately
@@ -17,6 +20,10 @@ class SemanticError(enum.Enum):
     VOID_OPERAND = 5
     OVERLOADING = 6
 
+def lineno_of(error_message: str) -> int:
+    return int(error_message[1:error_message.index(':') - 1])
+
+
 class SemanticErrorHandler:
     def __init__(self) -> None:
         self.semantic_errors = list()
@@ -39,6 +46,6 @@ class SemanticErrorHandler:
             error_massage += f'Function \'{id}\' has already been defined with this number of arguments.'
         self.semantic_errors.append(error_massage)
         
-    def get_errors_str(self) -> str:
-        self.semantic_errors.sort(key=lambda x: int(x[1:x.index(':')-1]))
-        return '\n'.join(self.semantic_errors)
\ No newline at end of file
+    def lines(self) -> Iterator[str]:
+        self.semantic_errors.sort(key=lineno_of)
+        return join_lines(self.semantic_errors)
\ No newline at end of file
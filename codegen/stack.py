@@ -19,34 +19,30 @@ class Stack:
         self._start = point
         self._step = step
         self.shadow_stack = deque()
-        self.program_block.append(self.code('ASSIGN', f'#{point}', self._sp))
+        self.program_block.append('ASSIGN', f'#{point}', self._sp)
 
     @property
-    def program_block(self):
-        return self._program_block.codes
+    def program_block(self) -> ProgramBlock:
+        return self._program_block
 
     @property
     def pb_len(self):
         return len(self.program_block)
 
-    @property
-    def code(self):
-        return self._program_block.code
-
     @property
     def is_empty(self):
         return self._sp == self._start
 
     def push(self, value:int) -> None:
         self.shadow_stack.append(value)
-        self.program_block.append(self.code('ASSIGN', value, f'@{self._sp}'))
-        self.program_block.append(self.code('ADD', self._sp, f'#{self._step}', self._sp))
+        self.program_block.append('ASSIGN', value, f'@{self._sp}')
+        self.program_block.append('ADD', self._sp, f'#{self._step}', self._sp)
         self._start += self._step
 
     def pop(self) -> int:
         temp = self._temp_manager.get_temp()
-        self.program_block.append(self.code('SUB', self._sp, f'#{self._step}', self._sp))
-        self.program_block.append(self.code('ASSIGN', f'@{self._sp}', temp))
+        self.program_block.append('SUB', self._sp, f'#{self._step}', self._sp)
+        self.program_block.append('ASSIGN', f'@{self._sp}', temp)
         self.shadow_stack.pop()
         return temp
 
@@ -58,6 +54,6 @@ class Stack:
 
     def access(self, offset: int) -> int:
         temp1, temp2 = self._temp_manager.get_temp(), self._temp_manager.get_temp()
-        self.program_block.append(self.code('SUB', self._sp, f'#{offset * self._step}', temp1))
-        self.program_block.append(self.code('ASSIGN', f'@{temp1}', temp2))
+        self.program_block.append('SUB', self._sp, f'#{offset * self._step}', temp1)
+        self.program_block.append('ASSIGN', f'@{temp1}', temp2)
         return temp2
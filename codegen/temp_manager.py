@@ -1,5 +1,6 @@
 class TempManager:
     def __init__(self, start_address: int = 1500, step: int = 4):
+        self._start_address = start_address
         self.var_temp = start_address
         self.arr_temp = start_address * 2
         self._step = step
@@ -13,3 +14,13 @@ class TempManager:
         addr = self.arr_temp
         self.arr_temp += self._step
         return addr
+
+    @property
+    def temps(self) -> range:
+        """Addresses of get_temp below the first of get_arr_temp, where no array cell can be."""
+        return range(self._start_address, self._start_address * 2, self._step)
+
+    @property
+    def overrun(self) -> bool:
+        """Whether get_temp has handed out addresses past temps, into the cells of arrays."""
+        return self.var_temp > self._start_address * 2
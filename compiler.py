@@ -3,7 +3,42 @@ Masih Beigi - 98101244
 Ali Moroukian - 98106094
 """
 
-from parser import Parser
+import argparse
+
+from driver import compile_source
+from driver.cache import DEFAULT_DIRECTORY, CompileCache
+from parser import ENGINES, PASSES, PROFILES, SCANNERS
+from parser.hot_paths import HotPaths
+from utils.file_handler import ArtifactWriter, FileChunks
 
 if __name__ == '__main__':
-    Parser().parse()
+    arg_parser = argparse.ArgumentParser(description='Compiles input.txt into output.txt')
+    arg_parser.add_argument('--scanner', choices=SCANNERS.keys(), default='table',
+                            help='scanner engine, reference is the original if/elif DFA')
+    arg_parser.add_argument('--background-writer', action='store_true',
+                            help='write output files from a separate thread while compiling')
+    arg_parser.add_argument('--profile', choices=PROFILES.keys(), default='full',
+                            help='output files to write, codegen skips the parse tree and the token/symbol listings')
+    arg_parser.add_argument('--engine', choices=ENGINES, default='table',
+                            help='parse with the table driven loop or the generated recursive descent functions')
+    arg_parser.add_argument('--passes', nargs='*', choices=PASSES, default=PASSES,
+                            help='peephole passes run over the generated code, all of them by default, none if empty')
+    arg_parser.add_argument('--hot-paths', choices=('table', 'json'),
+                            help='print expansion, action and error recovery counters of the compile')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='always compile, without looking up or storing the result in the cache')
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_DIRECTORY,
+                            help='compilation cache, see python -m driver.cache for its stats')
+    args = arg_parser.parse_args()
+    hot_paths = HotPaths() if args.hot_paths else None
+    source = FileChunks('input', '.txt')  # streamed, never read whole into memory
+    with ArtifactWriter(background=args.background_writer) as writer:
+        if args.no_cache or hot_paths is not None:  # a cache hit would count nothing
+            compile_source(source, PROFILES[args.profile], scanner_mode=args.scanner, engine=args.engine,
+                           writer=writer, hot_paths=hot_paths, passes=args.passes)
+        else:
+            with CompileCache(args.cache_dir) as cache:
+                cache.compile(source, PROFILES[args.profile], writer=writer, scanner_mode=args.scanner,
+                              engine=args.engine, passes=args.passes)
+    if hot_paths is not None:
+        print(hot_paths.table() if args.hot_paths == 'table' else hot_paths.to_json())
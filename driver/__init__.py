@@ -0,0 +1,14 @@
+"""
+Drivers of the compiler: the compile_source library call, the batch compiler, the compilation
+cache and the compile server with its client. The library call is imported on first use, so the
+client can be started without importing the compiler.
+"""
+
+__all__ = ['ARTIFACTS', 'CompileResult', 'Diagnostic', 'compile_source']
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from driver import api
+        return getattr(api, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,82 @@
+"""
+Library interface of the compiler: compile_source compiles source text in memory and returns
+the program and its diagnostics as objects, without reading input.txt or writing files into the
+working directory, so one process can compile any number of programs. The compiled parse table
+and the generated descent engines are loaded once per process and shared by every compile.
+"""
+
+from typing import Collection, Dict, Iterable, NamedTuple, Tuple, Union
+
+from codegen.semantic_error import lineno_of
+from parser import PASSES, PROFILES, Parser
+from parser.hot_paths import HotPaths
+from utils.file_handler import ArtifactWriter, MemoryWriter
+
+__all__ = ['ARTIFACTS', 'CompileResult', 'Diagnostic', 'compile_source']
+
+ARTIFACTS = PROFILES['full']  # every file the compiler can produce
+
+
+class Diagnostic(NamedTuple):
+    lineno: int
+    message: str  # as written in the error file, without the line end
+
+
+class CompileResult(NamedTuple):
+    program_block: Tuple[str, ...]  # generated code by address, also when there are semantic errors
+    lexical_errors: Tuple[Diagnostic, ...]
+    syntax_errors: Tuple[Diagnostic, ...]
+    semantic_errors: Tuple[Diagnostic, ...]
+    artifacts: Dict[str, str]  # text of the requested output files by name without .txt, those the compile produced
+
+    @property
+    def ok(self) -> bool:
+        return not (self.lexical_errors or self.syntax_errors or self.semantic_errors)
+
+    def as_dict(self) -> dict:
+        """The result as plain lists and dicts, ready for json.dumps."""
+        diagnostics = {kind: [diagnostic._asdict() for diagnostic in getattr(self, kind)]
+                       for kind in ('lexical_errors', 'syntax_errors', 'semantic_errors')}
+        return {'ok': self.ok, 'program_block': list(self.program_block), **diagnostics,
+                'artifacts': self.artifacts}
+
+
+def profile_of(artifacts: Collection[str]) -> str:
+    """The cheapest parser profile producing all of `artifacts`."""
+    for profile in ('diagnostics', 'codegen', 'full'):
+        if set(artifacts) <= set(PROFILES[profile]):
+            return profile
+    raise ValueError(f'unknown artifacts {sorted(set(artifacts) - set(ARTIFACTS))}')
+
+
+def compile_source(text: Union[str, Iterable[str]], artifacts: Collection[str] = (), scanner_mode: str = 'table',
+                   engine: str = 'table', writer: ArtifactWriter = None, hot_paths: HotPaths = None,
+                   passes: Collection[str] = PASSES) -> CompileResult:
+    """
+    Compiles `text` as the contents of input.txt would be, or the chunks of it, say a FileChunks,
+    scanned as they are read. `artifacts` names the output files to
+    render, whose text is returned in the result, or streamed to `writer` when one is given. Like
+    the compiler itself this raises whatever the code generator raises on the programs it gives
+    up on, after writing the files which were complete by then. `passes` names the peephole
+    passes run over the code, see codegen.peephole.
+    """
+    profile = profile_of(artifacts)
+    memory = None
+    if writer is None:
+        writer = memory = MemoryWriter()
+    parser = Parser(scanner_mode, writer=writer, profile=profile, engine=engine, hot_paths=hot_paths,
+                    source=text, passes=passes)
+    parser.parse()
+
+    code = parser.code_generator
+    return CompileResult(
+        program_block=tuple(code.program_block.instructions()),
+        lexical_errors=tuple(Diagnostic(line, f'({lexeme}, {kind.value})')
+                             for kind, lexeme, _, line in parser.scanner.errors),
+        syntax_errors=tuple(Diagnostic(lineno, message)
+                            for lineno, messages in parser.syntax_errors.items() for message in messages),
+        semantic_errors=tuple(Diagnostic(lineno_of(message), message)
+                              for message in sorted(code.error_handler.semantic_errors, key=lineno_of)),
+        artifacts={} if memory is None else {name: memory.artifacts[name] for name in artifacts
+                                             if name in memory.artifacts},
+    )
@@ -0,0 +1,165 @@
+"""
+Batch compiler for many programs: compiles every source file named on the command line, by path
+or glob, in a pool of worker processes which import the compiler once and stay warm for the
+whole batch. Each program gets its own directory of output files under --output-dir, and/or a
+line of JSON with its program block, diagnostics and timing in the --jsonl stream.
+
+    python -m driver.batch SOURCES ... [--from LIST] [--output-dir DIR] [--jsonl FILE]
+                                       [--profile PROFILE] [--workers COUNT] [--chunk-size COUNT]
+                                       [--no-cache] [--cache-dir DIR]
+
+Sources are handed out in chunks, with a bounded number of chunks in flight, so the batch can
+list hundreds of thousands of files without queueing them all at once.
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Collection, Iterable, Iterator, List, NamedTuple, Optional
+
+from driver.api import compile_source
+from driver.cache import DEFAULT_DIRECTORY, CompileCache
+from parser import PROFILES
+from utils.file_handler import ArtifactWriter
+
+CHUNK_SIZE = 64
+CHUNKS_PER_WORKER = 2  # chunks in flight per worker, enough to keep it busy between two results
+
+
+class FileResult(NamedTuple):
+    path: str
+    seconds: float
+    error: Optional[str]  # the exception which ended the compile, if any
+    result: Optional[dict]  # the CompileResult as JSON, when the batch writes a JSONL stream
+
+    def record(self) -> dict:
+        return {'path': self.path, 'seconds': round(self.seconds, 6), 'error': self.error, **(self.result or {})}
+
+
+def expand_sources(patterns: Iterable[str]) -> Iterator[str]:
+    """Paths of the files named by `patterns`, each either a path or a glob, `**` included."""
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            yield from sorted(path for path in glob.iglob(pattern, recursive=True) if os.path.isfile(path))
+        else:
+            yield pattern
+
+
+def read_list(name: str) -> Iterator[str]:
+    """Paths listed one per line in the file `name`, or on stdin for -."""
+    if name == '-':
+        yield from filter(None, (line.strip() for line in sys.stdin))
+        return
+    with open(name) as file:
+        yield from filter(None, (line.strip() for line in file))
+
+
+def output_directory(root: str, path: str) -> str:
+    """Directory of the output files of `path`, its relative path without the extension under `root`."""
+    relative = os.path.splitdrive(os.path.splitext(os.path.normpath(path))[0])[1].lstrip(os.sep)
+    return os.path.join(root, relative.replace('..', '__'))
+
+
+def compile_file(path: str, artifacts: Collection[str], output_root: Optional[str], as_json: bool,
+                 cache: CompileCache = None) -> FileResult:
+    start = time.perf_counter()
+    result = error = None
+    compile = compile_source if cache is None else cache.compile
+    try:
+        with open(path) as file:
+            source = file.read()
+        if output_root is None:
+            compiled = compile(source, artifacts if as_json else ())
+        else:
+            directory = output_directory(output_root, path)
+            os.makedirs(directory, exist_ok=True)
+            with ArtifactWriter(directory) as writer:
+                compiled = compile(source, artifacts, writer=writer)
+        if as_json:
+            result = compiled.as_dict()
+    except Exception as exception:  # the code generator gives up on some programs, the batch goes on
+        error = f'{type(exception).__name__}: {exception}'
+    return FileResult(path, time.perf_counter() - start, error, result)
+
+
+def compile_chunk(paths: List[str], artifacts: Collection[str], output_root: Optional[str], as_json: bool,
+                  cache_dir: Optional[str]) -> List[FileResult]:
+    if cache_dir is None:
+        return [compile_file(path, artifacts, output_root, as_json) for path in paths]
+    with CompileCache(cache_dir) as cache:
+        return [compile_file(path, artifacts, output_root, as_json, cache) for path in paths]
+
+
+def compile_batch(paths: Iterable[str], artifacts: Collection[str] = PROFILES['codegen'], output_root: str = None,
+                  as_json: bool = False, workers: int = None, chunk_size: int = CHUNK_SIZE,
+                  cache_dir: str = None) -> Iterator[FileResult]:
+    """Results of compiling `paths`, as the chunks holding them complete, through the cache in `cache_dir` if given."""
+    workers = workers or os.cpu_count()
+    paths = iter(paths)
+    chunks = iter(lambda: list(itertools.islice(paths, chunk_size)), [])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk in itertools.islice(chunks, workers * CHUNKS_PER_WORKER):
+            pending.add(pool.submit(compile_chunk, chunk, artifacts, output_root, as_json, cache_dir))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.add(pool.submit(compile_chunk, chunk, artifacts, output_root, as_json, cache_dir))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Compiles many programs in a pool of worker processes')
+    arg_parser.add_argument('sources', nargs='*', help='source files or globs, ** matches directories recursively')
+    arg_parser.add_argument('--from', dest='lists', action='append', default=[],
+                            help='file listing one source path per line, - for stdin')
+    arg_parser.add_argument('--output-dir', help='write the output files of every source into DIR/<source path>/')
+    arg_parser.add_argument('--jsonl', help='write one JSON result per source to FILE, - for stdout')
+    arg_parser.add_argument('--profile', choices=PROFILES.keys(), default='codegen',
+                            help='output files to produce for every source')
+    arg_parser.add_argument('--workers', type=int, help='worker processes, the CPU count by default')
+    arg_parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='sources per task sent to a worker')
+    arg_parser.add_argument('--no-cache', action='store_true', help='compile every source, even unchanged ones')
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_DIRECTORY, help='compilation cache shared by the workers')
+    args = arg_parser.parse_args()
+    if not args.output_dir and not args.jsonl:
+        arg_parser.error('nothing to write, give --output-dir and/or --jsonl')
+
+    paths = itertools.chain(expand_sources(args.sources), *map(read_list, args.lists))
+    stream = None if not args.jsonl else sys.stdout if args.jsonl == '-' else open(args.jsonl, 'w')
+    summary = sys.stderr if stream is sys.stdout else sys.stdout
+
+    start = time.perf_counter()
+    count = 0
+    failures = []
+    slowest = []
+    for result in compile_batch(paths, PROFILES[args.profile], args.output_dir, stream is not None, args.workers,
+                                args.chunk_size, None if args.no_cache else args.cache_dir):
+        count += 1
+        if result.error is not None:
+            failures.append(result)
+        slowest = sorted(slowest + [result], key=lambda result: -result.seconds)[:5]
+        if stream is not None:
+            stream.write(json.dumps(result.record()) + '\n')
+    elapsed = time.perf_counter() - start
+    if stream is not None and stream is not sys.stdout:
+        stream.close()
+
+    print(f'{count} files in {elapsed:.2f}s, {count / elapsed if elapsed else 0:,.0f} files/s, '
+          f'{len(failures)} failed', file=summary)
+    for result in slowest:
+        print(f'  {result.seconds * 1000:8.1f} ms  {result.path}', file=summary)
+    for result in failures:
+        print(f'failed {result.path}: {result.error}', file=summary)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Content addressed compilation cache. A compile is keyed by a hash of the source text, the
+version of the compiler, which is a hash of its code and grammar, the artifacts asked for and
+the peephole passes run, and its CompileResult is kept in a file named by the key. A hit
+restores the result and its output files without scanning or parsing. Scanner modes and parser
+engines are left out of the key, they are checked to produce identical files.
+
+Entries are written atomically and the cache is kept under a size bound by evicting the least
+recently used entries, a hit refreshing the modification time of its entry. Hit and miss counts
+are appended to stats.jsonl, one line per cache closed, so that concurrent processes never lose
+each other's counts.
+
+    python -m driver.cache [--cache-dir DIR] {stats,clear}
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+from collections import Counter
+from functools import lru_cache
+from typing import Collection, Dict, Iterable, Optional, Union
+
+from driver.api import CompileResult, compile_source
+from parser import PASSES
+from utils.file_handler import ArtifactWriter, MemoryWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPILER_SOURCES = ('scanner/*.py', 'parser/*.py', 'codegen/*.py', 'utils/*.py', 'driver/api.py', 'grammar.txt')
+
+DEFAULT_DIRECTORY = os.environ.get('COMPILER_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'compiler'))
+MAX_BYTES = 256 << 20
+TRIM_EVERY = 16  # stored bytes between two trims, as a fraction of max_bytes
+STATS = 'stats.jsonl'
+ENTRY = '.pickle'
+
+
+@lru_cache(maxsize=None)
+def compiler_version() -> str:
+    """Hash of the code and the grammar the compiler is made of."""
+    version = hashlib.sha256()
+    for pattern in COMPILER_SOURCES:
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            version.update(os.path.relpath(path, ROOT).encode())
+            with open(path, 'rb') as file:
+                version.update(file.read())
+    return version.hexdigest()
+
+
+def write_artifacts(writer: Optional[ArtifactWriter], texts: Dict[str, str], artifacts: Collection[str]) -> None:
+    if writer is not None:
+        for name, text in texts.items():
+            if name in artifacts:
+                writer.write(name, [text])
+
+
+class CompileCache:
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = MAX_BYTES) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = Counter()  # hits, misses, stores and evictions since the last close
+        self._stored = 0  # bytes stored since the last trim
+
+    def key(self, source: Union[str, Iterable[str]], artifacts: Collection[str],
+            passes: Collection[str] = PASSES) -> str:
+        """The key of a compile, hashing a source given in chunks as they are read."""
+        key = hashlib.sha256(compiler_version().encode())
+        key.update(','.join(sorted(artifacts)).encode() + b'\0')
+        key.update(','.join(sorted(passes)).encode() + b'\0')
+        for chunk in [source] if isinstance(source, str) else source:
+            key.update(chunk.encode('utf-8', 'surrogatepass'))
+        return key.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ENTRY)
+
+    def get(self, key: str) -> Optional[CompileResult]:
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                result = pickle.load(file)
+            os.utime(path)  # recently used
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return result
+
+    def put(self, key: str, result: CompileResult) -> None:
+        path = self.path(key)
+        data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f'{path}.{os.getpid()}'
+            with open(temporary, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except OSError:  # a full or read only cache only costs the hits
+            return
+        self.stats['stores'] += 1
+        self._stored += len(data)
+        if self._stored > self.max_bytes // TRIM_EVERY:
+            self.trim()
+
+    def compile(self, source: Union[str, Iterable[str]], artifacts: Collection[str] = (),
+                writer: ArtifactWriter = None, **options) -> CompileResult:
+        """
+        compile_source through the cache, `options` being those of compile_source. A source in
+        chunks is iterated twice on a miss, once for the key and once to compile it, so it is to
+        be an iterable read anew each time, such as a FileChunks. Compiles which raise are not
+        cached.
+        """
+        key = self.key(source, artifacts, options.get('passes', PASSES))
+        result = self.get(key)
+        if result is not None:
+            self.stats['hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            memory = MemoryWriter()
+            try:
+                result = compile_source(source, artifacts, writer=memory, **options)
+            except Exception:  # the files complete by then are still written, as compile_source does
+                write_artifacts(writer, memory.artifacts, artifacts)
+                raise
+            result = result._replace(artifacts={name: text for name, text in memory.artifacts.items()
+                                                if name in artifacts})
+            self.put(key, result)
+        if writer is None:
+            return result
+        write_artifacts(writer, result.artifacts, artifacts)
+        return result._replace(artifacts={})
+
+    def trim(self) -> None:
+        """Evicts the least recently used entries until the cache fits in max_bytes."""
+        self._stored = 0
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*', '*' + ENTRY)):
+            try:
+                status = os.stat(path)
+            except OSError:  # evicted by another process
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.stats['evictions'] += 1
+
+    def close(self) -> None:
+        """Appends the counts since the last close to the stats file."""
+        if not self.stats:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, STATS), 'a') as file:
+                file.write(json.dumps(dict(self.stats)) + '\n')  # one small append, atomic between processes
+        except OSError:
+            pass
+        self.stats.clear()
+
+    def __enter__(self) -> 'CompileCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_stats(directory: str = DEFAULT_DIRECTORY) -> Counter:
+    stats = Counter()
+    try:
+        with open(os.path.join(directory, STATS)) as file:
+            for line in file:
+                stats.update(json.loads(line))
+    except OSError:
+        pass
+    return stats
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Inspects or empties the compilation cache')
+    arg_parser.add_argument('command', choices=('stats', 'clear'))
+    arg_parser.add_argument('--cache-dir', default=DEFAULT_DIRECTORY)
+    args = arg_parser.parse_args()
+
+    if args.command == 'clear':
+        import shutil
+        shutil.rmtree(args.cache_dir, ignore_errors=True)
+        return
+    stats = read_stats(args.cache_dir)
+    entries = glob.glob(os.path.join(args.cache_dir, '*', '*' + ENTRY))
+    size = sum(os.path.getsize(path) for path in entries if os.path.exists(path))
+    lookups = stats['hits'] + stats['misses']
+    print(f'{args.cache_dir}: {len(entries)} entries, {size / 2 ** 20:.1f} MB')
+    print(f'hits {stats["hits"]}, misses {stats["misses"]}, hit rate '
+          f'{stats["hits"] / lookups if lookups else 0:.1%}, stores {stats["stores"]}, evictions {stats["evictions"]}')
+
+
+if __name__ == '__main__':
+    main()
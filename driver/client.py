@@ -0,0 +1,89 @@
+"""
+Client of the compile server, standing in for compiler.py: sends input.txt to the server and
+writes the output files it returns into the working directory. It imports nothing of the
+compiler, so a compile costs a connection instead of a process start and the compiler's imports.
+
+    python -m driver.client [--socket PATH | --host HOST --port PORT] [--profile PROFILE]
+
+Requests and responses are single lines of JSON. A request holds the source and the profile or
+artifact names, the response the fields of CompileResult.as_dict, an error and the output files.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import sys
+import tempfile
+
+DEFAULT_SOCKET = os.environ.get('COMPILER_SOCKET',
+                                os.path.join(tempfile.gettempdir(), f'compiler-{os.getuid()}.sock'))
+LINE_LIMIT = 64 << 20  # longest request or response line, in bytes
+
+_ids = itertools.count()
+
+
+def request(source: str, profile: str = 'full', **fields) -> dict:
+    return {'id': next(_ids), 'source': source, 'profile': profile, **fields}
+
+
+def compile_remote(payload: dict, path: str = DEFAULT_SOCKET, host: str = None, port: int = None) -> dict:
+    """Sends one request and waits for its response, over a connection of its own."""
+    if port is None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+    else:
+        connection = socket.create_connection((host or 'localhost', port))
+    with connection, connection.makefile('rwb') as stream:
+        stream.write(json.dumps(payload).encode() + b'\n')
+        stream.flush()
+        line = stream.readline(LINE_LIMIT)
+    if not line:
+        raise ConnectionError('the compile server closed the connection')
+    return json.loads(line)
+
+
+async def open_connection(path: str = DEFAULT_SOCKET, host: str = None, port: int = None):
+    if port is None:
+        return await asyncio.open_unix_connection(path, limit=LINE_LIMIT)
+    return await asyncio.open_connection(host or 'localhost', port, limit=LINE_LIMIT)
+
+
+async def send(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, payload: dict) -> dict:
+    """Sends one request over an open connection and waits for its response."""
+    writer.write(json.dumps(payload).encode() + b'\n')
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError('the compile server closed the connection')
+    return json.loads(line)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Compiles input.txt on the compile server')
+    arg_parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket of the server')
+    arg_parser.add_argument('--host', help='host of a server listening on TCP, with --port')
+    arg_parser.add_argument('--port', type=int, help='TCP port of the server, instead of the Unix socket')
+    arg_parser.add_argument('--profile', default='full', help="output files to write, as compiler.py's --profile")
+    arg_parser.add_argument('--engine', default='table', help="parser engine, as compiler.py's --engine")
+    arg_parser.add_argument('--passes', nargs='*', help="peephole passes, as compiler.py's --passes")
+    args = arg_parser.parse_args()
+
+    with open('input.txt') as file:
+        source = file.read()
+    fields = {'engine': args.engine}
+    if args.passes is not None:  # every pass, as the server runs without any named
+        fields['passes'] = args.passes
+    response = compile_remote(request(source, args.profile, **fields), args.socket, args.host, args.port)
+    for name, text in response.get('artifacts', {}).items():
+        with open(f'{name}.txt', 'w') as file:
+            file.write(text)
+    if response.get('error'):
+        print(response['error'], file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Compile server: a long lived asyncio daemon listening on a Unix socket, or on TCP, which compiles
+the sources sent by driver.client in a pool of worker processes that imported the compiler, its
+parse table and its descent engines once, when the server started.
+
+    python -m driver.server [--socket PATH | --host HOST --port PORT] [--workers COUNT]
+                            [--queue COUNT] [--timeout SECONDS] [--cache-dir DIR]
+
+Every connection is served one request at a time, so a client sending faster than it reads
+responses is slowed down by its own socket. Past --queue compiles in the pool, running or waiting
+for a worker, new requests are turned away with a busy error right away instead of queueing
+without bound. A compile not done within --timeout seconds is answered with a timeout error, but
+keeps its place in the pool until its worker is done with it, so timeouts cannot pile work up
+behind the bound.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Collection, Optional
+
+from driver.client import DEFAULT_SOCKET, LINE_LIMIT
+
+TIMEOUT = 10.0
+QUEUE_PER_WORKER = 4
+
+WARM_UP_SOURCE = 'def main():\n    output(1);\n;\n'
+
+
+def warm_up() -> None:
+    """Imports the compiler and loads everything a compile shares, in a worker process."""
+    from driver.api import compile_source
+    for engine in ('table', 'descent'):
+        compile_source(WARM_UP_SOURCE, engine=engine)
+
+
+def compile_request(source: str, artifacts: Collection[str], engine: str, passes: Optional[Collection[str]],
+                    cache_dir: Optional[str]) -> dict:
+    """
+    Response fields of a compile, in a worker process, every peephole pass run without `passes`.
+    Files complete at a failure are returned too.
+    """
+    from driver.api import compile_source
+    from driver.cache import CompileCache
+    from parser import PASSES
+    from utils.file_handler import MemoryWriter
+
+    memory = MemoryWriter()
+    response = {'error': None}
+    options = {'engine': engine, 'passes': PASSES if passes is None else tuple(passes)}
+    try:
+        if cache_dir is None:
+            result = compile_source(source, artifacts, writer=memory, **options)
+        else:
+            with CompileCache(cache_dir) as cache:
+                result = cache.compile(source, artifacts, writer=memory, **options)
+        response.update(result.as_dict())
+    except Exception as exception:  # the code generator gives up on some programs
+        response.update(ok=False, error=f'{type(exception).__name__}: {exception}')
+    response['artifacts'] = {name: text for name, text in memory.artifacts.items() if name in artifacts}
+    return response
+
+
+class CompileServer:
+    def __init__(self, workers: int = None, queue: int = None, timeout: float = TIMEOUT,
+                 cache_dir: str = None) -> None:
+        self.workers = workers or os.cpu_count()
+        self.queue = queue or self.workers * QUEUE_PER_WORKER
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.pending = 0  # compiles submitted to the pool and not done in it yet, answered or not
+        self._pool = None
+        self._loop = None
+        self._server = None
+
+    async def start(self, path: str = DEFAULT_SOCKET, host: str = None, port: int = None) -> None:
+        from parser import PROFILES
+        self._profiles = PROFILES
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_up)
+        self._loop = loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, os.getpid) for _ in range(self.workers)))
+        if port is None:
+            if os.path.exists(path):
+                os.remove(path)  # left by a server which did not shut down
+            self._server = await asyncio.start_unix_server(self.serve, path, limit=LINE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self.serve, host or 'localhost', port, limit=LINE_LIMIT)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # longer than LINE_LIMIT, the rest of the stream cannot be framed
+                    await self.respond(writer, {'id': None, 'ok': False, 'error': 'request too long'})
+                    break
+                if not line:
+                    break
+                await self.respond(writer, await self.handle(line))
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer: asyncio.StreamWriter, response: dict) -> None:
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    async def handle(self, line: bytes) -> dict:
+        response = {'id': None}
+        try:
+            request = json.loads(line)
+            response['id'] = request.get('id')
+            source = request['source']
+            artifacts = request.get('artifacts') or self._profiles[request.get('profile', 'full')]
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            return {**response, 'ok': False, 'error': f'bad request: {error!r}'}
+        if self.pending >= self.queue:
+            return {**response, 'ok': False, 'error': 'server busy'}
+
+        compiled = self._pool.submit(compile_request, source, tuple(artifacts), request.get('engine', 'table'),
+                                     request.get('passes'), self.cache_dir)
+        self.pending += 1
+        compiled.add_done_callback(self._release)  # run, failed, or cancelled before it started
+        try:
+            return {**response, **await asyncio.wait_for(asyncio.wrap_future(compiled), self.timeout)}
+        except asyncio.TimeoutError:  # a compile already running in a worker still runs to its end
+            return {**response, 'ok': False, 'error': f'timed out after {self.timeout}s'}
+
+    def _release(self, compiled) -> None:
+        """Frees the place of a compile done in the pool, called from the thread of the pool."""
+        try:
+            self._loop.call_soon_threadsafe(self._free)
+        except RuntimeError:  # the loop closed with the server
+            pass
+
+    def _free(self) -> None:
+        self.pending -= 1
+
+
+async def run(server: CompileServer, path: str, host: str, port: int) -> None:
+    await server.start(path, host, port)
+    address = path if port is None else f'{host or "localhost"}:{port}'
+    print(f'listening on {address}', flush=True)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop.set)
+    await stop.wait()
+    await server.close()
+    if port is None and os.path.exists(path):
+        os.remove(path)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Serves compiles to driver.client over a socket')
+    arg_parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Unix socket to listen on')
+    arg_parser.add_argument('--host', help='host to listen on with --port')
+    arg_parser.add_argument('--port', type=int, help='TCP port to listen on, instead of the Unix socket')
+    arg_parser.add_argument('--workers', type=int, help='compile processes, the CPU count by default')
+    arg_parser.add_argument('--queue', type=int, help=f'compiles waiting for a worker before requests are turned '
+                                                      f'away, {QUEUE_PER_WORKER} per worker by default')
+    arg_parser.add_argument('--timeout', type=float, default=TIMEOUT, help='seconds a compile may take')
+    arg_parser.add_argument('--cache-dir', help='compile through the compilation cache in this directory')
+    args = arg_parser.parse_args()
+
+    server = CompileServer(args.workers, args.queue, args.timeout, args.cache_dir)
+    asyncio.run(run(server, args.socket, args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
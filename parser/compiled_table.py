@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import os
+import pickle
+import warnings
+from typing import Dict, NamedTuple, Tuple
+
+from parser.parse_table import GRAMMAR_FILE, SYNCHRONOUS, build_parse_table, read_grammar
+from scanner.scanner import TERMINALS
+
+SNAPSHOT_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__pycache__')
+
+# table entries which are not production numbers
+EMPTY = -1
+SYNCH = -2
+
+
+class Production(NamedTuple):
+    stack: Tuple[int, ...]  # symbols to push, last one first, without EPSILON
+    children: Tuple[str, ...]  # parse tree nodes in the same order, without the action symbols
+    epsilon: bool  # the parse tree gets an epsilon node
+
+
+class CompiledTable(NamedTuple):
+    """
+    Symbols are numbered terminals first, with the ids the scanner hands out, then nonterminals,
+    then action symbols, so a symbol's kind is told by comparing it with the two bases.
+    """
+    names: Tuple[str, ...]  # symbol name by symbol id
+    nonterminals: int  # id of the first nonterminal
+    actions: int  # id of the first action symbol
+    rows: Tuple[Tuple[int, ...], ...]  # rows[nonterminal - nonterminals][terminal] is a production, EMPTY or SYNCH
+    productions: Tuple[Production, ...]
+    start: int  # id of the start symbol
+
+    def is_terminal(self, symbol: int) -> bool:
+        return symbol < self.nonterminals
+
+    def is_action(self, symbol: int) -> bool:
+        return symbol >= self.actions
+
+
+def compile_table(table: Dict[str, Dict[str, tuple]]) -> CompiledTable:
+    nonterminals = list(table)
+    actions = list(dict.fromkeys(symbol for row in table.values() for grammar in row.values()
+                                 if grammar and grammar != SYNCHRONOUS
+                                 for symbol in grammar if symbol and symbol.startswith('#')))
+    names = TERMINALS + tuple(nonterminals) + tuple(actions)
+    ids = {name: symbol for symbol, name in enumerate(names)}
+
+    productions = dict()  # production by grammar, equal right hand sides share a number
+    rows = []
+    for nonterminal in nonterminals:
+        row = [EMPTY] * len(TERMINALS)
+        for terminal, grammar in table[nonterminal].items():
+            if grammar == SYNCHRONOUS:
+                row[ids[terminal]] = SYNCH
+                continue
+            if grammar not in productions:
+                symbols = tuple(symbol for symbol in reversed(grammar or ()) if symbol)
+                productions[grammar] = len(productions), Production(
+                    stack=tuple(ids[symbol] for symbol in symbols),
+                    children=tuple(symbol for symbol in symbols if not symbol.startswith('#')),
+                    epsilon=not grammar or not grammar[0],
+                )
+            row[ids[terminal]] = productions[grammar][0]
+        rows.append(tuple(row))
+
+    return CompiledTable(
+        names=names,
+        nonterminals=len(TERMINALS),
+        actions=len(TERMINALS) + len(nonterminals),
+        rows=tuple(rows),
+        productions=tuple(production for _, production in productions.values()),
+        start=ids[nonterminals[0]],
+    )
+
+
+def snapshot_key(grammar: bytes, *modules: str) -> str:
+    """
+    Hash of everything the compiled table depends on: the grammar, the terminal ids and this code,
+    and of the source files in `modules` for snapshots derived from the table.
+    """
+    key = hashlib.sha256(grammar)
+    key.update(repr(TERMINALS).encode())
+    for module in (__file__, build_parse_table.__code__.co_filename) + modules:
+        with open(module, 'rb') as file:
+            key.update(file.read())
+    return key.hexdigest()[:16]
+
+
+def load_table(grammar_file: str = GRAMMAR_FILE) -> CompiledTable:
+    """
+    The compiled table of `grammar_file`, from its snapshot if there is one for this version of the
+    grammar, otherwise built from the grammar and saved as the new snapshot.
+    """
+    with open(grammar_file, 'rb') as file:
+        grammar = file.read()
+    name = os.path.splitext(os.path.basename(grammar_file))[0]
+    snapshot = os.path.join(SNAPSHOT_DIRECTORY, f'{name}.{snapshot_key(grammar)}.pickle')
+    try:
+        with open(snapshot, 'rb') as file:
+            return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+
+    table, conflicts = build_parse_table(read_grammar(grammar.decode()))
+    for conflict in conflicts:
+        warnings.warn(f'LL(1) conflict in {grammar_file}, {conflict}')
+    compiled = compile_table(table)
+    save_snapshot(snapshot, f'{name}.*.pickle', pickle.dumps(compiled, pickle.HIGHEST_PROTOCOL))
+    return compiled
+
+
+def save_snapshot(snapshot: str, stale: str, data: bytes) -> None:
+    """
+    Atomically writes `data` to `snapshot`, after removing the older snapshots matching the glob
+    `stale` in SNAPSHOT_DIRECTORY.
+    """
+    try:
+        os.makedirs(SNAPSHOT_DIRECTORY, exist_ok=True)
+        for path in glob.glob(os.path.join(SNAPSHOT_DIRECTORY, stale)):
+            os.remove(path)
+        temporary = f'{snapshot}.{os.getpid()}'
+        with open(temporary, 'wb') as file:
+            file.write(data)
+        os.replace(temporary, snapshot)
+    except OSError:  # a read only installation builds its snapshots on every start
+        pass
+
+
+COMPILED_TABLE = load_table()
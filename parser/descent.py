@@ -0,0 +1,198 @@
+"""
+Recursive descent engine generated from the compiled parse table: a Python module with one
+function per nonterminal, which the parser runs instead of its table driven loop.
+
+A nonterminal's function picks its production with membership tests on the current terminal,
+then matches terminals, calls the functions of nonterminals and calls the CodeGenerator method
+of every action in grammar order. A production ending in its own nonterminal loops instead of
+recursing, so lists of statements, operands and arguments do not nest calls.
+
+Errors are recovered from as the table driven loop does, with the same messages and parse tree:
+an illegal terminal is skipped and the nonterminal tried again, a synch entry drops the
+nonterminal, a missing terminal is reported and not consumed, and an unexpected EOF raises
+UnexpectedEOF, which every frame passes up after removing the nodes of the symbols it had not
+reached yet, as clear_tree does with the tree stack.
+
+The generated code is compiled once per version of the grammar and kept next to the table
+snapshot.
+"""
+
+import marshal
+import os
+import sys
+import warnings
+from functools import lru_cache
+from typing import Callable, Dict, List
+
+from codegen import codegen
+from codegen.codegen import INPUT_ACTIONS
+from parser.compiled_table import COMPILED_TABLE, SNAPSHOT_DIRECTORY, EMPTY, SYNCH, CompiledTable, save_snapshot, \
+    snapshot_key
+from parser.parse_table import GRAMMAR_FILE
+from scanner.scanner import EOF_TERMINAL
+
+INDENT = '    '
+
+
+class UnexpectedEOF(Exception):
+    """Ends a descent parse at an EOF no production expects."""
+
+
+def function_name(table: CompiledTable, nonterminal: int) -> str:
+    return f'parse_{table.names[nonterminal]}'
+
+
+def action_name(table: CompiledTable, action: int) -> str:
+    return f'action_{table.names[action][1:]}'
+
+
+def condition(terminals: List[int]) -> str:
+    if len(terminals) == 1:
+        return f'terminal == {terminals[0]}'
+    return f"terminal in {{{', '.join(map(str, terminals))}}}"
+
+
+def production_lines(table: CompiledTable, nonterminal: int, production: int, tree: bool,
+                     counters: bool) -> List[str]:
+    """Body of one production, leaving the function or looping back into it when done."""
+    production = table.productions[production]
+    symbols = production.stack[::-1]  # grammar order
+    nodes = dict()  # symbol position by variable of its parse tree node
+    lines = [f'expand({nonterminal}, terminal)'] if counters else []
+    if tree:
+        if production.epsilon:
+            lines.append("add('epsilon', node)")
+        # created last symbol first, as the table driven loop does, so they are drawn in grammar order
+        for position in reversed(range(len(symbols))):
+            if not table.is_action(symbols[position]):
+                nodes[position] = f'n{position}'
+                lines.append(f'n{position} = add({table.names[symbols[position]]!r}, node)')
+
+    tail = len(symbols) > 0 and symbols[-1] == nonterminal
+    for position, symbol in enumerate(symbols):
+        if table.is_action(symbol):
+            argument = 'parser._current_token[1]' if table.names[symbol] in INPUT_ACTIONS else ''
+            lines += ['code.lineno = scanner.lineno', 'try:', f'{INDENT}{action_name(table, symbol)}({argument})',
+                      'except KeyError:', f"{INDENT}warn('Sorry {table.names[symbol]} not implemented yet.')"]
+        elif table.is_terminal(symbol):
+            lines.append(f'match({symbol}, {nodes[position]})' if tree else f'match({symbol})')
+        elif tail and position == len(symbols) - 1:
+            if tree:
+                lines.append(f'node = {nodes[position]}')
+            lines.append('continue')
+        else:
+            call = f'{function_name(table, symbol)}({nodes[position] if tree else ""})'
+            pending = [nodes[later] for later in range(position + 1, len(symbols)) if later in nodes]
+            if not pending:
+                lines.append(call)
+                continue
+            lines += ['try:', INDENT + call, 'except UnexpectedEOF:']
+            lines += [f'{INDENT}remove({node})' for node in pending]
+            lines.append(f'{INDENT}raise')
+    if not tail:
+        lines.append('return')
+    return lines
+
+
+def nonterminal_lines(table: CompiledTable, nonterminal: int, tree: bool, counters: bool) -> List[str]:
+    row = table.rows[nonterminal - table.nonterminals]
+    predictions: Dict[int, List[int]] = dict()  # terminals by the production they predict
+    for terminal, production in enumerate(row):
+        predictions.setdefault(production, []).append(terminal)
+
+    body = ['terminal = parser._terminal']
+    for production, terminals in predictions.items():
+        if production < 0:
+            continue
+        body.append(f'if {condition(terminals)}:')
+        body += [INDENT + line for line in production_lines(table, nonterminal, production, tree, counters)]
+    if SYNCH in predictions:
+        body += [f'if {condition(predictions[SYNCH])}:',
+                 f"{INDENT}handle_synch({nonterminal}, {'node' if tree else 'None'})", f'{INDENT}return']
+    if row[EOF_TERMINAL] == EMPTY:
+        body += [f'if terminal == {EOF_TERMINAL}:', f"{INDENT}unexpected_eof({'node' if tree else ''})"]
+    body.append('handle_empty()')
+
+    return ([f"def {function_name(table, nonterminal)}({'node' if tree else ''}):", f'{INDENT}while True:'] +
+            [INDENT * 2 + line for line in body])
+
+
+def generate_source(table: CompiledTable, tree: bool, counters: bool = False) -> str:
+    """
+    Module defining build(parser, root, end), which returns the parse function of a descent parse
+    for `parser`. With `tree` the parse tree is built under `root`, with `end` as the node of the
+    final '$', otherwise both are None. With `counters` every expansion is counted in the parser's
+    HotPaths.
+    """
+    lines = [
+        f'# generated by {__name__} from the compiled parse table, {"with" if tree else "without"} the parse tree'
+        f'{", counting expansions" if counters else ""}',
+        '',
+        '',
+        'def build(parser, root, end):',
+        '    scanner = parser._scanner',
+        '    code = parser._code',
+        '    advance = parser.advance_input',
+        '    handle_empty = parser.handle_empty',
+        '    handle_synch = parser.handle_synch',
+        '    report_missing = parser.report_missing',
+    ]
+    if tree:
+        lines += [
+            '    add = parser._parse_tree.add',
+            '    rename = parser._parse_tree.rename',
+            '    remove = parser._parse_tree.remove',
+        ]
+    if counters:
+        lines.append('    expand = parser._hot_paths.expand')
+    for action in range(table.actions, len(table.names)):
+        lines.append(f'    {action_name(table, action)} = code.action({table.names[action]!r})')
+
+    lines += ['', '    def unexpected_eof(node):' if tree else '    def unexpected_eof():',
+              '        parser.handle_unexpected_eof()']
+    if tree:
+        lines.append('        remove(node)')
+    lines.append('        raise UnexpectedEOF')
+
+    lines += ['', '    def match(expected, node):' if tree else '    def match(expected):',
+              '        if parser._terminal == expected:']
+    if tree:
+        lines += ['            token = parser._current_token',
+                  "            rename(node, '$' if token[1] == '$' else f'({token[0].value}, {token[1]})')"]
+    lines += ['            advance()', '        else:', '            report_missing(expected)']
+    if tree:
+        lines.append('            remove(node)')
+
+    for nonterminal in range(table.nonterminals, table.actions):
+        lines.append('')
+        lines += [INDENT + line for line in nonterminal_lines(table, nonterminal, tree, counters)]
+
+    lines += ['', '    def parse():', '        try:',
+              f"            {function_name(table, table.start)}({'root' if tree else ''})",
+              f"            match({EOF_TERMINAL}{', end' if tree else ''})",
+              '        except UnexpectedEOF:', '            remove(end)' if tree else '            pass',
+              '', '    return parse', '']
+    return '\n'.join(lines)
+
+
+@lru_cache(maxsize=None)
+def load_engine(tree: bool, counters: bool = False) -> Callable:
+    """
+    The build function of the generated module, compiled from its snapshot if there is one for
+    this version of the grammar, otherwise generated and saved as the new snapshot.
+    """
+    with open(GRAMMAR_FILE, 'rb') as file:
+        grammar = file.read()
+    variant = ('tree' if tree else 'predict') + ('_counted' if counters else '')
+    key = snapshot_key(grammar, __file__, codegen.__file__)  # codegen holds INPUT_ACTIONS
+    # marshal data is only readable by the interpreter version which wrote it
+    snapshot = os.path.join(SNAPSHOT_DIRECTORY, f'descent_{variant}.{key}.{sys.implementation.cache_tag}.marshal')
+    try:
+        with open(snapshot, 'rb') as file:
+            code = marshal.load(file)
+    except (OSError, EOFError, ValueError, TypeError):
+        code = compile(generate_source(COMPILED_TABLE, tree, counters), f'<descent {variant}>', 'exec')
+        save_snapshot(snapshot, f'descent_{variant}.*.marshal', marshal.dumps(code))
+    namespace = {'UnexpectedEOF': UnexpectedEOF, 'warn': warnings.warn}
+    exec(code, namespace)
+    return namespace['build']
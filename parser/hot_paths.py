@@ -0,0 +1,127 @@
+"""
+Hot path counters of a parse: expansions of every nonterminal by lookahead terminal, calls and
+time of every semantic action, and how often each error recovery path ran.
+
+An uninstrumented parser pays nothing for them, instrument binds counting wrappers over the
+parser's and code generator's methods instead of the loops checking a flag, and the descent
+engine runs a variant of its generated functions which counts expansions.
+"""
+
+from collections import Counter, defaultdict
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from parser.compiled_table import COMPILED_TABLE
+
+RECOVERIES = {
+    'handle_empty': 'handle_empty',
+    'handle_synch': 'handle_synch',
+    'report_missing': 'handle_mismatch',  # the part of handle_mismatch both engines run
+    'handle_unexpected_eof': 'handle_unexpected_eof',
+}
+
+
+class HotPaths:
+    def __init__(self) -> None:
+        self._names = COMPILED_TABLE.names
+        self.expansions = Counter()  # (nonterminal, terminal) symbol ids
+        self.action_calls = Counter()  # by action symbol
+        self.action_time = defaultdict(float)  # seconds, by action symbol
+        self.recoveries = Counter()  # by handler name
+
+    def expand(self, nonterminal: int, terminal: int) -> None:
+        self.expansions[nonterminal, terminal] += 1
+
+    def record(self, action_symbol: str, start: float) -> None:
+        self.action_time[action_symbol] += perf_counter() - start
+        self.action_calls[action_symbol] += 1
+
+    def timed(self, action_symbol: str, method: Callable) -> Callable:
+        """`method` of `action_symbol`, counting its calls and time, also those ending in an error."""
+        record = self.record
+
+        def action(*args):
+            start = perf_counter()
+            try:
+                return method(*args)
+            finally:
+                record(action_symbol, start)
+        return action
+
+    def counted(self, name: str, handler: Callable) -> Callable:
+        recoveries = self.recoveries
+
+        def recovery(*args):
+            recoveries[name] += 1
+            return handler(*args)
+        return recovery
+
+    def instrument(self, parser) -> None:
+        """Binds the counting versions of `parser`'s loop steps, recovery handlers and actions."""
+        table = parser._table
+        rows, nonterminals, actions = table.rows, table.nonterminals, table.actions
+        stack, codeparse = parser._stack, parser.codeparse
+
+        def counted_codeparse() -> bool:
+            stack_top, terminal = stack[-1], parser._terminal
+            if stack_top >= nonterminals and rows[stack_top - nonterminals][terminal] >= 0:
+                self.expansions[stack_top, terminal] += 1
+            return codeparse()
+        parser.codeparse = counted_codeparse
+        for method, name in RECOVERIES.items():
+            setattr(parser, method, self.counted(name, getattr(parser, method)))
+
+        code, record = parser._code, self.record
+        execute, generate, action = code.execute, code.generate, code.action
+
+        def counted_execute(number: int, input: str) -> None:
+            start = perf_counter()
+            try:
+                execute(number, input)
+            finally:
+                record(table.names[actions + number], start)
+
+        def counted_generate(action_symbol: str, input: str) -> None:
+            start = perf_counter()
+            try:
+                generate(action_symbol, input)
+            finally:
+                record(action_symbol, start)
+        code.execute, code.generate = counted_execute, counted_generate
+        code.action = lambda action_symbol: self.timed(action_symbol, action(action_symbol))  # for the descent engine
+
+    def rows(self) -> Dict[str, List[Tuple]]:
+        """Report rows by section, the most frequent or, for actions, the slowest first."""
+        names = self._names
+        expansions = sorted(((names[nonterminal], names[terminal], count)
+                             for (nonterminal, terminal), count in self.expansions.items()),
+                            key=lambda row: (-row[2], row[0], row[1]))
+        actions = sorted(((symbol, self.action_calls[symbol], self.action_time[symbol] * 1000)
+                          for symbol in self.action_calls), key=lambda row: (-row[2], row[0]))
+        recoveries = sorted(self.recoveries.items(), key=lambda row: (-row[1], row[0]))
+        return {'expansions': expansions, 'actions': actions, 'recoveries': recoveries}
+
+    def table(self) -> str:
+        headers = {
+            'expansions': ('nonterminal', 'lookahead', 'expansions'),
+            'actions': ('action', 'calls', 'total ms'),
+            'recoveries': ('recovery', 'count'),
+        }
+        sections = []
+        for section, rows in self.rows().items():
+            rows = [tuple(f'{cell:.3f}' if isinstance(cell, float) else str(cell) for cell in row) for row in rows]
+            widths = [max(len(cell) for cell in column) for column in zip(headers[section], *rows)]
+            sections.append('\n'.join('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+                                      for row in [headers[section]] + rows))
+        return '\n\n'.join(sections) + '\n'
+
+    def to_json(self) -> str:
+        import json
+        rows = self.rows()
+        return json.dumps({
+            'expansions': [{'nonterminal': nonterminal, 'lookahead': terminal, 'count': count}
+                           for nonterminal, terminal, count in rows['expansions']],
+            'actions': [{'action': symbol, 'calls': calls, 'milliseconds': round(milliseconds, 6)}
+                        for symbol, calls, milliseconds in rows['actions']],
+            'recoveries': [{'recovery': name, 'count': count} for name, count in rows['recoveries']],
+        }, indent=2)
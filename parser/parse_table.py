@@ -1,249 +1,118 @@
+"""
+LL(1) parse table of the grammar in grammar.txt, built from its FIRST and FOLLOW sets.
+
+Every line of the grammar is a production `A -> X Y ...`, where '' stands for epsilon and
+symbols starting with # are semantic actions, which derive epsilon as far as the table is
+concerned. Rows map terminals to the right hand side to expand, EPSILON, or SYNCHRONOUS for
+the terminals of FOLLOW(A) which have no production of their own.
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Set, Tuple
+
 EPSILON = None
 SYNCHRONOUS = 'synch'
 
-PARSE_TABLE = {
-    'Program': {
-        'break': ('Statements', '#jump_main'),  # Program -> Statements #jump_main
-        'continue': ('Statements', '#jump_main'),
-        'ID': ('Statements', '#jump_main'),
-        'return': ('Statements', '#jump_main'),
-        'global': ('Statements', '#jump_main'),
-        'def': ('Statements', '#jump_main'),
-        'if': ('Statements', '#jump_main'),
-        'while': ('Statements', '#jump_main'),
-        '$': ('Statements', '#jump_main'),
-    },
-    'Statements': {
-        ';': EPSILON,
-        'break': ('Statement', ';', 'Statements'),
-        'continue': ('Statement', ';', 'Statements'),
-        'ID': ('Statement', ';', 'Statements'),
-        'return': ('Statement', ';', 'Statements'),
-        'global': ('Statement', ';', 'Statements'),
-        'def': ('Statement', ';', 'Statements'),
-        'if': ('Statement', ';', 'Statements'),
-        'else': EPSILON,
-        'while': ('Statement', ';', 'Statements'),
-        '$': EPSILON,
-    },
-    'Statement': {
-        ';': SYNCHRONOUS,
-        'break': ('Simple_stmt',),
-        'continue': ('Simple_stmt',),
-        'ID': ('Simple_stmt',),
-        'return': ('Simple_stmt',),
-        'global': ('Simple_stmt',),
-        'def': ('Compound_stmt',),
-        'if': ('Compound_stmt',),
-        'while': ('Compound_stmt',),
-    },
-    'Simple_stmt': {
-        ';': SYNCHRONOUS,
-        'break': ('break', '#break'),  # Simple_stmt -> break #break
-        'continue': ('continue', '#continue'),  # Simple_stmt -> continue #continue
-        'ID': ('Assignment_Call',),
-        'return': ('Return_stmt',),
-        'global': ('Global_stmt',),
-    },
-    'Compound_stmt': {
-        ';': SYNCHRONOUS,
-        'def': ('Function_def',),  # Compound_stmt -> Function_def
-        'if': ('If_stmt',),
-        'while': ('Iteration_stmt',),
-    },
-    'Assignment_Call': {
-        ';': SYNCHRONOUS,
-        'ID': ('#psym', 'ID', 'B'),  # Assignment_Call -> #psym ID #var_def_finish B
-    },
-    'B': {
-        ';': SYNCHRONOUS,
-        '=': ('#add_sym', '=', 'C', '#check_void', '#assign'),  # B -> #add_sym = C #check_void #assign
-        '[': ('#check_sym', '[', 'Expression', '#index', ']', '=', 'C', '#check_void', '#assign'),  # B -> #check_sym [ Expression #index ] = C #check_void #assign
-        '(': ('#check_sym', '#func_call_start', '(', 'Arguments', ')', '#func_call_finish', '#pop'),
-        # B -> #check_sym #func_call_start ( Arguments ) #func_call_finish #pop
-    },
-    'C': {
-        ';': SYNCHRONOUS,
-        'ID': ('Expression',),
-        '[': ('#arr_init', '[', 'Expression', '#parr', 'List_Rest', ']', '#arr_len'),
-        # C -> #arr_init [ Expression #parr List_Rest ] #arr_len
-        'NUM': ('Expression',),
-    },
-    'List_Rest': {
-        ']': EPSILON,
-        ',': (',', 'Expression', '#parr', 'List_Rest'),  # List_Rest -> , Expression #parr List_Rest
-    },
-    'Return_stmt': {
-        ';': SYNCHRONOUS,
-        'return': ('return', 'Return_Value', '#func_def_finish'),  # Return_stmt -> return Return_Value #func_def_finish
-    },
-    'Return_Value': {
-        ';': (EPSILON, '#push_zero'),  # Return_Value -> '' #push_zero
-        'ID': ('Expression', '#has_return_value'), # Return_Value -> Expression #has_return_value
-        'NUM': ('Expression', '#has_return_value'), # Return_Value -> Expression #has_return_value
-    },
-    'Global_stmt': {
-        ';': SYNCHRONOUS,
-        'global': ('global', '#global', 'ID'), # Global_stmt -> global #global ID
-    },
-    'Function_def': {
-        ';': SYNCHRONOUS,
-        'def': ('def', '#pfunc', 'ID', '#save_func', '#set_func_start', '(', 'Params', ')', '#func_def_start', ':',
-                'Statements', '#push_zero', '#func_def_finish', '#pop_func_address', '#check_func'),
-        # Function_def -> def #pfunc ID #save_func #set_func_start ( Params ) #func_def_start : Statements #push_zero #func_def_finish #pop_func_address #check_func
-    },
-    'Params': {
-        'ID': ('#pparam', 'ID', 'Params_Prime'),  # Params -> #pparam ID Params_Prime
-        ')': EPSILON,
-    },
-    'Params_Prime': {
-        ')': EPSILON,
-        ',': (',', '#pparam', 'ID', 'Params_Prime'),  # Params -> #pparam ID Params_Prime
-    },
-    'If_stmt': {
-        ';': SYNCHRONOUS,
-        'if': ('if', 'Relational_Expression', '#save', ':', 'Statements', 'Else_block'),
-        # If_stmt -> if Relational_Expression #save : Statements Else_block
-    },
-    'Else_block': {
-        ';': (EPSILON, '#jpf'),  # Else_block -> '' #jpf
-        'else': ('else', ':', '#jpf_save', 'Statements', '#jp'),  # Else_block -> else : #jpf_save Statements #jp
-    },
-    'Iteration_stmt': {
-        ';': SYNCHRONOUS,
-        'while': ('while', '#label', '(', 'Relational_Expression', ')', '#save', 'Statements', '#while'),
-        # Iteration_stmt -> while #label ( Relational_Expression ) #save Statements #while
-    },
-    'Relational_Expression': {
-        'ID': ('Expression', '#check_void', '#comp_op', 'Relop', 'Expression', '#check_void', '#comp'),
-        # Relational_Expression -> Expression #check_void #comp_op Relop #check_void Expression #comp
-        ')': SYNCHRONOUS,
-        ':': SYNCHRONOUS,
-        'NUM': ('Expression', '#comp_op', 'Relop', 'Expression', '#comp'),
-        # Relational_Expression -> Expression #comp_op Relop Expression #comp
-    },
-    'Relop': {
-        'ID': SYNCHRONOUS,
-        '==': ('==',),
-        '<': ('<',),
-        'NUM': SYNCHRONOUS,
-    },
-    'Expression': {
-        ';': SYNCHRONOUS,
-        'ID': ('Term', 'Expression_Prime'),
-        ']': SYNCHRONOUS,
-        ')': SYNCHRONOUS,
-        ',': SYNCHRONOUS,
-        ':': SYNCHRONOUS,
-        '==': SYNCHRONOUS,
-        '<': SYNCHRONOUS,
-        'NUM': ('Term', 'Expression_Prime'),
-    },
-    'Expression_Prime': {
-        ';': EPSILON,
-        ']': EPSILON,
-        ')': EPSILON,
-        ',': EPSILON,
-        ':': EPSILON,
-        '==': EPSILON,
-        '<': EPSILON,
-        '+': ('+', '#check_void', 'Term', '#check_void', '#add', 'Expression_Prime'),  # Expression_Prime -> + #check_void Term #check_void #add Expression_Prime
-        '-': ('-', '#check_void', 'Term', '#check_void', '#sub', 'Expression_Prime'),  # Expression_Prime -> - #check_void Term #check_void #sub Expression_Prime
-    },
-    'Term': {
-        ';': SYNCHRONOUS,
-        'ID': ('Factor', 'Term_Prime'),
-        ']': SYNCHRONOUS,
-        ')': SYNCHRONOUS,
-        ',': SYNCHRONOUS,
-        ':': SYNCHRONOUS,
-        '==': SYNCHRONOUS,
-        '<': SYNCHRONOUS,
-        '+': SYNCHRONOUS,
-        '-': SYNCHRONOUS,
-        'NUM': ('Factor', 'Term_Prime'),
-    },
-    'Term_Prime': {
-        ';': EPSILON,
-        ']': EPSILON,
-        ')': EPSILON,
-        ',': EPSILON,
-        ':': EPSILON,
-        '==': EPSILON,
-        '<': EPSILON,
-        '+': EPSILON,
-        '-': EPSILON,
-        '*': ('*', '#check_void', 'Factor', '#check_void', '#mult', 'Term_Prime'),  # Term_Prime -> * #check_void Factor #check_void #mult Term_Prime
-    },
-    'Factor': {
-        ';': SYNCHRONOUS,
-        'ID': ('Atom', 'Power'),
-        ']': SYNCHRONOUS,
-        ')': SYNCHRONOUS,
-        ',': SYNCHRONOUS,
-        ':': SYNCHRONOUS,
-        '==': SYNCHRONOUS,
-        '<': SYNCHRONOUS,
-        '+': SYNCHRONOUS,
-        '-': SYNCHRONOUS,
-        '*': SYNCHRONOUS,
-        'NUM': ('Atom', 'Power'),
-    },
-    'Power': {
-        ';': ('Primary',),
-        '[': ('Primary',),
-        ']': ('Primary',),
-        '(': ('Primary',),
-        ')': ('Primary',),
-        ',': ('Primary',),
-        ':': ('Primary',),
-        '==': ('Primary',),
-        '<': ('Primary',),
-        '+': ('Primary',),
-        '-': ('Primary',),
-        '*': ('Primary',),
-        '**': ('**', '#check_void', 'Factor', '#check_void', '#power'),  # Power -> ** #check_void Factor #power
-    },
-    'Primary': {
-        ';': EPSILON,
-        '[': ('[', 'Expression', '#index', ']', 'Primary'),  # Primary -> [ Expression #index ] Primary
-        ']': EPSILON,
-        '(': ('#func_call_start', '(', 'Arguments', ')', '#func_call_finish', 'Primary'),
-        # Primary -> #func_call_start ( Arguments ) #func_call_finish Primary
-        ')': EPSILON,
-        ',': EPSILON,
-        ':': EPSILON,
-        '==': EPSILON,
-        '<': EPSILON,
-        '+': EPSILON,
-        '-': EPSILON,
-        '*': EPSILON,
-    },
-    'Arguments': {
-        'ID': ('Expression', '#add_arg', 'Arguments_Prime'),  # Arguments -> Expression #add_arg Arguments_Prime
-        ')': EPSILON,
-        'NUM': ('Expression', '#add_arg', 'Arguments_Prime'),  # Arguments -> Expression #add_arg Arguments_Prime
-    },
-    'Arguments_Prime': {
-        ')': EPSILON,
-        ',': (',', 'Expression', '#add_arg', 'Arguments_Prime'),
-        # Arguments_Prime -> , Expression #add_arg Arguments_Prime
-    },
-    'Atom': {
-        ';': SYNCHRONOUS,
-        'ID': ('#pid', 'ID'),  # Atom -> #pid ID
-        '[': SYNCHRONOUS,
-        ']': SYNCHRONOUS,
-        '(': SYNCHRONOUS,
-        ')': SYNCHRONOUS,
-        ',': SYNCHRONOUS,
-        ':': SYNCHRONOUS,
-        '==': SYNCHRONOUS,
-        '<': SYNCHRONOUS,
-        '+': SYNCHRONOUS,
-        '-': SYNCHRONOUS,
-        '*': SYNCHRONOUS,
-        '**': SYNCHRONOUS,
-        'NUM': ('#pnum', 'NUM'),  # Atom -> #pnum NUM
-    },
-}
+GRAMMAR_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'grammar.txt')
+EMPTY_STRING = "''"
+END = '$'
+
+
+class Grammar(NamedTuple):
+    nonterminals: List[str]  # in order of appearance, the first one is the start symbol
+    productions: List[Tuple[str, Tuple[str, ...]]]
+
+
+def is_action(symbol: str) -> bool:
+    return symbol.startswith('#')
+
+
+def read_grammar(text: str) -> Grammar:
+    productions = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        head, arrow, body = line.partition('->')
+        if not arrow:
+            raise ValueError(f'not a production: {line!r}')
+        productions.append((head.strip(), tuple(body.split())))
+    nonterminals = list(dict.fromkeys(head for head, _ in productions))
+    return Grammar(nonterminals, productions)
+
+
+def first_of(symbols: Tuple[str, ...], first: Dict[str, Set[str]]) -> Set[str]:
+    """FIRST of a sequence of symbols, holding EMPTY_STRING if all of them derive epsilon."""
+    result = set()
+    for symbol in symbols:
+        if symbol == EMPTY_STRING or is_action(symbol):
+            continue
+        if symbol not in first:  # a terminal
+            result.add(symbol)
+            return result
+        result |= first[symbol] - {EMPTY_STRING}
+        if EMPTY_STRING not in first[symbol]:
+            return result
+    result.add(EMPTY_STRING)
+    return result
+
+
+def first_sets(grammar: Grammar) -> Dict[str, Set[str]]:
+    first = {nonterminal: set() for nonterminal in grammar.nonterminals}
+    changed = True
+    while changed:
+        changed = False
+        for head, body in grammar.productions:
+            size = len(first[head])
+            first[head] |= first_of(body, first)
+            changed |= len(first[head]) != size
+    return first
+
+
+def follow_sets(grammar: Grammar, first: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+    follow = {nonterminal: set() for nonterminal in grammar.nonterminals}
+    follow[grammar.nonterminals[0]].add(END)
+    changed = True
+    while changed:
+        changed = False
+        for head, body in grammar.productions:
+            for index, symbol in enumerate(body):
+                if symbol not in follow:
+                    continue
+                size = len(follow[symbol])
+                rest = first_of(body[index + 1:], first)
+                follow[symbol] |= rest - {EMPTY_STRING}
+                if EMPTY_STRING in rest:
+                    follow[symbol] |= follow[head]
+                changed |= len(follow[symbol]) != size
+    return follow
+
+
+def table_entry(body: Tuple[str, ...]):
+    """Right hand side as the parser expects it, with EPSILON for ''."""
+    if body == (EMPTY_STRING,):
+        return EPSILON
+    return tuple(EPSILON if symbol == EMPTY_STRING else symbol for symbol in body)
+
+
+def build_parse_table(grammar: Grammar) -> Tuple[Dict[str, Dict[str, tuple]], List[str]]:
+    """The parse table and its conflicts, where the production listed first in the grammar is kept."""
+    first = first_sets(grammar)
+    follow = follow_sets(grammar, first)
+    table = {nonterminal: dict() for nonterminal in grammar.nonterminals}
+    conflicts = []
+    for head, body in grammar.productions:
+        predict = first_of(body, first)
+        if EMPTY_STRING in predict:
+            predict = (predict - {EMPTY_STRING}) | follow[head]
+        entry = table_entry(body)
+        for terminal in sorted(predict):
+            row = table[head]
+            if terminal in row and row[terminal] != entry:
+                conflicts.append(f'{head} on {terminal}: {row[terminal]} and {entry}')
+                continue
+            row[terminal] = entry
+    for nonterminal in grammar.nonterminals:
+        for terminal in sorted(follow[nonterminal]):
+            table[nonterminal].setdefault(terminal, SYNCHRONOUS)
+    return table, conflicts
+
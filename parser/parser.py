@@ -1,27 +1,85 @@
+import sys
 from collections import deque, defaultdict
-from pprint import pprint
-
-from anytree import Node, RenderTree
+from typing import Collection, Dict, Iterable, Iterator, List, Union
 
 from codegen.codegen import CodeGenerator
-from parser.parse_table import PARSE_TABLE, SYNCHRONOUS
+from codegen.peephole import PASSES
+from parser.compiled_table import COMPILED_TABLE, EMPTY, SYNCH
+from parser.hot_paths import HotPaths
 from parser.symbol_table import SymbolTable
-from scanner.scanner import Scanner, TokenType
-from utils.file_handler import write_all
+from parser.tree import ParseTree
+from scanner.dfa import TableScanner
+from scanner.parallel import ParallelScanner
+from scanner.regex import RegexScanner
+from scanner.scanner import EOF_TERMINAL, Scanner, TokenType
+from utils.file_handler import ArtifactWriter, join_lines
+
+SCANNERS = {
+    'reference': Scanner,  # the hand written DFA, kept to check the other modes against
+    'table': TableScanner,
+    'regex': RegexScanner,  # falls back to the table DFA for errors and buffer edges
+    'parallel': ParallelScanner,  # table DFA over chunks of the input in a process pool
+}
+
+PROFILES = {
+    'full': ('tokens', 'lexical_errors', 'symbol_table_old', 'symbol_table', 'parse_tree', 'syntax_errors',
+             'output', 'semantic_errors'),
+    'codegen': ('lexical_errors', 'syntax_errors', 'output', 'semantic_errors'),  # no parse tree is built
+    'diagnostics': (),  # no files at all, the results are read off the parser, see driver.compile_source
+}
+
+ENGINES = ('table', 'descent')  # descent runs the recursive descent functions generated by parser.descent
+
+# nesting depth of the descent functions, a level of blocks or calls in the source takes a handful of frames
+RECURSION_LIMIT = 10_000
 
 
 class Parser:
-    def __init__(self):
-        self._symbol_table = SymbolTable()
-        self._code = CodeGenerator(self._symbol_table)
-        self._scanner = Scanner()
-        self._parse_table = PARSE_TABLE
-        self._stack = deque(['$', 'Program'])
-        self._root = Node('Program')
-        self._tree = deque([Node('$', parent=self._root), self._root])
+    def __init__(self, scanner_mode: str = 'table', writer: ArtifactWriter = None, profile: str = 'full',
+                 engine: str = 'table', hot_paths: HotPaths = None, source: Union[str, Iterable[str]] = None,
+                 passes: Collection[str] = PASSES):
+        if engine not in ENGINES:
+            raise ValueError(f'unknown parser engine {engine!r}')
+        if set(passes) - set(PASSES):
+            raise ValueError(f'unknown peephole passes {sorted(set(passes) - set(PASSES))}')
+        self._engine = engine
+        self._writer = writer or ArtifactWriter()
+        self._artifacts = PROFILES[profile]
+        self._symbol_table = SymbolTable(archive='symbol_table' in self._artifacts)  # else killed blocks are dropped
+        self._code = CodeGenerator(self._symbol_table, passes)
+        if isinstance(source, str):
+            source = [source]
+        self._scanner = SCANNERS[scanner_mode](None if source is None else iter(source), writer=self._writer,
+                                               artifacts=self._artifacts)  # input.txt without a source
+        self._table = COMPILED_TABLE
+        self._code.bind(self._table.names[self._table.actions:])
+        self._stack = [EOF_TERMINAL, self._table.start]
+        if 'parse_tree' in self._artifacts:
+            self._parse_tree = ParseTree()
+            root = self._parse_tree.add(self._table.names[self._table.start])
+            self._tree = deque([self._parse_tree.add('$', root), root])
+        else:
+            self._parse_tree = self._tree = None
+            self.codeparse = self.predict
         self._current_token = None
+        self._terminal = None
         self._errors = defaultdict(list)
-        
+        self._hot_paths = hot_paths
+        if hot_paths is not None:  # counting versions of the methods, the loops themselves stay unchanged
+            hot_paths.instrument(self)
+
+    @property
+    def scanner(self) -> Scanner:
+        return self._scanner
+
+    @property
+    def code_generator(self) -> CodeGenerator:
+        return self._code
+
+    @property
+    def syntax_errors(self) -> Dict[int, List[str]]:
+        """Messages by line number, in the order they were found."""
+        return self._errors
 
     @property
     def lineno(self):
@@ -29,10 +87,7 @@ class Parser:
 
     @property
     def terminal(self):
-        if self._current_token[0] in [TokenType.ID, TokenType.NUMBER]:
-            return self._current_token[0].value
-        else:
-            return self._current_token[1]
+        return self._table.names[self._terminal]
 
     @property
     def lexeme(self):
@@ -40,81 +95,127 @@ class Parser:
 
     def parse(self):
         self.advance_input()
-        _continue = True
-        while self._stack and _continue:
-            if self._stack[-1].startswith('#'):  # TODO comments which start with #
-                self.codegen()
-            else:
-                _continue = self.codeparse()
-
-        write_all(filename='symbol_table', string=str(self._symbol_table))
-        write_all(filename='parse_tree', string=str(RenderTree(self._root, childiter=reversed).by_attr()))
-        write_all(filename='syntax_errors', string=self.errors_to_string())
-        write_all(filename='output', string=self._code.get_program_block())
-        write_all(filename='semantic_errors', string=self._code.get_semantic_errors())
+        if self._engine == 'descent':
+            self.descend()
+        else:
+            stack, actions = self._stack, self._table.actions
+            _continue = True
+            while stack and _continue:
+                if stack[-1] >= actions:
+                    self.codegen()
+                else:
+                    _continue = self.codeparse()
+        self._code.optimize()
+
+        artifacts = {
+            'symbol_table': self._symbol_table.lines,
+            'parse_tree': self.parse_tree_lines,
+            'syntax_errors': self.errors_lines,
+            'output': self._code.program_block_lines,
+            'semantic_errors': self._code.semantic_errors_lines,
+        }
+        for name, lines in artifacts.items():
+            if name in self._artifacts:
+                self._writer.write(name, lines())
 
     def advance_input(self):
-        self._current_token = self._scanner.get_next_token()
-        if self._current_token[0] in [TokenType.WHITESPACE, TokenType.COMMENT]:
-            self.advance_input()
+        scanner = self._scanner
+        self._current_token = scanner.get_next_token()
+        while scanner.terminal is None:  # whitespace and comments
+            self._current_token = scanner.get_next_token()
+        self._terminal = scanner.terminal
+
+    def descend(self) -> None:
+        """The parse loop's work done by the generated recursive descent functions."""
+        root = end = None
+        if self._tree is not None:
+            end, root = self._tree
+            self._tree = None  # the generated functions track the nodes still to be reached themselves
+        from parser.descent import load_engine  # generating or loading the engines is left to the parses using them
+        parse = load_engine(tree=root is not None, counters=self._hot_paths is not None)(self, root, end)
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+        try:
+            parse()
+        finally:
+            sys.setrecursionlimit(limit)
 
     def codegen(self) -> None:
-        action_symbol = self._stack.pop()
-        # print(self.lineno, action_symbol)
-        # pprint(self._code.get_status())
-        # print(f'{"--":-^48}')
+        action = self._stack.pop()
         self._code.lineno = self.lineno # not clean
-        self._code.generate(action_symbol=action_symbol, input=self.lexeme)
+        self._code.execute(action - self._table.actions, self._current_token[1])
 
     def codeparse(self) -> bool:
         stack_top = self._stack[-1]
         tree_top = self._tree[-1]
-        if stack_top in self._parse_table.keys():
-            if self.terminal not in self._parse_table[stack_top].keys():  # empty (1)
-                if self.terminal == TokenType.EOF.value and stack_top != TokenType.EOF.value:
+        table = self._table
+        if stack_top >= table.nonterminals:
+            production = table.rows[stack_top - table.nonterminals][self._terminal]
+            if production == EMPTY:  # empty (1)
+                if self._terminal == EOF_TERMINAL and stack_top != EOF_TERMINAL:
                     self.handle_unexpected_eof()
                     return False
                 self.handle_empty()
                 return True
 
-            grammar = self._parse_table[stack_top][self.terminal]
             self.pop_stacks()
-
-            if grammar and len(grammar) > 1 and not grammar[0]:  # (EPSILON, #action) situations
-                Node('epsilon', parent=tree_top)
-                grammar = tuple(filter(lambda x: x, grammar))
-
-            if grammar == SYNCHRONOUS:  # synch (2)
+            if production == SYNCH:  # synch (2)
                 self.handle_synch(stack_top, tree_top)
-            elif not grammar:
-                Node('epsilon', parent=tree_top)
-            else:  # Non-Terminal match
-                self.handle_non_terminal(tree_top, grammar)
+                return True
+            production = table.productions[production]
+            if production.epsilon:
+                self._parse_tree.add('epsilon', tree_top)
+            self._stack.extend(production.stack)
+            self._tree.extend([self._parse_tree.add(child, tree_top) for child in production.children])
         else:
-            if stack_top != self.terminal:  # mismatch (3)
+            if stack_top != self._terminal:  # mismatch (3)
                 self.handle_mismatch()
             else:  # Terminal match
-                tree_top.name = '$' if self._current_token[1] == TokenType.EOF.value else \
-                    f'({self._current_token[0].value}, {self._current_token[1]})'
+                self._parse_tree.rename(tree_top, '$' if self._current_token[1] == TokenType.EOF.value else
+                                        f'({self._current_token[0].value}, {self._current_token[1]})')
                 self.pop_stacks()
                 self.advance_input()
         return True
 
+    def predict(self) -> bool:
+        """
+        codeparse without the parse tree: the same decisions and errors, driven by the
+        prediction stack alone.
+        """
+        stack = self._stack
+        stack_top = stack[-1]
+        table = self._table
+        if stack_top >= table.nonterminals:
+            production = table.rows[stack_top - table.nonterminals][self._terminal]
+            if production == EMPTY:  # empty (1)
+                if self._terminal == EOF_TERMINAL and stack_top != EOF_TERMINAL:
+                    self.handle_unexpected_eof()
+                    return False
+                self.handle_empty()
+                return True
+
+            stack.pop()
+            if production == SYNCH:  # synch (2)
+                self.handle_synch(stack_top, None)
+            else:
+                stack.extend(table.productions[production].stack)
+        elif stack_top != self._terminal:  # mismatch (3)
+            self.handle_mismatch()
+        else:  # Terminal match
+            stack.pop()
+            self.advance_input()
+        return True
+
     def pop_stacks(self):
         self._stack.pop()
-        self._tree.pop()
-
-    def handle_non_terminal(self, tree_top, grammar):
-        grammar_reversed = grammar[::-1]
-        children = [Node(child, parent=tree_top)
-                    for child in grammar_reversed if not child.startswith('#')]
-        self._stack.extend(grammar_reversed)
-        self._tree.extend(children)
+        if self._tree is not None:
+            self._tree.pop()
 
     def handle_unexpected_eof(self):
         self._errors[self.lineno].append(
             f'#{self.lineno} : syntax error, Unexpected EOF')
-        self.clear_tree()
+        if self._tree is not None:
+            self.clear_tree()
 
     def handle_empty(self):
         self._errors[self.lineno].append(
@@ -122,33 +223,31 @@ class Parser:
         self.advance_input()
 
     def handle_synch(self, stack_top, node):
-        self.remove_node(node)
+        if node is not None:
+            self._parse_tree.remove(node)
         self._errors[self.lineno].append(
-            f'#{self.lineno} : syntax error, missing {stack_top} on line {self.lineno}')
+            f'#{self.lineno} : syntax error, missing {self._table.names[stack_top]} on line {self.lineno}')
 
     def handle_mismatch(self):
-        self._errors[self.lineno].append(
-            f'#{self.lineno} : syntax error, missing {self._stack[-1]}')
-        self.remove_node(self._tree[-1])
+        self.report_missing(self._stack[-1])
+        if self._tree is not None:
+            self._parse_tree.remove(self._tree[-1])
         self.pop_stacks()
 
-    @staticmethod
-    def remove_node(node):
-        parent = node.parent
-        children = list(parent.children)
-        children.remove(node)
-        parent.children = children
+    def report_missing(self, terminal: int):
+        self._errors[self.lineno].append(
+            f'#{self.lineno} : syntax error, missing {self._table.names[terminal]}')
 
     def clear_tree(self):
         while len(self._tree) > 0:
-            self.remove_node(self._tree[-1])
-            self._tree.pop()
+            self._parse_tree.remove(self._tree.pop())
+
+    def parse_tree_lines(self) -> Iterator[str]:
+        return join_lines(self._parse_tree.render())
 
-    def errors_to_string(self):
+    def errors_lines(self) -> Iterator[str]:
         if len(self._errors) == 0:
-            return 'There is no syntax error.'
-        result = ''
+            yield 'There is no syntax error.'
         for _, value in self._errors.items():
             for item in value:
-                result += f'{item}\n'
-        return result
+                yield f'{item}\n'
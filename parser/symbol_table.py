@@ -1,9 +1,14 @@
-from ast import arg
-from collections import deque
-from typing import Iterator, List
+from bisect import bisect_left, insort
+from collections import defaultdict, deque
+from itertools import chain
+from operator import attrgetter
+from typing import Callable, Iterator, List
 
 
 class Symbol:
+    __slots__ = ('lexeme', 'address', 'category', 'args_cells', 'type', 'line', 'pb_line', 'scope', 'alive',
+                 'has_return_value')
+
     def __init__(
             self,
             lexeme: str = '',
@@ -29,11 +34,89 @@ class Symbol:
                f'{self.args_cells:<10} {self.type:<10} {self.line:<10} {self.alive:<10} {self.scope:<10} {self.has_return_value:<10}'
 
 
+def discard(symbols: List[Symbol], symbol: Symbol) -> None:
+    if symbols[-1] is symbol:  # blocks are killed and overloads removed newest first
+        symbols.pop()
+    else:
+        symbols.remove(symbol)
+
+
+class FunctionRegistry:
+    """
+    Live functions by lexeme, in declaration order, which gives the arities a call can resolve to,
+    and live symbols by signature, (lexeme, args_cells), in declaration order. Signatures cover
+    every symbol and not only functions, since a function is checked for duplicates against the
+    parameters and variables of its name and arity too. A symbol's args_cells are changed through
+    `resize` for it to stay indexed under its signature.
+    """
+
+    def __init__(self) -> None:
+        self._functions = defaultdict(list)
+        self._signatures = defaultdict(list)
+
+    def add(self, symbol: Symbol) -> None:
+        insort(self._signatures[symbol.lexeme, symbol.args_cells], symbol, key=attrgetter('address'))
+        if symbol.category == 'func':
+            insort(self._functions[symbol.lexeme], symbol, key=attrgetter('address'))
+
+    def remove(self, symbol: Symbol) -> None:
+        self._drop(self._signatures, (symbol.lexeme, symbol.args_cells), symbol)
+        if symbol.category == 'func':
+            self._drop(self._functions, symbol.lexeme, symbol)
+
+    def resize(self, symbol: Symbol, args_cells: int) -> None:
+        self._drop(self._signatures, (symbol.lexeme, symbol.args_cells), symbol)
+        symbol.args_cells = args_cells
+        insort(self._signatures[symbol.lexeme, args_cells], symbol, key=attrgetter('address'))
+
+    def functions(self, lexeme: str) -> List[Symbol]:
+        return self._functions.get(lexeme, [])
+
+    def function(self, lexeme: str, args_cells: int) -> Symbol:
+        """The newest live function of the signature."""
+        for symbol in reversed(self._signatures.get((lexeme, args_cells), ())):
+            if symbol.category == 'func':
+                return symbol
+        return None
+
+    def is_unique(self, symbol: Symbol) -> bool:
+        """Whether no other live symbol has the signature of `symbol`, a live one."""
+        return len(self._signatures[symbol.lexeme, symbol.args_cells]) == 1
+
+    @staticmethod
+    def _drop(index: dict, key, symbol: Symbol) -> None:
+        symbols = index[key]
+        discard(symbols, symbol)
+        if not symbols:  # signatures come and go with every parameter counted
+            del index[key]
+
+
 class SymbolTable:
-    def __init__(self, start_address: int = 100, step: int = 4) -> None:
+    """
+    Live symbols in declaration order, with indexes of them: a stack by lexeme, innermost
+    declaration last, a stack by category, whose func stack's top is the current function, a dict
+    by address and the FunctionRegistry resolving calls. Addresses grow with the declaration
+    order, so they also tell which of two symbols is newer and, short of the few removed ones,
+    which addresses are listed at all.
+
+    A killed block is moved out of the live structures into a frame of its own, kept in
+    declaration order for the symbol_table listing only. Without `archive` the frames are dropped,
+    and the table holds no more than the symbols in scope.
+    """
+
+    def __init__(self, start_address: int = 100, step: int = 4, archive: bool = True) -> None:
+        self._registry = FunctionRegistry()
+        self._start_address = start_address
         self._current_address = start_address
         self._step = step
-        self._symbols = list()
+        self._archive = archive
+        self._count = 0  # symbols listed, live or killed
+        self._alive = list()  # a block is killed off its end
+        self._lexemes = defaultdict(list)
+        self._categories = defaultdict(list)
+        self._addresses = dict()
+        self._frames = list()  # killed blocks, in declaration order within each
+        self._removed = set()  # addresses of the overloading functions and parameters taken off the listing
         self._scope_stack = deque()
         self.def_output()
 
@@ -42,16 +125,26 @@ class SymbolTable:
 
     @property
     def alive_symbols(self) -> Iterator[Symbol]:
-        return filter(lambda s: s.alive, reversed(self._symbols))
+        return reversed(self._alive)
+
+    @property
+    def current_function(self) -> Symbol:
+        functions = self._categories['func']
+        return functions[-1] if functions else None
 
     def get_symbol(self, lexeme: str = None, addr: int = None, category: str = None) -> Symbol:
-        for symbol in self.alive_symbols:
-            if symbol.lexeme == lexeme:
-                return symbol
-            elif symbol.address == addr:
-                return symbol
-            elif symbol.category == category:
-                return symbol
+        """The newest live symbol with the lexeme, the address or the category."""
+        newest = None
+        symbols = self._lexemes.get(lexeme)
+        if symbols:
+            newest = symbols[-1]
+        symbol = self._addresses.get(addr)
+        if symbol is not None and (newest is None or symbol.address > newest.address):
+            newest = symbol
+        symbols = self._categories.get(category)
+        if symbols and (newest is None or symbols[-1].address > newest.address):
+            newest = symbols[-1]
+        return newest
 
     def find_addr(self, lexeme: str = '') -> int:
         symbol = self.get_symbol(lexeme=lexeme)
@@ -75,30 +168,53 @@ class SymbolTable:
         if force or not symbol:
             symbol = Symbol(lexeme, self.get_address(), _type=_type, line=line, category=category,
                             scope=len(self._scope_stack))
-            self._symbols.append(symbol)
+            self._count += 1
+            self._alive.append(symbol)
+            self._lexemes[lexeme].append(symbol)
+            self._categories[category].append(symbol)
+            self._addresses[symbol.address] = symbol
+            self._registry.add(symbol)
             return symbol
 
     def set_pb_line(self, line: int) -> None:
-        self._symbols[-1].pb_line = line
+        """Sets the program block line of the newest listed symbol."""
+        if not self._count:
+            raise IndexError('no symbol is listed')
+        address = self._current_address - self._step
+        while address in self._removed:
+            address -= self._step
+        symbol = self._addresses.get(address) or self._archived(address)
+        if symbol is not None:  # a dropped frame is listed nowhere
+            symbol.pb_line = line
+
+    def move_pb_lines(self, move: Callable[[int], int]) -> None:
+        """Moves the program block line of every listed symbol to `move` of it, once the code is rearranged."""
+        for symbol in chain(chain.from_iterable(self._frames), self._alive):
+            symbol.pb_line = move(symbol.pb_line)
 
     def set_category(self, lexeme: str = None, addr: int = None, category: str = 'var'):
         symbol = self.get_symbol(lexeme=lexeme, addr=addr)
+        if symbol:
+            self._categories[symbol.category].remove(symbol)
+            insort(self._categories[category], symbol, key=attrgetter('address'))
+            self._registry.remove(symbol)
         symbol.category = category if symbol else None
+        self._registry.add(symbol)
 
     def set_args_cells(self, lexeme: str = None, addr: int = None, count: int = 0):
         symbol = self.get_symbol(lexeme=lexeme, addr=addr)
-        symbol.args_cells = count if symbol else None
+        self._registry.resize(symbol, count)
 
     def get_pb_line(self, lexeme: str = None, addr: int = None) -> int:
         symbol = self.get_symbol(lexeme=lexeme, addr=addr)
         return symbol.pb_line if symbol else None
 
     def inc_args(self):
-        symbol = self.get_symbol(category='func')
-        symbol.args_cells += 1
+        symbol = self.current_function
+        self._registry.resize(symbol, symbol.args_cells + 1)
 
     def set_has_return_value(self) -> None:
-        symbol = self.get_symbol(category='func')
+        symbol = self.current_function
         symbol.has_return_value = True
 
     def get_has_return_value(self, addr: int) -> bool:
@@ -106,67 +222,108 @@ class SymbolTable:
         return symbol.has_return_value if symbol else None
 
     def get_func_address(self, lexeme: str, args_count:int) -> int:
-        for symbol in self.alive_symbols:
-            if symbol.lexeme == lexeme and symbol.args_cells == args_count and symbol.category == 'func':
-                return symbol.address
-        return None
+        symbol = self._registry.function(lexeme, args_count)
+        return symbol.address if symbol else None
     
     def get_first_func_address(self, lexeme: str) -> int:
         # returns address of first function defined with given lexeme
-        matched_symbols = list(filter(lambda symbol: symbol.lexeme == lexeme and symbol.category == 'func', self.alive_symbols))
-        return matched_symbols[-1].address if matched_symbols else None
+        functions = self._registry.functions(lexeme)
+        return functions[0].address if functions else None
         
     def get_func_args_count(self, lexeme: str = None, addr: str = None) -> List[int]:
         possible_args_count = list()
         if lexeme:
-            for symbol in self.alive_symbols:
-                if symbol.lexeme == lexeme and symbol.category == 'func':
-                    possible_args_count.append(symbol.args_cells)
+            possible_args_count.extend(symbol.args_cells for symbol in reversed(self._registry.functions(lexeme)))
         elif addr:
             symbol = self.get_symbol(addr=int(addr))
             possible_args_count.append(symbol.args_cells) if symbol else None
         else:
-            symbol = self.get_symbol(category='func')
+            symbol = self.current_function
             possible_args_count.append(symbol.args_cells) if symbol else None
 
         return possible_args_count
 
+    def has_func_args_count(self, lexeme: str, args_count: int) -> bool:
+        """Whether `args_count` is in get_func_args_count(lexeme=lexeme), without listing every arity."""
+        if lexeme:
+            return self._registry.function(lexeme, args_count) is not None
+        return args_count in self.get_func_args_count(lexeme=lexeme)
+
     def is_last_func_valid(self) -> bool:
-        last_func = self.get_symbol(category='func')
-        for symbol in self.alive_symbols:
-            if last_func.address == symbol.address:
-                continue
-            elif last_func.lexeme == symbol.lexeme and last_func.args_cells == symbol.args_cells:
-                return False
-        return True
+        last_func = self.current_function
+        if last_func is None and not self._alive:  # valid when nothing is left to compare, as the full scan had it
+            return True
+        return self._registry.is_unique(last_func)
 
     def remove_last_func(self) -> None:
-        last_func = self.get_symbol(category='func')
-        args_count = last_func.args_cells
-        for i in range(len(self._symbols)):
-            if self._symbols[i].address == last_func.address:
-                self._symbols.pop(i)
-                for _ in range(args_count):
-                    self._symbols.pop(i)
+        """Takes the current function and the args_cells symbols listed after it off the listing."""
+        last_func = self.current_function
+        address = last_func.address
+        for _ in range(last_func.args_cells + 1):
+            if address >= self._current_address:
+                raise IndexError('fewer symbols listed than the function has arguments')
+            self._remove(address)
+            address += self._step
+            while address in self._removed:
+                address += self._step
+
+    def _remove(self, address: int) -> None:
+        self._removed.add(address)
+        self._count -= 1
+        symbol = self._addresses.pop(address, None)
+        if symbol is not None:
+            discard(self._alive, symbol)
+            discard(self._lexemes[symbol.lexeme], symbol)
+            discard(self._categories[symbol.category], symbol)
+            self._registry.remove(symbol)
+            return
+        for frame in reversed(self._frames):
+            index = bisect_left(frame, address, key=attrgetter('address'))
+            if index < len(frame) and frame[index].address == address:
+                del frame[index]
                 return
 
+    def _archived(self, address: int) -> Symbol:
+        for frame in reversed(self._frames):
+            index = bisect_left(frame, address, key=attrgetter('address'))
+            if index < len(frame) and frame[index].address == address:
+                return frame[index]
+        return None
+
+    def _listed(self, addr) -> bool:
+        """Whether a symbol, live or killed, is listed at `addr`."""
+        return isinstance(addr, int) and self._start_address <= addr < self._current_address \
+            and (addr - self._start_address) % self._step == 0 and addr not in self._removed
+
     def kill_block(self, addr: str = None) -> None:
-        for symbol in reversed(self._symbols):
-            if symbol.address == addr:
-                break
+        """Kills the symbols declared after the one at `addr`, every symbol if there is none."""
+        listed = self._listed(addr)
+        alive = self._alive
+        frame = []
+        while alive and (not listed or alive[-1].address > addr):
+            symbol = alive.pop()
             symbol.alive = False
+            del self._addresses[symbol.address]
+            self._lexemes[symbol.lexeme].pop()
+            self._categories[symbol.category].pop()
+            self._registry.remove(symbol)
+            frame.append(symbol)
+        if frame and self._archive:
+            frame.reverse()
+            self._frames.append(frame)
 
     def scope_push(self):
-        self._scope_stack.append(len(self._symbols) - 1)
+        self._scope_stack.append(self._count - 1)
 
     def scope_pop(self):
         self._scope_stack.pop()
 
-    def __str__(self) -> str:
-        res = f'{"":<4}{"lexeme":<10} {"address":<10} {"PB_line":<10} {"category":<10}' + \
+    def lines(self) -> Iterator[str]:
+        yield f'{"":<4}{"lexeme":<10} {"address":<10} {"PB_line":<10} {"category":<10}' + \
               f' {"args_cells":<10} {"type":<10} {"line":<10} {"alive":<10} {"scope":<10} {"return_val":<10}\n'
-        count = 0
-        for symbol in self._symbols:
-            res += f'{count:<3} {str(symbol)}' + '\n'
-            count += 1
-        return res
+        symbols = chain(chain.from_iterable(self._frames), self._alive)
+        for count, symbol in enumerate(sorted(symbols, key=attrgetter('address'))):
+            yield f'{count:<3} {str(symbol)}' + '\n'
+
+    def __str__(self) -> str:
+        return ''.join(self.lines())
@@ -0,0 +1,92 @@
+from array import array
+from typing import Iterator
+
+VERTICAL = '│   '
+CONTINUED = '├── '
+LAST = '└── '
+EMPTY = '    '
+
+NONE = -1
+
+
+class ParseTree:
+    """
+    Parse tree kept in parallel arrays indexed by node: label ids, parents and doubly linked
+    sibling lists. Children are linked in front of their older siblings, so a node's child list
+    is in the order it is rendered in, and removing a node is a matter of relinking its neighbours.
+    """
+
+    def __init__(self) -> None:
+        self._label_ids = dict()
+        self._labels = list()
+        self.labels = array('I')
+        self.parents = array('i')
+        self.first_children = array('i')
+        self.next_siblings = array('i')
+        self.previous_siblings = array('i')
+
+    def label_id(self, label: str) -> int:
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self._labels)
+            self._labels.append(label)
+        return label_id
+
+    def add(self, label: str, parent: int = NONE) -> int:
+        """Adds a node under `parent`, or a root, and returns it. The newest child is drawn first."""
+        node = len(self.labels)
+        self.labels.append(self.label_id(label))
+        self.parents.append(parent)
+        self.first_children.append(NONE)
+        self.previous_siblings.append(NONE)
+        if parent == NONE:
+            self.next_siblings.append(NONE)
+        else:
+            sibling = self.first_children[parent]
+            self.next_siblings.append(sibling)
+            if sibling != NONE:
+                self.previous_siblings[sibling] = node
+            self.first_children[parent] = node
+        return node
+
+    def rename(self, node: int, label: str) -> None:
+        self.labels[node] = self.label_id(label)
+
+    def remove(self, node: int) -> None:
+        """Detaches `node`, and so its subtree, from its parent."""
+        parent = self.parents[node]
+        if parent == NONE:
+            return
+        previous, following = self.previous_siblings[node], self.next_siblings[node]
+        if previous == NONE:
+            self.first_children[parent] = following
+        else:
+            self.next_siblings[previous] = following
+        if following != NONE:
+            self.previous_siblings[following] = previous
+        self.parents[node] = self.previous_siblings[node] = self.next_siblings[node] = NONE
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def render(self, root: int = 0) -> Iterator[str]:
+        """Lines of the subtree of `root` drawn like anytree's ContStyle, without line ends."""
+        labels, words = self.labels, self._labels
+        first_children, next_siblings = self.first_children, self.next_siblings
+        yield words[labels[root]]
+        stack = [(first_children[root], '')]  # next child to draw on every level, with its indent
+        while stack:
+            node, indent = stack[-1]
+            if node == NONE:
+                stack.pop()
+                continue
+            sibling = next_siblings[node]
+            stack[-1] = sibling, indent
+            if sibling == NONE:
+                yield f'{indent}{LAST}{words[labels[node]]}'
+                child_indent = indent + EMPTY
+            else:
+                yield f'{indent}{CONTINUED}{words[labels[node]]}'
+                child_indent = indent + VERTICAL
+            if first_children[node] != NONE:
+                stack.append((first_children[node], child_indent))
@@ -0,0 +1,49 @@
+from typing import Iterator
+
+
+class InputBuffer:
+    """
+    Sliding window over the chunks of the input. Text before the start of the current lexeme
+    is dropped whenever a new chunk is appended, so every character is copied about once and
+    memory is bounded by the chunk size plus the longest lexeme, not by the size of the input.
+
+    A lexeme which is still open when the window runs out, a long comment say, does not have
+    its text copied over on every chunk: the window is held back whole, the lexeme starts at a
+    negative index, and its text is only joined by `lexeme` once it ends.
+    """
+
+    def __init__(self, chunks: Iterator[str]) -> None:
+        self._chunks = chunks
+        self._held = list()  # earlier windows, text[0] follows the last one
+        self.text = ''
+        self.offset = 0  # position of text[0] in the whole input
+        self.eof = False
+        self.fill(0)
+
+    def fill(self, keep: int) -> int:
+        """
+        Drops text[:keep], appends the next chunk and returns how far the indices moved. With
+        `keep` 0 or less the lexeme starts at or before text[0], and the text is held back instead.
+        """
+        chunk = next(self._chunks, '')
+        self.eof = not chunk
+        if keep > 0 or not self.text:
+            self._held = list()
+            self.text = self.text[keep:] + chunk
+            self.offset += keep
+            return keep
+        if not chunk:
+            return 0
+        if keep == 0:
+            self._held = list()
+        self._held.append(self.text)
+        shift = len(self.text)
+        self.text = chunk
+        self.offset += shift
+        return shift
+
+    def lexeme(self, start: int, end: int) -> str:
+        """text[start:end], where a negative start reaches back into the text held for an open lexeme."""
+        if start >= 0:
+            return self.text[start:end]
+        return ''.join(self._held)[start:] + self.text[:end]
@@ -0,0 +1,65 @@
+from typing import Collection, Iterator, List, NamedTuple
+
+from scanner.dfa import TableScanner
+from scanner.scanner import *
+
+
+class ChunkScanner(TableScanner):
+    """Scans one chunk of the input as if it were all of it, but leaves the end of input to the caller."""
+
+    def end_of_input(self):
+        return TokenType.EOF, '$'
+
+
+class LexedChunk(NamedTuple):
+    tokens: TokenStore
+    errors: TokenStore  # without the unclosed comment error, which is left to the end of input
+    symbols: List[str]  # keywords and ids in order of appearance
+    state: int  # DFA state at the end of the chunk, 8 is inside a /* comment */
+    pending: int  # start of the lexeme which was open at the end of the chunk
+    lineno: int  # line count at the end, the chunk starts on line 1
+
+
+def lex_chunk(text: str) -> LexedChunk:
+    scanner = ChunkScanner(iter([text]), artifacts=("tokens",))
+    while scanner.get_next_token()[0] != TokenType.EOF:
+        pass
+    return LexedChunk(scanner.tokens, scanner.errors, list(scanner.symbols), scanner.state, scanner.position,
+                      scanner.lineno)
+
+
+class LexedScanner(Scanner):
+    """Hands out the tokens of an input which has already been lexed."""
+
+    def __init__(self, chunks: Iterator[str] = None, writer: ArtifactWriter = None,
+                 artifacts: Collection[str] = ARTIFACTS, lexed: LexedChunk = None):
+        text = ''.join(chunks or read_chunks(buffer_size=1 << 20))
+        super().__init__(iter([text]), writer, artifacts)
+        self.next_token = 0
+        self.last_lineno = 1
+        self.load(text, lexed or self.lex(text))
+
+    def lex(self, text: str) -> LexedChunk:
+        return lex_chunk(text)
+
+    def load(self, text: str, lexed: LexedChunk) -> None:
+        self.tokens = lexed.tokens
+        self.errors.extend(lexed.errors)
+        for symbol in lexed.symbols:
+            self.symbols.install(symbol)
+        self.last_lineno = lexed.lineno
+        # an unclosed comment is reported by end_of_input, as it runs again on every later call
+        self.state = lexed.state
+        self.start_cursor = lexed.pending
+        self.end_cursor = len(text) + 1
+
+    def get_next_token(self):
+        if self.next_token < len(self.tokens):
+            token_type, token, _, self.lineno = self.tokens[self.next_token]
+            self.terminal = self.terminal_id(token_type, token)
+            if token_type == TokenType.ID or token_type == TokenType.KEYWORD:
+                self.identifier = self.symbols.find(token)
+            self.next_token += 1
+            return token_type, token
+        self.lineno = self.last_lineno
+        return self.end_of_input()
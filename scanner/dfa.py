@@ -0,0 +1,199 @@
+from scanner.scanner import *
+
+# character classes, the column index of the transition table
+DIGIT = 0
+ALPHA = 1
+ALNUM = 2  # non-ascii characters which are alphanumeric but neither digits nor letters
+DOT = 3
+SLASH = 4
+HASH = 5
+STAR = 6
+EQUALS = 7
+NEWLINE = 8
+BLANK = 9  # every other whitespace
+SYMBOL = 10
+OTHER = 11
+CLASSES_COUNT = 12
+
+DELIMITERS = (NEWLINE, BLANK, SYMBOL, STAR, EQUALS, SLASH, HASH)
+ALPHANUMERICS = (DIGIT, ALPHA, ALNUM)
+
+# negative table entries are errors, the rest are next states
+INVALID_INPUT = -1
+INVALID_NUMBER = -2
+UNMATCHED_COMMENT = -3
+INVALID_INPUT_RETRACT = -4  # a lone '/' gives its lookahead character back
+
+ERRORS = {
+    INVALID_INPUT: (LexicalError.INVALID_INPUT, 0),
+    INVALID_NUMBER: (LexicalError.INVALID_NUMBER, 0),
+    UNMATCHED_COMMENT: (LexicalError.UNMATCHED_COMMENT, 0),
+    INVALID_INPUT_RETRACT: (LexicalError.INVALID_INPUT, 1),
+}
+
+STATES_COUNT = 22
+
+
+def char_class(char: str) -> int:
+    if char == '\n':
+        return NEWLINE
+    elif char in WHITESPACES:
+        return BLANK
+    elif char in SINGLE_SYMBOLS:
+        return SYMBOL
+    elif char.isdigit():
+        return DIGIT
+    elif char.isalpha():
+        return ALPHA
+    elif char.isalnum():
+        return ALNUM
+    return {'.': DOT, '/': SLASH, '#': HASH, '*': STAR, '=': EQUALS}.get(char, OTHER)
+
+
+def build_transitions() -> tuple:
+    rows = [[INVALID_INPUT] * CLASSES_COUNT for _ in range(STATES_COUNT)]
+
+    def add(state, columns, next_state):
+        for column in columns:
+            rows[state][column] = next_state
+
+    # Initial state
+    add(0, (DIGIT,), 1)
+    add(0, (ALPHA,), 5)
+    add(0, (SLASH,), 7)
+    add(0, (HASH,), 11)
+    add(0, (NEWLINE, BLANK), 13)
+    add(0, (SYMBOL,), 14)
+    add(0, (STAR,), 15)
+    add(0, (EQUALS,), 18)
+    # Number no dot state
+    rows[1] = [INVALID_NUMBER] * CLASSES_COUNT
+    add(1, (DIGIT,), 1)
+    add(1, (DOT,), 2)
+    add(1, DELIMITERS, 4)
+    # Number with dot initial state
+    rows[2] = [INVALID_NUMBER] * CLASSES_COUNT
+    add(2, (DIGIT,), 3)
+    # Number with dot state
+    rows[3] = [INVALID_NUMBER] * CLASSES_COUNT
+    add(3, (DIGIT,), 3)
+    add(3, DELIMITERS, 4)
+    # ID, Keyword state
+    add(5, ALPHANUMERICS, 5)
+    add(5, DELIMITERS, 6)
+    # /* comment */ states
+    rows[7] = [INVALID_INPUT_RETRACT] * CLASSES_COUNT
+    add(7, (STAR,), 8)
+    rows[8] = [8] * CLASSES_COUNT
+    add(8, (STAR,), 9)
+    rows[9] = [8] * CLASSES_COUNT
+    add(9, (SLASH,), 10)
+    add(9, (STAR,), 9)
+    # #comment state
+    rows[11] = [11] * CLASSES_COUNT
+    add(11, (NEWLINE,), 12)
+    # WHITESPACE state
+    rows[13] = [21] * CLASSES_COUNT
+    add(13, (NEWLINE, BLANK), 13)
+    # */** state
+    add(15, (STAR,), 16)
+    add(15, (SLASH,), UNMATCHED_COMMENT)
+    add(15, (NEWLINE, BLANK, HASH) + ALPHANUMERICS, 17)
+    # =/== state
+    add(18, (EQUALS,), 19)
+    add(18, (NEWLINE, BLANK, SYMBOL, STAR, SLASH, HASH) + ALPHANUMERICS, 20)
+
+    return tuple(tuple(row) for row in rows)
+
+
+def build_final_states() -> tuple:
+    final = [None] * STATES_COUNT
+    retract = [0] * STATES_COUNT
+    for state, token_type, back in (
+            (4, TokenType.NUMBER, 1),
+            (6, TokenType.ID, 1),  # keywords are told apart from ids after retraction
+            (10, TokenType.COMMENT, 0),
+            (12, TokenType.COMMENT, 1),
+            (21, TokenType.WHITESPACE, 1),
+            (14, TokenType.SYMBOL, 0),
+            (16, TokenType.SYMBOL, 0),
+            (19, TokenType.SYMBOL, 0),
+            (17, TokenType.SYMBOL, 1),
+            (20, TokenType.SYMBOL, 1),
+    ):
+        final[state] = token_type
+        retract[state] = back
+    return tuple(final), tuple(retract)
+
+
+ASCII_CLASSES = {chr(code): char_class(chr(code)) for code in range(128)}
+TRANSITIONS = build_transitions()
+FINAL_STATES, RETRACT = build_final_states()
+COUNTS_LINE = tuple(state in (0, 8, 13) for state in range(STATES_COUNT))  # states where '\n' is a new line
+
+
+class TableScanner(Scanner):
+    """
+    Same DFA as Scanner, driven by the precomputed tables above instead of the if/elif chains.
+    """
+
+    def get_next_token(self):
+        transitions, final_states, retract, counts_line = TRANSITIONS, FINAL_STATES, RETRACT, COUNTS_LINE
+        classes = ASCII_CLASSES
+        recorded_types = self.recorded_types
+        terminal_ids = TERMINAL_IDS
+        source = self.input
+
+        code = self.code
+        size = len(code)
+        state, start, end, lineno = self.state, self.start_cursor, self.end_cursor, self.lineno
+        while True:
+            if end == size and not source.eof:
+                self.start_cursor, self.end_cursor = start, end
+                self.load_buffer()
+                start, end = self.start_cursor, self.end_cursor
+                code = self.code
+                size = len(code)
+
+            if end < size:
+                char = code[end]
+            elif end == size:
+                char = ' '
+            else:
+                break
+            end += 1
+
+            column = classes.get(char)
+            if column is None:
+                column = char_class(char)
+            if column == NEWLINE and counts_line[state]:
+                lineno += 1
+
+            state = transitions[state][column]
+            if state < 0:
+                error, back = ERRORS[state]
+                self.start_cursor, self.end_cursor, self.lineno = start, end - back, lineno
+                self.log_error(error)
+                start = end = self.end_cursor
+                state = 0
+                continue
+
+            token_type = final_states[state]
+            if token_type:
+                end -= retract[state]
+                token = code[start:end] if start >= 0 else source.lexeme(start, end)
+                if token_type == TokenType.ID:
+                    token_type = self.install_id(token)
+                    token = self.symbols[self.identifier]
+                    self.terminal = self.identifier if token_type == TokenType.KEYWORD else ID_TERMINAL
+                else:
+                    self.terminal = NUM_TERMINAL if token_type == TokenType.NUMBER else terminal_ids.get(token)
+                if token_type in recorded_types:
+                    self.tokens.append(token_type, token, source.offset + start, lineno)
+                self.start_cursor = self.end_cursor = end
+                self.lineno = lineno
+                self.state = 0
+                return token_type, token
+
+        self.state, self.start_cursor, self.end_cursor, self.lineno = state, start, end, lineno
+        return self.end_of_input()
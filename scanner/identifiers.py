@@ -0,0 +1,42 @@
+import sys
+from typing import Iterable, Iterator
+
+
+class IdentifierTable:
+    """
+    Insertion ordered table of interned lexemes, seeded with the keywords. An identifier's id is
+    its position in the table, so keywords own the first ids and telling them apart is a comparison.
+    """
+
+    def __init__(self, keywords: Iterable[str] = ()) -> None:
+        self._ids = dict()
+        self._lexemes = list()
+        for keyword in keywords:
+            self.install(keyword)
+        self._keywords_count = len(self._lexemes)
+
+    def install(self, lexeme: str) -> int:
+        identifier = self._ids.get(lexeme)
+        if identifier is None:
+            lexeme = sys.intern(lexeme)
+            identifier = self._ids[lexeme] = len(self._lexemes)
+            self._lexemes.append(lexeme)
+        return identifier
+
+    def is_keyword(self, identifier: int) -> bool:
+        return identifier < self._keywords_count
+
+    def find(self, lexeme: str) -> int:
+        return self._ids.get(lexeme)
+
+    def __getitem__(self, identifier: int) -> str:
+        return self._lexemes[identifier]
+
+    def __contains__(self, lexeme: str) -> bool:
+        return lexeme in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lexemes)
+
+    def __len__(self) -> int:
+        return len(self._lexemes)
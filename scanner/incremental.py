@@ -0,0 +1,90 @@
+from bisect import bisect_left
+from typing import NamedTuple
+
+from scanner.chunks import ChunkScanner, LexedChunk, LexedScanner, lex_chunk
+from scanner.scanner import *
+
+WINDOW = 4096  # characters handed to the scanner at a time
+
+
+class Edit(NamedTuple):
+    offset: int
+    deleted: int  # characters removed at offset
+    inserted: str  # text put in their place
+
+    def apply(self, text: str) -> str:
+        return text[:self.offset] + self.inserted + text[self.offset + self.deleted:]
+
+
+def relex(previous: LexedChunk, text: str, edit: Edit) -> LexedChunk:
+    """
+    Lexes `text`, the result of applying `edit` to the text of `previous`, by scanning again only
+    from the last token before the edit until a token starts where a token started before.
+
+    Tokens contain no new lines and start in the initial DFA state, so a new token which starts
+    after the edit, on the offset of an old token, means the rest of the old scan can be reused
+    as it is, moved by the change in length and in line count. An edit which opens or closes a
+    comment scans on until such a token or the end of input.
+    """
+    old_tokens, old_errors = previous.tokens, previous.errors
+    shift = len(edit.inserted) - edit.deleted
+    edit_end = edit.offset + len(edit.inserted)
+
+    first = bisect_left(old_tokens.starts, edit.offset) - 1  # the last token starting before the edit
+    restart, lineno = (old_tokens.starts[first], old_tokens.lines[first]) if first >= 0 else (0, 1)
+    first = max(first, 0)
+
+    scanner = ChunkScanner(text[offset:offset + WINDOW] for offset in range(restart, len(text), WINDOW))
+    scanner.lineno = lineno
+    tokens = scanner.tokens
+    synced = None
+    recorded = 0
+    while scanner.get_next_token()[0] != TokenType.EOF:
+        if len(tokens) == recorded:  # whitespace or a comment
+            continue
+        recorded = len(tokens)
+        start = restart + tokens.starts[-1]
+        if start >= edit_end:
+            old = bisect_left(old_tokens.starts, start - shift)
+            if old < len(old_tokens) and old_tokens.starts[old] == start - shift:
+                synced = old
+                break
+
+    result_tokens = TokenStore(TokenType)
+    result_errors = TokenStore(LexicalError, template='({lexeme}, {kind})')
+    result_tokens.extend(old_tokens, last=first)
+    result_errors.extend(old_errors, last=bisect_left(old_errors.starts, restart))
+    if synced is None:
+        result_tokens.extend(tokens, restart)
+        result_errors.extend(scanner.errors, restart)
+        state, pending, lineno = scanner.state, restart + scanner.position, scanner.lineno
+    else:
+        lines = tokens.lines[-1] - old_tokens.lines[synced]
+        result_tokens.extend(tokens, restart, last=len(tokens) - 1)
+        result_tokens.extend(old_tokens, shift, lines, first=synced)
+        result_errors.extend(scanner.errors, restart)
+        result_errors.extend(old_errors, shift, lines, first=bisect_left(old_errors.starts, old_tokens.starts[synced]))
+        state, pending, lineno = previous.state, previous.pending + shift, previous.lineno + lines
+    symbols = list(KEYWORDS) + result_tokens.distinct(TokenType.ID)
+    return LexedChunk(result_tokens, result_errors, symbols, state, pending, lineno)
+
+
+class IncrementalLexer:
+    """
+    Keeps the tokens of a text which is being edited, for example by an editor which compiles
+    after every key stroke.
+    """
+
+    def __init__(self, text: str = '') -> None:
+        self.text = text
+        self.lexed = lex_chunk(text)
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> LexedChunk:
+        edit = Edit(offset, deleted, inserted)
+        self.text = edit.apply(self.text)
+        self.lexed = relex(self.lexed, self.text, edit)
+        return self.lexed
+
+    def scanner(self, **kwargs) -> LexedScanner:
+        """Scanner handing the current tokens to a parser."""
+        return LexedScanner(iter([self.text]), lexed=self.lexed, **kwargs)
@@ -0,0 +1,70 @@
+import os
+from typing import Collection, Iterator, List
+
+from scanner.chunks import LexedChunk, LexedScanner, lex_chunk
+from scanner.scanner import *
+
+MIN_CHUNK_SIZE = 1 << 16
+CHUNKS_PER_WORKER = 4
+
+
+def split_lines(text: str, size: int) -> List[int]:
+    """Start offsets of chunks of about `size` characters, each starting right after a new line."""
+    starts = [0]
+    while True:
+        cut = text.find('\n', starts[-1] + size) + 1
+        if cut == 0 or cut == len(text):
+            return starts
+        starts.append(cut)
+
+
+def merge(starts: List[int], results: List[LexedChunk]) -> LexedChunk:
+    tokens = TokenStore(TokenType)
+    errors = TokenStore(LexicalError, template='({lexeme}, {kind})')
+    symbols = IdentifierTable(KEYWORDS)
+    line = 0
+    for start, result in zip(starts, results):
+        tokens.extend(result.tokens, start, line)
+        errors.extend(result.errors, start, line)
+        for symbol in result.symbols:
+            symbols.install(symbol)
+        line += result.lineno - 1
+    last = results[-1]
+    return LexedChunk(tokens, errors, list(symbols), last.state, starts[-1] + last.pending, line + 1)
+
+
+class ParallelScanner(LexedScanner):
+    """
+    Reads the whole input, lexes chunks of it in a process pool and hands out the merged tokens.
+
+    Chunks start after a new line, where the DFA is back in its initial state unless the new line
+    is inside a block comment. Every chunk is lexed speculatively from the initial state, and a
+    chunk which ends inside a comment is lexed again together with the next one, so the merged
+    tokens, errors and symbols are exactly those of a sequential scan.
+    """
+
+    def __init__(self, chunks: Iterator[str] = None, writer: ArtifactWriter = None,
+                 artifacts: Collection[str] = ARTIFACTS, workers: int = None):
+        self.workers = workers or os.cpu_count()
+        super().__init__(chunks, writer, artifacts)
+
+    def lex(self, text: str) -> LexedChunk:
+        size = max(len(text) // (self.workers * CHUNKS_PER_WORKER), MIN_CHUNK_SIZE)
+        starts = split_lines(text, size) if self.workers > 1 else [0]
+        pieces = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+        if len(pieces) > 1:
+            from concurrent.futures import ProcessPoolExecutor  # a tenth of the compiler's start up, when imported
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(lex_chunk, pieces))
+        else:
+            results = [lex_chunk(piece) for piece in pieces]
+
+        index = 0
+        while index < len(results) - 1:
+            if results[index].state == 8:  # the boundary was inside a comment
+                pieces[index:index + 2] = [pieces[index] + pieces[index + 1]]
+                results[index:index + 2] = [lex_chunk(pieces[index])]
+                del starts[index + 1]
+            else:
+                index += 1
+        return merge(starts, results) if len(results) > 1 else results[0]
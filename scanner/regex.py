@@ -0,0 +1,82 @@
+import re
+from collections import deque
+
+from scanner.dfa import TableScanner
+from scanner.scanner import *
+
+_WHITESPACE = r' \n\r\t\v\f'
+_DELIMITER = rf'(?=[{_WHITESPACE};:,\[\]()+\-<*=/#])'
+
+# every alternative either ends on its own or needs a lookahead character, so a match never
+# stops early at the end of a buffer and never covers input which the DFA would reject
+MASTER_PATTERN = re.compile(rf'''
+    (?P<NUMBER>[0-9]+(?:\.[0-9]+)?){_DELIMITER}
+  | (?P<ID>[A-Za-z][A-Za-z0-9]*){_DELIMITER}
+  | (?P<SYMBOL>==|\*\*|[;:,\[\]()+\-<]
+        |\*(?=[{_WHITESPACE}\#A-Za-z0-9])
+        |=(?=[{_WHITESPACE};:,\[\]()+\-<*/\#A-Za-z0-9]))
+  | (?P<COMMENT>/\*[^*]*\*+(?:[^/*][^*]*\*+)*/|\#[^\n]*(?=\n))
+  | (?P<WHITESPACE>[{_WHITESPACE}]+)(?=[^{_WHITESPACE}])
+''', re.VERBOSE)
+
+GROUPS = {token_type.name: token_type for token_type in TokenType}  # the groups are named after the token types
+
+
+class RegexScanner(TableScanner):
+    """
+    Lexes the current buffers in bulk, matching tokens back to back with one master pattern and
+    queueing them to be handed out one at a time. Whatever the pattern can not take, errors, EOF
+    and tokens crossing the end of the buffers, is left to the table driven DFA once the queue
+    has run dry.
+    """
+
+    def __init__(self, chunks: Iterator[str] = None, writer: ArtifactWriter = None,
+                 artifacts: Collection[str] = ARTIFACTS):
+        super().__init__(chunks, writer, artifacts)
+        self.pending = deque()  # (token type, lexeme, terminal, identifier, line number) of the tokens lexed ahead
+        self.recorded_groups = frozenset(token_type.name for token_type in self.recorded_types)
+
+    def get_next_token(self):
+        if not self.pending and not self.lex_buffer():
+            return super().get_next_token()
+        token_type, token, self.terminal, identifier, self.lineno = self.pending.popleft()
+        if identifier is not None:
+            self.identifier = identifier
+        return token_type, token
+
+    def lex_buffer(self) -> bool:
+        """Queues the tokens matched from the end cursor on and tells whether there were any."""
+        pending, append, symbols, recorded = self.pending, self.tokens.append, self.symbols, self.recorded_groups
+        offset, lineno, end = self.input.offset, self.lineno, self.end_cursor
+        for match in iter(MASTER_PATTERN.scanner(self.code, end).match, None):
+            token, kind, end = match.group(), match.lastgroup, match.end()
+            if kind == 'WHITESPACE':
+                lineno += token.count('\n')
+                pending.append((TokenType.WHITESPACE, token, None, None, lineno))
+                continue
+            if kind == 'COMMENT':
+                if token[0] == '/':  # the DFA does not count new lines right after a '*'
+                    body = token[2:]
+                    lineno += body.count('\n') - body.count('*\n')
+                pending.append((TokenType.COMMENT, token, None, None, lineno))
+                continue
+            identifier = None
+            if kind == 'ID':
+                identifier = symbols.install(token)
+                token = symbols[identifier]
+                if symbols.is_keyword(identifier):
+                    kind, terminal = 'KEYWORD', identifier
+                else:
+                    terminal = ID_TERMINAL
+            elif kind == 'NUMBER':
+                terminal = NUM_TERMINAL
+            else:
+                terminal = TERMINAL_IDS[token]
+            token_type = GROUPS[kind]
+            if kind in recorded:
+                append(token_type, token, offset + match.start(), lineno)
+            pending.append((token_type, token, terminal, identifier, lineno))
+        if not pending:  # left to the DFA, which may be keeping an open comment at start_cursor
+            return False
+        self.start_cursor = self.end_cursor = end
+        return True
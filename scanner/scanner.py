@@ -1,6 +1,9 @@
 import enum
-from collections import defaultdict
+from typing import Collection, Iterable, Iterator
 
+from scanner.buffer import InputBuffer
+from scanner.identifiers import IdentifierTable
+from scanner.token_store import TokenStore
 from utils.file_handler import *
 
 
@@ -24,18 +27,23 @@ class LexicalError(enum.Enum):
 WHITESPACES = (' ', '\n', '\r', '\t', '\v', '\f')
 SINGLE_SYMBOLS = (';', ':', ',', '[', ']', '(', ')', '+', '-', '<')
 KEYWORDS = ('break', 'continue', 'def', 'else', 'if', 'return', 'while', 'global')
+# terminals of the grammar, keywords first so that their ids are those of the identifier table
+TERMINALS = KEYWORDS + ('ID', 'NUM', '$') + SINGLE_SYMBOLS + ('*', '**', '=', '==')
+TERMINAL_IDS = {terminal: terminal_id for terminal_id, terminal in enumerate(TERMINALS)}
+ID_TERMINAL, NUM_TERMINAL, EOF_TERMINAL = TERMINAL_IDS['ID'], TERMINAL_IDS['NUM'], TERMINAL_IDS['$']
+
+RECORDED_TYPES = frozenset((TokenType.NUMBER, TokenType.ID, TokenType.KEYWORD, TokenType.SYMBOL))
+ARTIFACTS = ('tokens', 'lexical_errors', 'symbol_table_old')
 
 
 class Scanner:
-    def __init__(self):
+    def __init__(self, chunks: Iterator[str] = None, writer: ArtifactWriter = None,
+                 artifacts: Collection[str] = ARTIFACTS):
         self.buffer = 4096
-        self.buffered_reader = read_chunks(buffer_size=self.buffer)
-        self.first_half = next(self.buffered_reader)
-
-        try:
-            self.second_half = next(self.buffered_reader)
-        except StopIteration:
-            self.second_half = ""
+        self.writer = writer or ArtifactWriter()
+        self.artifacts = artifacts
+        self.input = InputBuffer(chunks or read_chunks(buffer_size=self.buffer))
+        self.code = self.input.text
 
         self.lineno = 1
         self.start_cursor = 0
@@ -43,29 +51,30 @@ class Scanner:
 
         self.state = 0
 
-        self.tokens = defaultdict(list)
-        self.errors = defaultdict(list)
-        self.symbols = list(KEYWORDS)
+        self.tokens = TokenStore(TokenType)
+        self.recorded_types = RECORDED_TYPES if "tokens" in artifacts else frozenset()  # kept in self.tokens
+        self.errors = TokenStore(LexicalError, template='({lexeme}, {kind})')
+        self.symbols = IdentifierTable(KEYWORDS)
+        self.identifier = None  # id of the last ID or KEYWORD in self.symbols, in every scanner mode
+        self.terminal = None  # terminal id of the last token, None for whitespace and comments
 
     def load_buffer(self):
-        self.first_half = self.second_half
-        self.second_half = next(self.buffered_reader)
-        self.start_cursor -= self.buffer
-        self.end_cursor -= self.buffer
+        shift = self.input.fill(keep=self.start_cursor)
+        self.code = self.input.text
+        self.start_cursor -= shift
+        self.end_cursor -= shift
 
     def get_next_token(self):
         while True:
-            if self.end_cursor == 2 * self.buffer:
+            if self.end_cursor == len(self.code) and not self.input.eof:
                 self.load_buffer()
 
-            self.code = self.first_half + self.second_half
-
-            if len(self.code) < 2 * self.buffer and self.end_cursor > len(self.code):
-                break
-            elif self.end_cursor == len(self.code) < 2 * self.buffer:
-                char = ' '
-            else:
+            if self.end_cursor < len(self.code):
                 char = self.code[self.end_cursor]
+            elif self.end_cursor == len(self.code):
+                char = ' '  # the end of input separates the last token
+            else:
+                break
 
             self.end_cursor += 1
 
@@ -78,20 +87,27 @@ class Scanner:
             token_type = self.check_final_states()
             if token_type:
                 token = self.get_lexeme()
-                if token_type not in [TokenType.WHITESPACE, TokenType.COMMENT]:
-                    self.tokens[self.lineno].append(
-                        f"({token_type.value}, {token})")
+                if token_type in self.recorded_types:
+                    self.tokens.append(token_type, token, self.position, self.lineno)
+                self.terminal = self.terminal_id(token_type, token)
                 self.start_cursor = self.end_cursor
                 self.state = 0
                 return token_type, token
 
+        return self.end_of_input()
+
+    def end_of_input(self):
         if self.state == 8:
             self.log_error(LexicalError.UNCLOSED_COMMENT)
 
-        write_all(filename="tokens", string=self.tokens_to_string(self.tokens))
-        write_all(filename="lexical_errors", string=self.errors_to_string(self.errors))
-        write_all(filename="symbol_table_old", string=self.symbols_to_string(self.symbols))
+        if "tokens" in self.artifacts:
+            self.writer.write("tokens", self.tokens.render())
+        if "lexical_errors" in self.artifacts:
+            self.writer.write("lexical_errors", self.errors_lines(self.errors))
+        if "symbol_table_old" in self.artifacts:
+            self.writer.write("symbol_table_old", self.symbols_lines(self.symbols))
 
+        self.terminal = EOF_TERMINAL
         return TokenType.EOF, '$'
 
     def set_next_state(self, char):
@@ -203,13 +219,24 @@ class Scanner:
                 return LexicalError.INVALID_INPUT
 
     def get_lexeme(self):
-        return self.code[self.start_cursor:self.end_cursor]
+        return self.input.lexeme(self.start_cursor, self.end_cursor)
+
+    @property
+    def position(self) -> int:
+        # offset of the current lexeme in the whole input
+        return self.input.offset + self.start_cursor
 
-    def install_id(self, token: str) -> bool:
-        if token in self.symbols:
-            return False
-        self.symbols.append(token)
-        return True
+    def install_id(self, token: str) -> TokenType:
+        self.identifier = self.symbols.install(token)
+        return TokenType.KEYWORD if self.symbols.is_keyword(self.identifier) else TokenType.ID
+
+    @staticmethod
+    def terminal_id(token_type: TokenType, token: str) -> int:
+        if token_type == TokenType.ID:
+            return ID_TERMINAL
+        elif token_type == TokenType.NUMBER:
+            return NUM_TERMINAL
+        return TERMINAL_IDS.get(token)  # keywords and symbols are their own terminals
 
     def check_final_states(self):
         # Number with dot final state
@@ -219,12 +246,7 @@ class Scanner:
         # ID, Keyword final state
         elif self.state == 6:
             self.end_cursor -= 1
-            token = self.get_lexeme()
-            if token in KEYWORDS:
-                return TokenType.KEYWORD
-            else:
-                self.install_id(token)
-                return TokenType.ID
+            return self.install_id(self.get_lexeme())
         # /* comment */ final state
         elif self.state == 10:
             return TokenType.COMMENT
@@ -246,42 +268,17 @@ class Scanner:
 
     def log_error(self, error):
         invalid_string = self.get_lexeme()
-        if error == LexicalError.INVALID_INPUT:
-            self.errors[self.lineno].append(
-                f"({invalid_string}, {error.value})")
-        elif error == LexicalError.UNCLOSED_COMMENT:
-            self.errors[self.lineno].append(
-                f"({invalid_string[:10]}..., {error.value})")
-        elif error == LexicalError.UNMATCHED_COMMENT:
-            self.errors[self.lineno].append(
-                f"({invalid_string}, {error.value})")
-        elif error == LexicalError.INVALID_NUMBER:
-            self.errors[self.lineno].append(
-                f"({invalid_string}, {error.value})")
+        if error == LexicalError.UNCLOSED_COMMENT:
+            invalid_string = f"{invalid_string[:10]}..."
+        self.errors.append(error, invalid_string, self.position, self.lineno)
 
     @staticmethod
-    def defaultdict_to_string(defaultdict: defaultdict(list)) -> str:
-        result = ""
-        for key, value in defaultdict.items():
-            string = ' '.join(map(str, value))
-            result += f"{key}.\t{string}\n"
-        return result
-
-    @classmethod
-    def tokens_to_string(cls, tokens: defaultdict(list)) -> str:
-        return cls.defaultdict_to_string(tokens)
-
-    @classmethod
-    def errors_to_string(cls, lexeme_errors: defaultdict(list)) -> str:
-        if len(lexeme_errors) == 0:
-            return "There is no lexical error."
-        return cls.defaultdict_to_string(lexeme_errors)
+    def errors_lines(errors: TokenStore) -> Iterable[str]:
+        if len(errors) == 0:
+            return ["There is no lexical error."]
+        return errors.render()
 
     @staticmethod
-    def symbols_to_string(list_data: list) -> str:
-        result = ""
-        count = 1
-        for symbol in list_data:
-            result += f"{count}.\t{symbol}\n"
-            count += 1
-        return result
+    def symbols_lines(symbols: Iterable[str]) -> Iterator[str]:
+        for count, symbol in enumerate(symbols, start=1):
+            yield f"{count}.\t{symbol}\n"
@@ -0,0 +1,79 @@
+import enum
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import compress
+from typing import Iterator, List, Tuple, Type
+
+
+class TokenStore:
+    """
+    Compact record of scanned tokens (or lexical errors): kind codes, lexeme ids, start offsets
+    and line numbers live in parallel arrays. Every distinct (kind, lexeme) pair is stored once
+    and the text of tokens.txt is only produced while it is being written.
+    """
+
+    def __init__(self, kinds: Type[enum.Enum], template: str = '({kind}, {lexeme})') -> None:
+        self._kinds = tuple(kinds)
+        self._codes = {kind: code for code, kind in enumerate(self._kinds)}
+        self._formats = [template.format(kind=kind.value, lexeme='%s') for kind in self._kinds]
+        self._pools = [dict() for _ in self._kinds]  # lexeme -> lexeme id, one dict per kind
+        self._pool = list()  # lexeme id -> (kind code, lexeme)
+        self.kinds = array('B')
+        self.lexemes = array('I')
+        self.starts = array('Q')
+        self.lines = array('I')
+
+    def _lexeme_id(self, code: int, lexeme: str) -> int:
+        pool = self._pools[code]
+        lexeme_id = pool.get(lexeme)
+        if lexeme_id is None:
+            lexeme_id = pool[lexeme] = len(self._pool)
+            self._pool.append((code, sys.intern(lexeme)))
+        return lexeme_id
+
+    def append(self, kind: enum.Enum, lexeme: str, start: int, line: int) -> None:
+        code = self._codes[kind]
+        pool = self._pools[code]  # _lexeme_id, inlined as this runs once per token
+        lexeme_id = pool.get(lexeme)
+        if lexeme_id is None:
+            lexeme_id = pool[lexeme] = len(self._pool)
+            self._pool.append((code, sys.intern(lexeme)))
+        self.kinds.append(code)
+        self.lexemes.append(lexeme_id)
+        self.starts.append(start)
+        self.lines.append(line)
+
+    def extend(self, other: 'TokenStore', start: int = 0, line: int = 0, first: int = 0, last: int = None) -> None:
+        """
+        Appends records [first:last] of `other`, a store of the same kinds, moved by `start`
+        characters and `line` lines.
+        """
+        lexeme_ids = [self._lexeme_id(code, lexeme) for code, lexeme in other._pool]
+        self.kinds.extend(other.kinds[first:last])
+        self.lexemes.extend(map(lexeme_ids.__getitem__, other.lexemes[first:last]))
+        self.starts.extend(map(start.__add__, other.starts[first:last]))
+        self.lines.extend(map(line.__add__, other.lines[first:last]))
+
+    def distinct(self, kind: enum.Enum) -> List[str]:
+        """Lexemes of the records of `kind`, once each, in order of first appearance."""
+        code = self._codes[kind]
+        lexeme_ids = dict.fromkeys(compress(self.lexemes, map(code.__eq__, self.kinds)))
+        return [self._pool[lexeme_id][1] for lexeme_id in lexeme_ids]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> Tuple[enum.Enum, str, int, int]:
+        code, lexeme = self._pool[self.lexemes[index]]
+        return self._kinds[code], lexeme, self.starts[index], self.lines[index]
+
+    def render(self) -> Iterator[str]:
+        """Yields one line of text per source line, in order of appearance."""
+        entries = [self._formats[code] % lexeme for code, lexeme in self._pool]
+        lexemes, lines = self.lexemes, self.lines
+        start = 0
+        while start < len(lines):
+            end = bisect_right(lines, lines[start], start)  # line numbers never decrease
+            yield f"{lines[start]}.\t{' '.join(map(entries.__getitem__, lexemes[start:end]))}\n"
+            start = end
@@ -1,3 +1,7 @@
+import os
+from typing import Iterable, Iterator
+
+
 def read_chunks(filename: str = "input", format: str = ".txt", buffer_size: int = 4096):
     with open(filename + format, "r") as file:
         chunk = file.read(buffer_size)
@@ -6,6 +10,18 @@ def read_chunks(filename: str = "input", format: str = ".txt", buffer_size: int
             chunk = file.read(buffer_size)
 
 
+class FileChunks:
+    """The chunks of a file as read_chunks reads them, read anew by every iteration."""
+
+    def __init__(self, filename: str = "input", format: str = ".txt", buffer_size: int = 4096) -> None:
+        self.filename = filename
+        self.format = format
+        self.buffer_size = buffer_size
+
+    def __iter__(self) -> Iterator[str]:
+        return read_chunks(self.filename, self.format, self.buffer_size)
+
+
 def read_all(filename: str = "input", format: str = ".txt") -> str:
     try:
         with open(filename + format, 'r') as file:
@@ -21,3 +37,97 @@ def write_all(filename: str = "output", format: str = ".txt", string: str = "")
         return True
     except IOError:
         return False
+
+
+def write_lines(filename: str = "output", format: str = ".txt", lines: Iterable[str] = (),
+                buffer_size: int = -1) -> bool:
+    try:
+        with open(filename + format, "w", buffering=buffer_size) as file:
+            file.writelines(lines)
+        return True
+    except IOError:
+        return False
+
+
+def join_lines(items: Iterable[str], separator: str = "\n") -> Iterator[str]:
+    """Streams `separator.join(items)` piece by piece."""
+    items = iter(items)
+    for item in items:
+        yield item
+        break
+    for item in items:
+        yield separator
+        yield item
+
+
+class ArtifactWriter:
+    """
+    Destination of every compiler output file. Each phase hands over its artifact as an iterable
+    of lines once it is ready, and the lines are streamed into a buffered file without building
+    the whole text first. With `background` set, files are written by a worker thread so the
+    compiler can carry on while earlier artifacts are still being written; `close` waits for it.
+    The lines are still taken on the calling thread, as they are mostly lazy views of state the
+    compiler goes on changing, so the worker only ever sees a snapshot of them.
+    """
+
+    def __init__(self, directory: str = "", format: str = ".txt", background: bool = False,
+                 buffer_size: int = 1 << 16) -> None:
+        self._directory = directory
+        self._format = format
+        self._buffer_size = buffer_size
+        self._jobs = None
+        self._thread = None
+        self._error = None
+        if background:
+            import queue  # only a background writer pays for these at start up
+            import threading
+            self._jobs = queue.Queue(maxsize=16)
+            self._thread = threading.Thread(target=self._work, name='artifact-writer', daemon=True)
+            self._thread.start()
+
+    def write(self, name: str, lines: Iterable[str]) -> None:
+        if self._jobs is None:
+            self._write(name, lines)
+        else:
+            self._jobs.put((name, tuple(lines)))
+
+    def _write(self, name: str, lines: Iterable[str]) -> bool:
+        return write_lines(filename=os.path.join(self._directory, name), format=self._format, lines=lines,
+                           buffer_size=self._buffer_size)
+
+    def _work(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                self._write(*job)
+            except Exception as error:  # raised again by close, in the compiler's thread
+                self._error = self._error or error
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+            self._thread = self._jobs = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def __enter__(self) -> 'ArtifactWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class MemoryWriter(ArtifactWriter):
+    """ArtifactWriter keeping every artifact as a string in `artifacts` instead of writing files."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.artifacts = dict()
+
+    def _write(self, name: str, lines: Iterable[str]) -> bool:
+        self.artifacts[name] = ''.join(lines)
+        return True